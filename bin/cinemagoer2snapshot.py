@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# Copyright 2026 Davide Alberani <da@mimante.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Export a Cinemagoer database into a read-only binary snapshot."""
+
+import argparse
+import logging
+
+from imdb.parser.s3.snapshot import SNAPSHOT_TABLES, export_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            'Export the tables of a Cinemagoer database into a snapshot file, '
+            'read with the snapshot:/// URI scheme.'
+        )
+    )
+    parser.add_argument('db_uri', help='URI of the database to export')
+    parser.add_argument('snapshot', help='path of the snapshot file to write')
+    parser.add_argument(
+        '--verbose', help='increase verbosity', action='store_true'
+    )
+    parser.add_argument(
+        '--tables',
+        help='comma-separated tables to export (default: %(default)s)',
+        default=','.join(SNAPSHOT_TABLES),
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO
+    )
+    tables = [name.strip() for name in args.tables.split(',') if name.strip()]
+    stats = export_snapshot(args.db_uri, args.snapshot, tables=tables)
+    logging.info('wrote %s: %d bytes in %.1f seconds', args.snapshot,
+                 stats['bytes'], stats['seconds'])
+
+
+if __name__ == '__main__':
+    main()
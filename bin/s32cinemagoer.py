@@ -12,6 +12,7 @@ import argparse
 import logging
 
 from imdb.parser.s3.importer import import_dir
+from imdb.parser.s3.utils import DEFAULT_WEIGHT_VOTES
 
 
 def main():
@@ -38,11 +39,30 @@ def main():
         ),
         action='store_true',
     )
+    parser.add_argument(
+        '--weight-votes',
+        help=(
+            'votes given to the mean rating by the weighted ratings of '
+            'get_top_titles (default: %(default)s)'
+        ),
+        type=float,
+        default=DEFAULT_WEIGHT_VOTES,
+    )
+    parser.add_argument(
+        '--collaborators',
+        help=(
+            'also build the table of the people credited together, used by '
+            'get_collaborators; it can be much larger than the datasets'
+        ),
+        action='store_true',
+    )
     args = parser.parse_args()
     logging.basicConfig(
         level=logging.DEBUG if args.verbose else logging.INFO
     )
-    import_dir(args.tsv_files_dir, args.db_uri, cleanup=args.cleanup)
+    import_dir(args.tsv_files_dir, args.db_uri, cleanup=args.cleanup,
+               weight_votes=args.weight_votes,
+               collaborators=args.collaborators)
 
 
 if __name__ == '__main__':
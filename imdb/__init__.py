@@ -20,12 +20,15 @@ from the IMDb database. It can parse the data from https://datasets.imdbws.com/
 """
 
 import configparser
+import inspect
 import os
+import pickle
 import sys
 from importlib.util import find_spec
 from types import FunctionType, MethodType
 
 from imdb import Character, Company, Movie, Person
+from imdb._cache import SQLiteResultCache, cache_size_option, make_cache
 from imdb._exceptions import IMDbDataAccessError, IMDbError
 from imdb._logging import LEVELS as _LOGGING_LEVELS
 from imdb._logging import imdbpyLogger as _imdb_logger
@@ -72,6 +75,29 @@ def _normalize_access_system(value):
     return value
 
 
+def _accepts_fields(method):
+    """Tell whether an info set method takes the fields keyword."""
+    try:
+        parameters = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(parameter.name == 'fields' or
+               parameter.kind == parameter.VAR_KEYWORD
+               for parameter in parameters)
+
+
+def _project_info_set(ret, fields):
+    """Return the value of an info set, keeping in its data only the
+    given fields; used for the methods that cannot project it."""
+    data = ret.get('data') if isinstance(ret, dict) else None
+    if not isinstance(data, dict):
+        return ret
+    ret = dict(ret)
+    ret['data'] = {key: value for key, value in data.items()
+                   if key in fields}
+    return ret
+
+
 def _config_file_candidates():
     """Return configuration paths in discovery-precedence order."""
     current_directory = os.getcwd()
@@ -267,6 +293,23 @@ class IMDbBase:
         self._keywordsResults = keywordsResults
         self._reraise_exceptions = keywords.get('reraiseExceptions', True)
         self.set_imdb_urls(keywords.get('imdbURL_base') or imdbURL_base)
+        # Optional cache of the objects returned by get_movie and
+        # get_person, bounded to objectCacheSize bytes.
+        objectCacheSize = cache_size_option(
+            'objectCacheSize', keywords.get('objectCacheSize')
+        )
+        self._object_cache = None
+        if objectCacheSize:
+            self._object_cache = make_cache(
+                objectCacheSize, keywords.get('objectCachePolicy') or 'lru'
+            )
+        # Optional cache of the same objects in a file, shared by every
+        # process using the same resultCacheFile.
+        self._result_cache = None
+        if keywords.get('resultCacheFile'):
+            self._result_cache = SQLiteResultCache(
+                keywords['resultCacheFile']
+            )
 
     def set_imdb_urls(self, imdbURL_base):
         """Set the urls used accessing the IMDb site."""
@@ -363,7 +406,114 @@ class IMDbBase:
         """Return the list of info set available for companies."""
         return self._get_infoset('get_company_')
 
-    def get_movie(self, movieID, info=Movie.Movie.default_info, modFunct=None):
+    def _cache_generation(self):
+        """Return a token identifying the current version of the data;
+        cached objects are discarded when it changes."""
+        return None
+
+    def _caches_objects(self):
+        """Tell whether the objects returned by get_movie and get_person
+        can be stored, serialized, in the object cache and in the result
+        cache file."""
+        return True
+
+    def _shares_cache_generation(self):
+        """Tell whether the token returned by _cache_generation identifies
+        the data in every process, as entries of the result cache file,
+        shared by many processes, require."""
+        return True
+
+    def _object_cache_key(self, mop, prefix, mopID, info, fields=None):
+        if fields is not None:
+            fields = tuple(sorted(set(fields)))
+        if info is None:
+            info = mop.default_info
+        elif info == 'all':
+            info = self._get_infoset('get_%s_' % prefix)
+        if not isinstance(info, (tuple, list)):
+            info = (info,)
+        return (prefix, mopID, tuple(sorted({i for i in info if i})), fields)
+
+    def _cached_update(self, mop, prefix, mopID, info, fields=None):
+        """Update mop like update, serving it from the object cache or
+        from the result cache file when possible; both store serialized
+        objects, so that every caller gets its own copy."""
+        cache = self._object_cache
+        result_cache = self._result_cache
+        if result_cache is not None and not self._shares_cache_generation():
+            result_cache = None
+        if cache is None and result_cache is None or \
+                not self._caches_objects():
+            self.update(mop, info, fields=fields)
+            return
+        key = self._object_cache_key(mop, prefix, mopID, info, fields)
+        generation = self._cache_generation()
+        payload = None
+        if cache is not None:
+            cache.check_generation(generation)
+            payload = cache.get(key)
+        if payload is None and result_cache is not None:
+            payload = result_cache.get(key, generation)
+            if payload is not None and cache is not None:
+                cache.set(key, payload, generation=generation)
+        if payload is not None:
+            (data, mop.current_info, mop.infoset2keys, mop.key2infoset,
+             titlesRefs, namesRefs, charactersRefs) = pickle.loads(payload)
+            mop.set_data(data, override=True)
+            mop.update_titlesRefs(titlesRefs)
+            mop.update_namesRefs(namesRefs)
+            mop.update_charactersRefs(charactersRefs)
+            return
+        self.update(mop, info, fields=fields)
+        if not mop:
+            return
+        try:
+            payload = pickle.dumps(
+                (mop.data, mop.current_info, mop.infoset2keys,
+                 mop.key2infoset, mop.titlesRefs, mop.namesRefs,
+                 mop.charactersRefs),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        except Exception:
+            _imdb_logger.debug('unable to cache %s %s', prefix, mopID,
+                               exc_info=True)
+            return
+        if cache is not None:
+            cache.set(key, payload, generation=generation)
+        if result_cache is not None:
+            result_cache.set(key, generation, payload)
+
+    def object_cache_stats(self):
+        """Return the counters and the size of the object cache, as a
+        dictionary, or None if the object cache is disabled."""
+        if self._object_cache is None:
+            return None
+        return self._object_cache.stats()
+
+    def result_cache_stats(self):
+        """Return the counters and the number of entries of the result
+        cache file, as a dictionary, or None if it is disabled."""
+        if self._result_cache is None:
+            return None
+        return self._result_cache.stats()
+
+    def clear_cache(self):
+        """Remove every object from the object cache and from the result
+        cache file."""
+        if self._object_cache is not None:
+            self._object_cache.clear()
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def close(self):
+        """Close the result cache file, if any."""
+        result_cache = getattr(self, '_result_cache', None)
+        if result_cache is not None:
+            self._result_cache = None
+            result_cache.close()
+
+    def get_movie(self, movieID, info=Movie.Movie.default_info, modFunct=None,
+                  fields=None):
         """Return a Movie object for the given movieID.
 
         The movieID is something used to univocally identify a movie;
@@ -373,18 +523,47 @@ class IMDbBase:
         info is the list of sets of information to retrieve.
 
         If specified, modFunct will be the function used by the Movie
-        object when accessing its text fields (like 'plot')."""
+        object when accessing its text fields (like 'plot').
+
+        If fields is a list of keys, only those keys are retrieved, when
+        the access system supports it; see update.
+
+        If the object cache is enabled, the movie may be a copy of a
+        cached one."""
         movieID = self._normalize_movieID(movieID)
         movieID = self._get_real_movieID(movieID)
         movie = Movie.Movie(movieID=movieID, accessSystem=self.accessSystem)
         modFunct = modFunct or self._defModFunct
         if modFunct is not None:
             movie.set_mod_funct(modFunct)
-        self.update(movie, info)
+        self._cached_update(movie, 'movie', movieID, info, fields)
         return movie
 
     get_episode = get_movie
 
+    def get_movies(self, movieIDs, info=Movie.Movie.default_info, modFunct=None,
+                   fields=None):
+        """Return a list of Movie objects for the given movieIDs, in the
+        same order.
+
+        info is the list of sets of information to retrieve.
+
+        Access systems that can retrieve an info set for many movies at
+        once do so with a few set-based queries; otherwise the info set
+        is retrieved one movie at a time, just like get_movie; fields is
+        the same as in get_movie."""
+        modFunct = modFunct or self._defModFunct
+        movies = []
+        for movieID in movieIDs:
+            movieID = self._normalize_movieID(movieID)
+            movieID = self._get_real_movieID(movieID)
+            movie = Movie.Movie(movieID=movieID, accessSystem=self.accessSystem)
+            if modFunct is not None:
+                movie.set_mod_funct(modFunct)
+            movies.append(movie)
+        self.update_many(movies, info, fields=fields)
+        return movies
+
     def _search_movie(self, title, results):
         """Return a list of tuples (movieID, {movieData})"""
         # XXX: for the real implementation, see the method of the
@@ -422,17 +601,18 @@ class IMDbBase:
                 accessSystem=self.accessSystem) for mi, md in res if mi and md][:results]
 
     def _search_movie_advanced(self, title=None, adult=None, results=None, sort=None,
-                               sort_dir=None, title_types=None):
+                               sort_dir=None, title_types=None, **filters):
         """Return a list of tuples (movieID, {movieData})"""
         # XXX: for the real implementation, see the method of the
         #      subclass, somewhere under the imdb.parser package.
         raise NotImplementedError('override this method')
 
     def search_movie_advanced(self, title=None, adult=None, results=None, sort=None, sort_dir=None,
-                               title_types=None):
+                               title_types=None, **filters):
         """Return a list of Movie objects for a query for the given title.
         The results argument is the maximum number of results to return.
-        title_types is an optional list of title types to filter by (e.g., ['movie', 'tvSeries'])."""
+        title_types is an optional list of title types to filter by (e.g., ['movie', 'tvSeries']).
+        Other filters (e.g. year_from, rating_min) are passed to the access system, if supported."""
         if results is None:
             results = self._results
         try:
@@ -440,7 +620,7 @@ class IMDbBase:
         except (ValueError, OverflowError):
             results = 20
         res = self._search_movie_advanced(title=title, adult=adult, results=results, sort=sort,
-                                          sort_dir=sort_dir, title_types=title_types)
+                                          sort_dir=sort_dir, title_types=title_types, **filters)
         return [Movie.Movie(movieID=self._get_real_movieID(mi),
                 data=md, modFunct=self._defModFunct,
                 accessSystem=self.accessSystem) for mi, md in res if mi and md][:results]
@@ -457,7 +637,8 @@ class IMDbBase:
         this method searches only for titles of tv (mini) series' episodes."""
         return self.search_movie(title, results=results, _episodes=True)
 
-    def get_person(self, personID, info=Person.Person.default_info, modFunct=None):
+    def get_person(self, personID, info=Person.Person.default_info, modFunct=None,
+                   fields=None):
         """Return a Person object for the given personID.
 
         The personID is something used to univocally identify a person;
@@ -467,16 +648,37 @@ class IMDbBase:
         info is the list of sets of information to retrieve.
 
         If specified, modFunct will be the function used by the Person
-        object when accessing its text fields (like 'mini biography')."""
+        object when accessing its text fields (like 'mini biography').
+
+        fields is the same as in get_movie.
+
+        If the object cache is enabled, the person may be a copy of a
+        cached one."""
         personID = self._normalize_personID(personID)
         personID = self._get_real_personID(personID)
         person = Person.Person(personID=personID, accessSystem=self.accessSystem)
         modFunct = modFunct or self._defModFunct
         if modFunct is not None:
             person.set_mod_funct(modFunct)
-        self.update(person, info)
+        self._cached_update(person, 'person', personID, info, fields)
         return person
 
+    def get_people(self, personIDs, info=Person.Person.default_info, modFunct=None,
+                   fields=None):
+        """Return a list of Person objects for the given personIDs, in the
+        same order; see get_movies."""
+        modFunct = modFunct or self._defModFunct
+        people = []
+        for personID in personIDs:
+            personID = self._normalize_personID(personID)
+            personID = self._get_real_personID(personID)
+            person = Person.Person(personID=personID, accessSystem=self.accessSystem)
+            if modFunct is not None:
+                person.set_mod_funct(modFunct)
+            people.append(person)
+        self.update_many(people, info, fields=fields)
+        return people
+
     def _search_person(self, name, results):
         """Return a list of tuples (personID, {personData})"""
         # XXX: for the real implementation, see the method of the
@@ -498,14 +700,19 @@ class IMDbBase:
                 data=pd, modFunct=self._defModFunct,
                 accessSystem=self.accessSystem) for pi, pd in res if pi and pd][:results]
 
-    def update(self, mop, info=None, override=0):
+    def update(self, mop, info=None, override=0, fields=None):
         """Given a Movie, Person, Character or Company object with only
         partial information, retrieve the required set of information.
 
         info is the list of sets of information to retrieve.
 
         If override is set, the information are retrieved and updated
-        even if they're already in the object."""
+        even if they're already in the object.
+
+        If fields is a list of keys, it is passed to the methods
+        retrieving the info sets that take it, which return only those
+        keys and can skip the data not needed to build them; the data
+        of the other methods is projected once retrieved."""
         # XXX: should this be a method of the Movie/Person/Character/Company
         #      classes?  NO!  What for instances created by external functions?
         mopID = None
@@ -563,7 +770,12 @@ class IMDbBase:
                 # Keeps going.
                 method = lambda *x: {}
             try:
-                ret = method(mopID)
+                if fields is None:
+                    ret = method(mopID)
+                elif _accepts_fields(method):
+                    ret = method(mopID, fields=fields)
+                else:
+                    ret = _project_info_set(method(mopID), fields)
             except Exception:
                 _imdb_logger.critical(
                     'caught an exception retrieving or parsing "%s" info set'
@@ -574,23 +786,104 @@ class IMDbBase:
                 # If requested by the user, reraise the exception.
                 if self._reraise_exceptions:
                     raise
-            keys = None
-            if 'data' in ret:
-                res.update(ret['data'])
-                if isinstance(ret['data'], dict):
-                    keys = list(ret['data'].keys())
+            self._merge_info_set(mop, i, ret, res, fields=fields)
+        mop.set_data(res, override=0)
+
+    def _merge_info_set(self, mop, info, ret, res, fields=None):
+        """Merge the value returned retrieving an info set into the
+        res dictionary, and record the info set in the object.
+
+        With fields, only part of the info set was retrieved: it is not
+        recorded, so that a later update retrieves all of it."""
+        keys = None
+        if 'data' in ret:
+            res.update(ret['data'])
+            if isinstance(ret['data'], dict):
+                keys = list(ret['data'].keys())
+        if fields is None:
             if 'info sets' in ret:
                 for ri in ret['info sets']:
-                    mop.add_to_current_info(ri, keys, mainInfoset=i)
+                    mop.add_to_current_info(ri, keys, mainInfoset=info)
             else:
-                mop.add_to_current_info(i, keys)
-            if 'titlesRefs' in ret:
-                mop.update_titlesRefs(ret['titlesRefs'])
-            if 'namesRefs' in ret:
-                mop.update_namesRefs(ret['namesRefs'])
-            if 'charactersRefs' in ret:
-                mop.update_charactersRefs(ret['charactersRefs'])
-        mop.set_data(res, override=0)
+                mop.add_to_current_info(info, keys)
+        if 'titlesRefs' in ret:
+            mop.update_titlesRefs(ret['titlesRefs'])
+        if 'namesRefs' in ret:
+            mop.update_namesRefs(ret['namesRefs'])
+        if 'charactersRefs' in ret:
+            mop.update_charactersRefs(ret['charactersRefs'])
+
+    def update_many(self, mops, info=None, override=0, fields=None):
+        """Like update, but for a list of Movie or Person objects.
+
+        When the access system provides a method to retrieve an info set
+        for many objects at once (e.g. _get_movies_main(movieIDs), returning
+        a dictionary of results keyed by ID) it is called once for all the
+        objects; otherwise every object is updated on its own.  fields is
+        the same as in update."""
+        groups = {}
+        for mop in mops:
+            if isinstance(mop, Movie.Movie):
+                groups.setdefault(('movies', 'movie'), []).append(mop)
+            elif isinstance(mop, Person.Person):
+                groups.setdefault(('people', 'person'), []).append(mop)
+            else:
+                self.update(mop, info=info, override=override, fields=fields)
+        for (plural, prefix), objects in groups.items():
+            foreign = [mop for mop in objects if mop.accessSystem != self.accessSystem]
+            for mop in foreign:
+                self.update(mop, info=info, override=override, fields=fields)
+            objects = [mop for mop in objects if mop.accessSystem == self.accessSystem]
+            if not objects:
+                continue
+            for mop in objects:
+                if mop.getID() is None:
+                    raise IMDbDataAccessError('supplied object has null movieID, personID or companyID')
+            group_info = info
+            if group_info is None:
+                group_info = objects[0].default_info
+            elif group_info == 'all':
+                group_info = getattr(self, 'get_%s_infoset' % prefix)()
+            if not isinstance(group_info, (tuple, list)):
+                group_info = (group_info,)
+            results = {id(mop): {} for mop in objects}
+            for i in group_info:
+                if not i:
+                    continue
+                bulk_method = getattr(self, '_get_%s_%s' % (plural, i.replace(' ', '_')), None)
+                if bulk_method is None:
+                    for mop in objects:
+                        self.update(mop, info=[i], override=override,
+                                    fields=fields)
+                    continue
+                todo = [mop for mop in objects if override or i not in mop.current_info]
+                if not todo:
+                    continue
+                _imdb_logger.debug('retrieving "%s" info set for %d objects', i, len(todo))
+                try:
+                    ids = list(dict.fromkeys(mop.getID() for mop in todo))
+                    if fields is None:
+                        rets = bulk_method(ids)
+                    elif _accepts_fields(bulk_method):
+                        rets = bulk_method(ids, fields=fields)
+                    else:
+                        rets = {mopID: _project_info_set(ret, fields)
+                                for mopID, ret in bulk_method(ids).items()}
+                except Exception:
+                    _imdb_logger.critical(
+                        'caught an exception retrieving or parsing "%s" info set'
+                        ' for %d objects (accessSystem: %s)',
+                        i, len(todo), self.accessSystem, exc_info=True
+                    )
+                    rets = {}
+                    # If requested by the user, reraise the exception.
+                    if self._reraise_exceptions:
+                        raise
+                for mop in todo:
+                    self._merge_info_set(mop, i, rets.get(mop.getID()) or {},
+                                         results[id(mop)], fields=fields)
+            for mop in objects:
+                mop.set_data(results[id(mop)], override=0)
 
     def update_series_seasons(self, mop, season_nums, override=0):
         """Given a Movie object with only retrieve the season data.
@@ -636,22 +929,7 @@ class IMDbBase:
             # If requested by the user, reraise the exception.
             if self._reraise_exceptions:
                 raise
-        keys = None
-        if 'data' in ret:
-            res.update(ret['data'])
-            if isinstance(ret['data'], dict):
-                keys = list(ret['data'].keys())
-        if 'info sets' in ret:
-            for ri in ret['info sets']:
-                mop.add_to_current_info(ri, keys, mainInfoset=info)
-        else:
-            mop.add_to_current_info(info, keys)
-        if 'titlesRefs' in ret:
-            mop.update_titlesRefs(ret['titlesRefs'])
-        if 'namesRefs' in ret:
-            mop.update_namesRefs(ret['namesRefs'])
-        if 'charactersRefs' in ret:
-            mop.update_charactersRefs(ret['charactersRefs'])
+        self._merge_info_set(mop, info, ret, res)
         mop.set_data(res, override=0)
 
     def get_imdbID(self, mop):
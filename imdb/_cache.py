@@ -0,0 +1,362 @@
+# Copyright 2026 Davide Alberani <da@mimante.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""
+This module provides the bounded in-memory caches used by the imdb package.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from imdb._exceptions import IMDbError
+from imdb._logging import imdbpyLogger
+
+_cache_logger = imdbpyLogger.getChild('cache')
+
+
+def estimate_size(obj):
+    """Return an estimate, in bytes, of the memory used by obj and by the
+    containers and strings it references."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key) + estimate_size(value)
+                    for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in obj)
+    return size
+
+
+def cache_size_option(name, value):
+    """Return a cache budget in bytes, given as an integer or as a string
+    from a configuration file; 0 or None disable the cache."""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        raise IMDbError('invalid %s value: %r' % (name, value))
+    try:
+        value = int(value)
+    except (TypeError, ValueError) as exc:
+        raise IMDbError('invalid %s value: %r' % (name, value)) from exc
+    if value < 0:
+        raise IMDbError('invalid %s value: %r' % (name, value))
+    return value
+
+
+class LRUCache:
+    """A thread-safe, least recently used cache bounded by the estimated
+    memory of its values.
+
+    Values larger than the whole budget are never stored.  The hits,
+    misses and evictions counters are returned, with the size of the
+    cache, by stats().  The cache can be bound to a database generation
+    with check_generation()."""
+
+    def __init__(self, max_bytes, sizeof=estimate_size):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def check_generation(self, generation):
+        """Remove every entry if generation is not the one of the cached
+        values, and record it as the current generation."""
+        with self._lock:
+            if generation != self.generation:
+                self._entries.clear()
+                self.current_bytes = 0
+                self.generation = generation
+
+    def _record_access(self, key):
+        pass
+
+    def _admit(self, key, size):
+        return True
+
+    def get(self, key, default=None):
+        """Return the value of key, marking it as recently used."""
+        with self._lock:
+            self._record_access(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size=None, generation=None):
+        """Store value under key, evicting the least recently used
+        entries until the cache fits its budget.
+
+        If generation is given, the value is stored only if the cache is
+        bound to the same generation."""
+        if size is None:
+            size = self._sizeof(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            if previous is None and \
+                    self.current_bytes + size > self.max_bytes and \
+                    not self._admit(key, size):
+                self.rejections += 1
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _key, (_value, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every entry; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return a dictionary with the counters and the size of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rejections': self.rejections,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max bytes': self.max_bytes,
+            }
+
+
+# Halve every counter of a frequency sketch row, with bytes.translate.
+_HALVE = bytes(value >> 1 for value in range(256))
+
+
+class TinyLFUCache(LRUCache):
+    """A LRU cache with TinyLFU admission.
+
+    Every lookup is counted in a compact count-min sketch; when storing a
+    new entry would evict others, it is stored only if it was requested
+    more often than every entry it would evict, so that a burst of
+    one-off lookups cannot flush the popular entries.  Counters are
+    halved every 10 * sketch_width lookups, to forget old popularity."""
+
+    def __init__(self, max_bytes, sizeof=estimate_size, sketch_width=1 << 16):
+        LRUCache.__init__(self, max_bytes, sizeof=sizeof)
+        self._sketch_width = sketch_width
+        self._sketch = [bytearray(sketch_width) for _ in range(4)]
+        self._samples = 0
+
+    def _slots(self, key):
+        return [hash((depth, key)) % self._sketch_width for depth in range(4)]
+
+    def _frequency(self, key):
+        return min(row[slot]
+                   for row, slot in zip(self._sketch, self._slots(key)))
+
+    def _record_access(self, key):
+        for row, slot in zip(self._sketch, self._slots(key)):
+            if row[slot] < 255:
+                row[slot] += 1
+        self._samples += 1
+        if self._samples >= 10 * self._sketch_width:
+            self._samples //= 2
+            for row in self._sketch:
+                row[:] = row.translate(_HALVE)
+
+    def _admit(self, key, size):
+        frequency = self._frequency(key)
+        needed = self.current_bytes + size - self.max_bytes
+        for victim, (_value, victim_size) in self._entries.items():
+            if needed <= 0:
+                break
+            if self._frequency(victim) >= frequency:
+                return False
+            needed -= victim_size
+        return True
+
+
+# Eviction policies, by name; a callable accepting the memory budget in
+# bytes can be used instead.
+CACHE_POLICIES = {
+    'lru': LRUCache,
+    'tinylfu': TinyLFUCache,
+}
+
+
+def make_cache(max_bytes, policy='lru'):
+    """Return a new cache of max_bytes bytes, using the given eviction
+    policy: one of the names in CACHE_POLICIES, or a callable."""
+    if callable(policy):
+        return policy(max_bytes)
+    try:
+        cache_class = CACHE_POLICIES[str(policy).strip().lower()]
+    except KeyError as exc:
+        raise IMDbError(
+            'unknown cache policy %r; expected one of: %s'
+            % (policy, ', '.join(sorted(CACHE_POLICIES)))
+        ) from exc
+    return cache_class(max_bytes)
+
+
+class SQLiteResultCache:
+    """A persistent cache of serialized results, stored in a SQLite file
+    that can be shared by many processes.
+
+    Every entry is stored with the database generation it was built
+    from; the first process that sees a new generation removes all the
+    entries of the older ones.  Write errors (e.g. a database locked for
+    too long by another process) are logged and ignored.
+
+    The payloads are unpickled when read, so the file is created readable
+    and writable only by its owner, and a file that other users can
+    write is refused."""
+
+    def __init__(self, path, timeout=5.0):
+        try:
+            import sqlite3
+        except ImportError as exc:  # pragma: no cover - platform dependent
+            raise IMDbError(
+                'this Python installation does not provide SQLite support'
+            ) from exc
+        self._sqlite3 = sqlite3
+        self.path = os.path.expanduser(str(path))
+        self._lock = threading.Lock()
+        self._generation = None
+        self.hits = 0
+        self.misses = 0
+        self._check_permissions()
+        try:
+            self.connection = sqlite3.connect(
+                self.path, timeout=float(timeout), check_same_thread=False,
+                isolation_level=None,
+            )
+            self.connection.execute('PRAGMA journal_mode = WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, '
+                'generation TEXT NOT NULL, payload BLOB NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS generation (value TEXT NOT NULL)'
+            )
+        except sqlite3.Error as exc:
+            raise IMDbError(
+                'unable to open result cache %r: %s' % (self.path, exc)
+            ) from exc
+
+    def _check_permissions(self):
+        """Create the file, if missing, with 0600 permissions, and make
+        sure that no other user can change its payloads."""
+        try:
+            descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                stat = os.fstat(descriptor)
+            finally:
+                os.close(descriptor)
+        except OSError as exc:
+            raise IMDbError(
+                'unable to open result cache %r: %s' % (self.path, exc)
+            ) from exc
+        if os.name == 'posix' and (stat.st_uid != os.geteuid() or
+                                   stat.st_mode & 0o022):
+            raise IMDbError(
+                'result cache %r is writable by other users; make it '
+                'writable only by its owner' % self.path
+            )
+
+    def _check_generation(self, generation):
+        """Purge the entries of other generations, once per generation
+        seen by this process."""
+        if generation == self._generation:
+            return
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            row = self.connection.execute(
+                'SELECT value FROM generation'
+            ).fetchone()
+            if row is None or row[0] != generation:
+                self.connection.execute(
+                    'DELETE FROM results WHERE generation != ?', (generation,)
+                )
+                self.connection.execute('DELETE FROM generation')
+                self.connection.execute(
+                    'INSERT INTO generation (value) VALUES (?)', (generation,)
+                )
+        self._generation = generation
+
+    def get(self, key, generation):
+        """Return the payload stored for key and generation, or None."""
+        key, generation = repr(key), repr(generation)
+        with self._lock:
+            try:
+                self._check_generation(generation)
+                row = self.connection.execute(
+                    'SELECT payload FROM results '
+                    'WHERE key = ? AND generation = ?',
+                    (key, generation),
+                ).fetchone()
+            except self._sqlite3.Error:
+                _cache_logger.warning('unable to read result cache %r',
+                                      self.path, exc_info=True)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, generation, payload):
+        """Store payload for key and generation."""
+        key, generation = repr(key), repr(generation)
+        with self._lock:
+            try:
+                self._check_generation(generation)
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO results (key, generation, '
+                    'payload) VALUES (?, ?, ?)',
+                    (key, generation, payload),
+                )
+            except self._sqlite3.Error:
+                _cache_logger.warning('unable to write result cache %r',
+                                      self.path, exc_info=True)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self.connection.execute('DELETE FROM results')
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def stats(self):
+        """Return a dictionary with the counters and the number of
+        entries of the cache."""
+        with self._lock:
+            entries = self.connection.execute(
+                'SELECT COUNT(*) FROM results'
+            ).fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': entries}
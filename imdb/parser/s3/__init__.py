@@ -22,21 +22,34 @@ The :func:`imdb.IMDb` function will return an instance of this class when
 called with the ``accessSystem`` parameter is set to "s3" or an s3 alias.
 """
 
+import functools
+import itertools
 import logging
-from operator import itemgetter
+import threading
 
 from imdb import IMDbBase
+from imdb._exceptions import IMDbDataAccessError, IMDbError
 from imdb.Movie import Movie
 from imdb.Person import Person
 from imdb.utils import analyze_title
 
-from .adapters import adapter_for_uri
+from .adapters import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_SEARCH_CANDIDATES,
+    adapter_for_uri,
+    integer_option,
+)
+from .graph import DEFAULT_MAX_DEPTH, CreditGraph
+from .lazy import BatchLoader
+from .titles import TitleIndex
 from .utils import (
     DB_TRANSFORM,
     KIND,
+    get_scorer,
     name_soundexes,
     scan_names,
     scan_titles,
+    title_length_window,
     title_soundex,
 )
 
@@ -63,6 +76,117 @@ def split_characters(text):
     return text.split(' / ')
 
 
+# The parts of the data of a movie, each read from its own tables, with the
+# keys they provide; any other key is a category of title_principals.
+MOVIE_PARTS = ('basics', 'crew', 'episode', 'principals', 'ratings', 'akas')
+MOVIE_PART_KEYS = {
+    'basics': {'title', 'kind', 'original title', 'adult', 'year',
+               'runtimes', 'genres'},
+    'crew': {'director', 'writer'},
+    'episode': {'seasonNr', 'episodeNr', 'episode of'},
+    'ratings': {'rating', 'votes', 'weighted rating'},
+    'akas': {'akas'},
+}
+
+
+def movie_parts(parts, fields=None):
+    """Return the set of parts, among the given ones, needed to build the
+    given fields (all of them, if fields is None)."""
+    if fields is None:
+        return set(parts)
+    needed = set()
+    for field in fields:
+        for part, keys in MOVIE_PART_KEYS.items():
+            if field in keys:
+                needed.add(part)
+                break
+        else:
+            needed.add('principals')
+    return needed.intersection(parts)
+
+
+def batched(iterable, size):
+    """Yield lists of up to size items of iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def batch_size_option(batch_size):
+    try:
+        batch_size = int(batch_size)
+    except (TypeError, ValueError):
+        batch_size = 0
+    if batch_size < 1:
+        raise IMDbError('invalid batch size: %r' % batch_size)
+    return batch_size
+
+
+# Sort keys of search_movie_advanced: the key of the movie data used as
+# pagination cursor, the sorted column and the default direction; some
+# IMDb's names for the same orders are accepted, too.
+SORT_FIELDS = {
+    'title': ('title', 'primaryTitle', 'asc'),
+    'year': ('year', 'startYear', 'asc'),
+    'rating': ('rating', 'averageRating', 'desc'),
+    'votes': ('votes', 'numVotes', 'desc'),
+    'runtime': ('runtimes', 'runtimeMinutes', 'asc'),
+    'alpha': ('title', 'primaryTitle', 'asc'),
+    'release_date': ('year', 'startYear', 'asc'),
+    'user_rating': ('rating', 'averageRating', 'desc'),
+    'num_votes': ('votes', 'numVotes', 'desc'),
+    'moviemeter': ('votes', 'numVotes', 'desc'),
+}
+
+
+def _sort_value(movie, field):
+    """Return the value of the sorted column for a Movie returned by
+    search_movie_advanced."""
+    value = movie.get(field)
+    if value is None:
+        raise IMDbError('the %r key is needed to continue after %r'
+                        % (field, movie))
+    if field == 'runtimes':
+        return int(value[0])
+    if field == 'year':
+        return int(str(value)[:4])
+    return value
+
+
+def filmography_key(category):
+    """Return the filmography key of a title_principals category."""
+    return category.replace('_', ' ')
+
+
+def filmography_category(key):
+    """Return the title_principals category of a filmography key."""
+    return key.strip().replace(' ', '_')
+
+
+def credit_year(movie):
+    """Return the start year of a Movie, or None."""
+    year = movie.get('year')
+    return int(str(year)[:4]) if year else None
+
+
+def credit_sort_key(movie):
+    """Sort credits by year, most recent first, after the ones without
+    a year; then by movieID, descending."""
+    year = credit_year(movie)
+    return (year is not None, -(year or 0), -movie.movieID)
+
+
+def project(data, fields):
+    """Remove from data the keys not in fields, if fields is not None."""
+    if fields is not None:
+        for key in set(data).difference(fields):
+            del data[key]
+    return data
+
+
 class IMDbS3AccessSystem(IMDbBase):
     """The class used to access IMDb's data through the s3 dataset."""
 
@@ -71,26 +195,134 @@ class IMDbS3AccessSystem(IMDbBase):
     _KIND_REV = {v: k for k, v in KIND.items()}
 
     def get_movie_infoset(self):
-        return ['main', 'plot', 'episodes']
+        return ['main', 'plot', 'episodes', 'ratings', 'akas', 'crew',
+                'full credits', 'episode of']
 
     def get_person_infoset(self):
         return ['main', 'filmography', 'biography']
     _s3_logger = logging.getLogger('imdbpy.parser.s3')
 
     def __init__(self, uri='sqlite:///cinemagoer.db', adultSearch=True,
+                 threadSafe=None, immutable=None, mmapSize=None,
+                 cacheSize=None, rowCacheSize=None, lazyReferences=False,
+                 inMemory=False, memoryTables=None, memoryIndexes=None,
+                 titleIndex=False, queryCacheSize=None, pinConnections=False,
+                 searchCandidates=DEFAULT_SEARCH_CANDIDATES, scorer=None,
                  *arguments, **keywords):
-        """Initialize the access system."""
+        """Initialize the access system.
+
+        With threadSafe set, a single instance can be shared by many
+        threads, in-memory databases included; file-backed and SQLAlchemy
+        databases are always read through per-thread connections.
+
+        immutable, mmapSize and cacheSize tune how SQLite databases are
+        read: see the SQLiteAdapter class for their meaning and defaults.
+        rowCacheSize is the number of bytes of database rows kept in
+        memory (no cache, by default).
+
+        With lazyReferences set, the known-for titles of the people of a
+        movie are retrieved only when first used; the object cache and the
+        result cache file are then not used.
+
+        With inMemory set, a SQLite database file is copied into memory at
+        startup, optionally only the memoryTables tables and the
+        memoryIndexes indexes; see memory_stats().  With titleIndex set,
+        the title index is loaded at startup instead of on first use.
+
+        queryCacheSize and pinConnections tune the databases read through
+        SQLAlchemy: see the SQLAlchemyAdapter class.
+
+        searchCandidates is the number of titles, and of akas, with the
+        most votes read by a title search and ranked by similarity (0 reads
+        all of them); scorer computes the similarity: 'difflib' (the
+        default), 'rapidfuzz' or a scorer object (see get_scorer)."""
         IMDbBase.__init__(self, *arguments, **keywords)
-        self._adapter = adapter_for_uri(uri)
+        adapter_options = {}
+        if threadSafe is not None:
+            adapter_options['thread_safe'] = bool(threadSafe)
+        if immutable is not None:
+            adapter_options['immutable'] = bool(immutable)
+        if mmapSize is not None:
+            adapter_options['mmap_size'] = mmapSize
+        if cacheSize is not None:
+            adapter_options['cache_size'] = cacheSize
+        if rowCacheSize is not None:
+            adapter_options['row_cache_size'] = rowCacheSize
+        if inMemory:
+            if not uri.startswith('sqlite:'):
+                raise IMDbError('inMemory requires a sqlite: URI, not %r'
+                                % uri)
+            adapter_options['in_memory'] = True
+            adapter_options['memory_tables'] = memoryTables
+            adapter_options['memory_indexes'] = memoryIndexes
+        if queryCacheSize is not None or pinConnections:
+            if uri.startswith(('sqlite:', 'snapshot:')):
+                raise IMDbError('queryCacheSize and pinConnections require '
+                                'an SQLAlchemy URI, not %r' % uri)
+            if queryCacheSize is not None:
+                adapter_options['query_cache_size'] = queryCacheSize
+            adapter_options['pin_connections'] = bool(pinConnections)
+        self.threadSafe = bool(threadSafe)
+        self.lazyReferences = bool(lazyReferences)
+        self.searchCandidates = integer_option('searchCandidates',
+                                               searchCandidates)
+        if self.searchCandidates < 0:
+            raise IMDbError('invalid searchCandidates value %r'
+                            % searchCandidates)
+        self.scorer = get_scorer(scorer)
+        # In-memory structures loaded from the database, by name.
+        self._structures = {}
+        self._structures_lock = threading.Lock()
+        self._adapter = adapter_for_uri(uri, **adapter_options)
+        if inMemory:
+            self._s3_logger.info('copied the database into memory: %s',
+                                 self._adapter.memory_stats)
+        if titleIndex:
+            self.title_index()
 
     def close(self):
         """Close database resources held by this access system."""
+        IMDbBase.close(self)
+        self._structures = {}
         adapter = getattr(self, '_adapter', None)
         if adapter is None:
             return
         self._adapter = None
         adapter.close()
 
+    def row_cache_stats(self):
+        """Return the counters and the size of the row cache, as a
+        dictionary, or None if the row cache is disabled."""
+        row_cache = getattr(self._adapter, 'row_cache', None)
+        return row_cache.stats() if row_cache is not None else None
+
+    def memory_stats(self):
+        """Return the tables, the bytes and the load time of the copy of
+        the database in memory, as a dictionary, or None if the database
+        is read from disk."""
+        return getattr(self._adapter, 'memory_stats', None)
+
+    def _cache_generation(self):
+        return self._adapter.generation()
+
+    def _caches_objects(self):
+        # Serializing an object fills its lazy lists: caching it would
+        # retrieve every reference that lazyReferences leaves out.
+        return not self.lazyReferences
+
+    def _shares_cache_generation(self):
+        # Private in-memory databases count their generations from 0 in
+        # every process.
+        return self._adapter.shared_generation
+
+    def clear_cache(self):
+        """Empty the object and row caches, and unload the credit graph;
+        needed only after importing again into a database system other
+        than SQLite."""
+        IMDbBase.clear_cache(self)
+        self._adapter.clear_cache()
+        self._structures = {}
+
     def __enter__(self):
         return self
 
@@ -130,141 +362,310 @@ class IMDbS3AccessSystem(IMDbBase):
         data['genres'] = split_array(genres.lower())
         if 'runtimes' in data and data['runtimes']:
             data['runtimes'] = [data['runtimes']]
-        self._clean(data, ('startYear', 'endYear', 'movieID'))
+        self._clean(data, ('startYear', 'endYear', 'movieID', 't_length'))
         return data
 
+    def _titles_info(self, movieIDs, movies_cache):
+        """Store in movies_cache the basic data of the given titles.
+
+        Titles not already in the cache are fetched with set-based
+        queries, instead of one query for each title."""
+        missing = [movieID for movieID in dict.fromkeys(movieIDs)
+                   if movieID not in movies_cache]
+        if not missing:
+            return movies_cache
+        rows = {}
+        for row in self._adapter.get_rows_in('title_basics', 'tconst', missing):
+            rows.setdefault(row['tconst'], row)
+        for movieID in missing:
+            movies_cache[movieID] = self._normalize_title_data(
+                rows.get(movieID) or {}
+            )
+        return movies_cache
+
+    def _people_info(self, personIDs, movies_cache, persons_cache,
+                     extra_movieIDs=(), lazy=False):
+        """Store in persons_cache the basic data of the given people.
+
+        Missing people are fetched with one set-based query, and all
+        their known-for titles (plus extra_movieIDs, if any) with another.
+        If lazy is set, the known-for titles are lazy lists, all filled
+        with a single query the first time one of them is used."""
+        missing = [personID for personID in dict.fromkeys(personIDs)
+                   if personID not in persons_cache]
+        rows = {}
+        if missing:
+            for row in self._adapter.get_rows_in('name_basics', 'nconst',
+                                                 missing):
+                rows.setdefault(row['nconst'], row)
+        people = {}
+        known_for = []
+        for personID in missing:
+            data = self._rename('name_basics', dict(rows.get(personID) or {}))
+            movieIDs = [int(movieID)
+                        for movieID in split_array(data.get('known for') or '')
+                        if movieID]
+            people[personID] = (data, movieIDs)
+            if not lazy:
+                known_for.extend(movieIDs)
+        self._titles_info(known_for + list(extra_movieIDs), movies_cache)
+        if lazy:
+            loader = BatchLoader(
+                functools.partial(self._known_for_movies, movies_cache)
+            )
+        for personID, (data, movieIDs) in people.items():
+            self._clean(data, ('ns_soundex', 'sn_soundex', 's_soundex', 'personID'))
+            if not movieIDs:
+                data.pop('known for', None)
+            elif lazy:
+                data['known for'] = loader.add(movieIDs)
+            else:
+                data['known for'] = self._known_for_movies(
+                    movies_cache, [movieIDs]
+                )[0]
+            persons_cache[personID] = data
+        return persons_cache
+
+    def _known_for_movies(self, movies_cache, movieIDs_lists):
+        """Return a list of Movie objects for every list of movieIDs,
+        fetching the titles missing from movies_cache."""
+        if self._adapter is None:
+            raise IMDbDataAccessError(
+                'the access system was closed before known-for titles were '
+                'retrieved'
+            )
+        self._titles_info(
+            [movieID for movieIDs in movieIDs_lists for movieID in movieIDs],
+            movies_cache,
+        )
+        return [
+            [Movie(movieID=movieID, data=movies_cache[movieID],
+                   accessSystem=self.accessSystem)
+             for movieID in movieIDs]
+            for movieIDs in movieIDs_lists
+        ]
+
     def _base_title_info(self, movieID, movies_cache=None, persons_cache=None):
         if movies_cache is None:
             movies_cache = {}
-        if persons_cache is None:
-            persons_cache = {}
-        if movieID in movies_cache:
-            return movies_cache[movieID]
-        movie = self._adapter.get_row('title_basics', 'tconst', movieID) or {}
-        data = self._normalize_title_data(movie)
-        movies_cache[movieID] = data
-        return data
+        return self._titles_info([movieID], movies_cache)[movieID]
 
     def _base_person_info(self, personID, movies_cache=None, persons_cache=None):
         if movies_cache is None:
             movies_cache = {}
         if persons_cache is None:
             persons_cache = {}
-        if personID in persons_cache:
-            return persons_cache[personID]
-        person = self._adapter.get_row('name_basics', 'nconst', personID) or {}
-        data = self._rename('name_basics', person)
-        movies = []
-        for movieID in split_array(data.get('known for') or ''):
-            if not movieID:
-                continue
-            movieID = int(movieID)
-            movie_data = self._base_title_info(movieID, movies_cache=movies_cache, persons_cache=persons_cache)
-            movie = Movie(movieID=movieID, data=movie_data, accessSystem=self.accessSystem)
-            movies.append(movie)
-        data['known for'] = movies
-        self._clean(data, ('ns_soundex', 'sn_soundex', 's_soundex', 'personID'))
-        persons_cache[personID] = data
-        return data
+        return self._people_info([personID], movies_cache,
+                                 persons_cache)[personID]
 
-    def get_movie_main(self, movieID):
-        movieID = int(movieID)
-        data = self._base_title_info(movieID)
-        _movies_cache = {movieID: data}
-        _persons_cache = {}
+    def _rows_by_id(self, table, column, ids, order_by=None):
+        """Return a dictionary mapping every ID to its list of rows."""
+        rows = {}
+        for row in self._adapter.get_rows_in(table, column, ids,
+                                             order_by=order_by):
+            rows.setdefault(row[column], []).append(row)
+        return rows
 
-        movie = self._adapter.get_row('title_crew', 'tconst', movieID) or {}
-        tc_data = self._rename('title_crew', movie)
-        writers = []
-        directors = []
-        for key, target in (('director', directors), ('writer', writers)):
-            for personID in split_array(tc_data.get(key) or ''):
-                if not personID:
-                    continue
-                personID = int(personID)
-                person_data = self._base_person_info(personID,
-                                                     movies_cache=_movies_cache,
-                                                     persons_cache=_persons_cache)
-                person = Person(personID=personID, data=person_data, accessSystem=self.accessSystem)
-                target.append(person)
-        tc_data['director'] = directors
-        tc_data['writer'] = writers
-        data.update(tc_data)
-
-        movie = self._adapter.get_row('title_episode', 'tconst', movieID) or {}
-        te_data = self._rename('title_episode', movie)
-        if 'parentTconst' in te_data:
-            parent_id = te_data['parentTconst']
-            parent_data = self._base_title_info(parent_id)
-            te_data['episode of'] = Movie(
-                movieID=parent_id,
-                data=parent_data,
-                accessSystem=self.accessSystem,
+    def _get_movies_main(self, movieIDs, fields=None, parts=MOVIE_PARTS,
+                         infoset='main'):
+        """Return the main info set of many movies, as a dictionary keyed
+        by the given movieIDs; every table is read with set-based queries,
+        so the number of queries does not depend on the number of movies
+        or on the size of their casts.
+
+        Only the tables of the given parts needed to build the given
+        fields are read; the other info sets are built this way."""
+        requested = list(movieIDs)
+        movieIDs = list(dict.fromkeys(int(movieID) for movieID in requested))
+        parts = movie_parts(parts, fields)
+        _movies_cache = {}
+        _persons_cache = {}
+        if 'basics' in parts:
+            self._titles_info(movieIDs, _movies_cache)
+        crew_rows = episode_rows = principal_rows = rating_rows = {}
+        aka_rows = {}
+        if 'crew' in parts:
+            crew_rows = self._rows_by_id('title_crew', 'tconst', movieIDs)
+        if 'episode' in parts:
+            episode_rows = self._rows_by_id('title_episode', 'tconst',
+                                            movieIDs)
+        if 'principals' in parts:
+            principal_rows = self._rows_by_id(
+                'title_principals', 'tconst', movieIDs,
+                order_by=('tconst', 'ordering'),
             )
-        self._clean(te_data, ('parentTconst',))
-        data.update(te_data)
+        if 'ratings' in parts:
+            rating_rows = self._rows_by_id('title_ratings', 'tconst', movieIDs)
+        if 'akas' in parts:
+            aka_rows = self._rows_by_id('title_akas', 'titleId', movieIDs)
 
-        movie_rows = self._adapter.get_rows(
-            'title_principals', 'tconst', movieID
-        )
-        roles = {}
-        for movie_row in movie_rows:
-            tp_data = self._rename('title_principals', dict(movie_row))
-            category = tp_data.get('category')
-            if not category:
-                continue
-            if category in ('actor', 'actress', 'self'):
-                category = 'cast'
-            roles.setdefault(category, []).append(movie_row)
-        for role in roles:
-            roles[role].sort(key=itemgetter('ordering'))
-            persons = []
-            for person_info in roles[role]:
-                personID = person_info.get('nconst')
-                if not personID:
-                    continue
-                person_data = self._base_person_info(personID,
-                                                     movies_cache=_movies_cache,
-                                                     persons_cache=_persons_cache)
-                person = Person(personID=personID, data=person_data,
-                                billingPos=person_info.get('ordering'),
-                                currentRole=split_characters(
-                                    person_info.get('characters')
-                                ),
-                                notes=person_info.get('job'),
-                                accessSystem=self.accessSystem)
-                persons.append(person)
-            data[role] = persons
-
-        movie = self._adapter.get_row('title_ratings', 'tconst', movieID) or {}
-        tr_data = self._rename('title_ratings', movie)
-        data.update(tr_data)
-
-        akas = self._adapter.get_rows('title_akas', 'titleId', movieID)
-        akas_list = []
-        for aka in akas:
-            ta_data = self._rename('title_akas', aka) or {}
-            for key in list(ta_data.keys()):
-                if not ta_data[key]:
-                    del ta_data[key]
-            for key in 't_soundex', 'movieID':
-                if key in ta_data:
-                    del ta_data[key]
-            for key in 'types', 'attributes':
-                if key not in ta_data:
+        crews = {}
+        episodes = {}
+        personIDs = []
+        parentIDs = []
+        for movieID in movieIDs:
+            if 'crew' in parts:
+                tc_data = self._rename(
+                    'title_crew', dict((crew_rows.get(movieID) or [{}])[0])
+                )
+                for key in ('director', 'writer'):
+                    tc_data[key] = [
+                        int(personID)
+                        for personID in split_array(tc_data.get(key) or '')
+                        if personID
+                    ]
+                    personIDs.extend(tc_data[key])
+                crews[movieID] = tc_data
+            if 'episode' in parts:
+                te_data = self._rename(
+                    'title_episode',
+                    dict((episode_rows.get(movieID) or [{}])[0]),
+                )
+                if te_data.get('parentTconst'):
+                    parentIDs.append(te_data['parentTconst'])
+                episodes[movieID] = te_data
+            personIDs.extend(principal['nconst']
+                             for principal in principal_rows.get(movieID, ())
+                             if principal.get('nconst'))
+        # Every person and every title referenced by the movies is fetched
+        # with a constant number of set-based queries.
+        self._people_info(personIDs, _movies_cache, _persons_cache,
+                          extra_movieIDs=parentIDs,
+                          lazy=self.lazyReferences)
+
+        results = {}
+        for movieID in movieIDs:
+            data = dict(_movies_cache.get(movieID) or {})
+            if 'crew' in parts:
+                tc_data = crews[movieID]
+                for key in ('director', 'writer'):
+                    tc_data[key] = [
+                        Person(personID=personID,
+                               data=_persons_cache[personID],
+                               accessSystem=self.accessSystem)
+                        for personID in tc_data[key]
+                    ]
+                data.update(tc_data)
+
+            if 'episode' in parts:
+                te_data = episodes[movieID]
+                parent_id = te_data.get('parentTconst')
+                if parent_id:
+                    te_data['episode of'] = Movie(
+                        movieID=parent_id,
+                        data=_movies_cache[parent_id],
+                        accessSystem=self.accessSystem,
+                    )
+                self._clean(te_data, ('parentTconst',))
+                data.update(te_data)
+
+            roles = {}
+            for principal in principal_rows.get(movieID, ()):
+                category = principal.get('category')
+                if not category or not principal.get('nconst'):
                     continue
-                ta_data[key] = split_array(ta_data[key])
-            akas_list.append(ta_data)
-        if akas_list:
-            data['akas'] = akas_list
+                if category in ('actor', 'actress', 'self'):
+                    category = 'cast'
+                roles.setdefault(category, []).append(
+                    Person(personID=principal['nconst'],
+                           data=_persons_cache[principal['nconst']],
+                           billingPos=principal.get('ordering'),
+                           currentRole=split_characters(
+                               principal.get('characters')
+                           ),
+                           notes=principal.get('job'),
+                           accessSystem=self.accessSystem)
+                )
+            data.update(roles)
+
+            if 'ratings' in parts:
+                tr_data = self._rename(
+                    'title_ratings',
+                    dict((rating_rows.get(movieID) or [{}])[0]),
+                )
+                data.update(tr_data)
+
+            akas_list = []
+            for aka in aka_rows.get(movieID, ()):
+                ta_data = self._rename('title_akas', dict(aka))
+                for key in list(ta_data.keys()):
+                    if not ta_data[key]:
+                        del ta_data[key]
+                for key in 't_soundex', 't_length', 'movieID':
+                    if key in ta_data:
+                        del ta_data[key]
+                for key in 'types', 'attributes':
+                    if key not in ta_data:
+                        continue
+                    ta_data[key] = split_array(ta_data[key])
+                akas_list.append(ta_data)
+            if akas_list:
+                data['akas'] = akas_list
 
-        self._clean(data, ('movieID', 't_soundex'))
-        return {'data': data, 'info sets': ['main', 'plot']}
+            self._clean(data, ('movieID', 't_soundex'))
+            project(data, fields)
+            info_sets = ['main', 'plot'] if infoset == 'main' else [infoset]
+            results[movieID] = {'data': data, 'info sets': info_sets}
+        return {movieID: results[int(movieID)] for movieID in requested}
+
+    def get_movie_main(self, movieID, fields=None):
+        movieID = int(movieID)
+        return self._get_movies_main([movieID], fields=fields)[movieID]
 
     # we don't really have plot information, yet
     get_movie_plot = get_movie_main
+    _get_movies_plot = _get_movies_main
+
+    def _get_movies_ratings(self, movieIDs, fields=None):
+        """Return the rating and votes of many movies, with one query."""
+        return self._get_movies_main(movieIDs, fields=fields,
+                                     parts=('ratings',), infoset='ratings')
+
+    def get_movie_ratings(self, movieID, fields=None):
+        movieID = int(movieID)
+        return self._get_movies_ratings([movieID], fields=fields)[movieID]
+
+    def _get_movies_akas(self, movieIDs, fields=None):
+        """Return the alternative titles of many movies, with one query."""
+        return self._get_movies_main(movieIDs, fields=fields,
+                                     parts=('akas',), infoset='akas')
+
+    def get_movie_akas(self, movieID, fields=None):
+        movieID = int(movieID)
+        return self._get_movies_akas([movieID], fields=fields)[movieID]
+
+    def _get_movies_crew(self, movieIDs, fields=None):
+        """Return the directors and writers of many movies."""
+        return self._get_movies_main(movieIDs, fields=fields,
+                                     parts=('crew',), infoset='crew')
+
+    def get_movie_crew(self, movieID, fields=None):
+        movieID = int(movieID)
+        return self._get_movies_crew([movieID], fields=fields)[movieID]
+
+    def _get_movies_full_credits(self, movieIDs, fields=None):
+        """Return the cast, the principal crew, the directors and the
+        writers of many movies."""
+        return self._get_movies_main(movieIDs, fields=fields,
+                                     parts=('crew', 'principals'),
+                                     infoset='full credits')
+
+    def get_movie_full_credits(self, movieID, fields=None):
+        movieID = int(movieID)
+        return self._get_movies_full_credits([movieID],
+                                             fields=fields)[movieID]
 
-    def get_movie_episodes(self, movieID, season_nums='all'):
+    def _get_movies_episode_of(self, movieIDs, fields=None):
+        """Return the season and episode numbers and the series of many
+        episodes."""
+        return self._get_movies_main(movieIDs, fields=fields,
+                                     parts=('episode',), infoset='episode of')
+
+    def get_movie_episode_of(self, movieID, fields=None):
+        movieID = int(movieID)
+        return self._get_movies_episode_of([movieID], fields=fields)[movieID]
+
+    def get_movie_episodes(self, movieID, season_nums='all', fields=None):
         """Return all known episodes of a series, optionally by season."""
         movieID = int(movieID)
         if season_nums == 'all':
@@ -277,20 +678,21 @@ class IMDbS3AccessSystem(IMDbBase):
                 for season in season_nums
             }
 
-        episode_rows = self._adapter.episode_rows(movieID)
+        if selected_seasons is None:
+            episode_rows = self._adapter.episode_rows(movieID)
+        else:
+            episode_rows = self._adapter.episode_page(movieID, seasons=[
+                None if season == 'unknown season' else season
+                for season in selected_seasons
+            ])
         if not episode_rows:
             return {
-                'data': {'episodes': {}, 'number of episodes': 0},
+                'data': project({'episodes': {}, 'number of episodes': 0},
+                                fields),
                 'info sets': ['episodes'],
             }
 
-        parent_data = self._base_title_info(movieID)
-        parent = Movie(
-            movieID=movieID,
-            data=parent_data,
-            accessSystem=self.accessSystem,
-        )
-
+        parent = self._series(movieID)
         episodes = {}
         number_of_episodes = 0
         for row in episode_rows:
@@ -301,33 +703,7 @@ class IMDbS3AccessSystem(IMDbBase):
             if selected_seasons is not None and season_key not in selected_seasons:
                 continue
 
-            title_data = {
-                key[len('_title_'):]: value
-                for key, value in row.items()
-                if key.startswith('_title_')
-            }
-            data = self._normalize_title_data(title_data)
-            rating_data = {
-                key[len('_rating_'):]: value
-                for key, value in row.items()
-                if key.startswith('_rating_')
-            }
-            rating_data = self._rename('title_ratings', rating_data)
-            data.update(self._clean(rating_data, ('movieID',)))
-            episode_data = {
-                key: value for key, value in row.items()
-                if not key.startswith(('_title_', '_rating_'))
-            }
-            episode_data = self._rename('title_episode', episode_data)
-            self._clean(episode_data, ('movieID', 'parentTconst'))
-            data.update(episode_data)
-            data['episode of'] = parent
-            episode = Movie(
-                movieID=episode_id,
-                data=data,
-                accessSystem=self.accessSystem,
-            )
-
+            episode = self._episode_movie(row, parent)
             season = episodes.setdefault(season_key, {})
             episode_key = episode_number
             if episode_key is None or episode_key in season:
@@ -336,22 +712,447 @@ class IMDbS3AccessSystem(IMDbBase):
             number_of_episodes += 1
 
         return {
-            'data': {
+            'data': project({
                 'episodes': episodes,
                 'number of episodes': number_of_episodes,
-            },
+            }, fields),
             'info sets': ['episodes'],
         }
 
-    def get_person_main(self, personID):
+    def _series(self, movieID):
+        """Return the Movie of a series, with its basic data."""
+        return Movie(movieID=movieID, data=self._base_title_info(movieID),
+                     accessSystem=self.accessSystem)
+
+    def _episode_movie(self, row, parent):
+        """Return the Movie of an episode of parent from a row of
+        episode_rows or episode_page."""
+        title_data = {
+            key[len('_title_'):]: value
+            for key, value in row.items()
+            if key.startswith('_title_')
+        }
+        data = self._normalize_title_data(title_data)
+        rating_data = {
+            key[len('_rating_'):]: value
+            for key, value in row.items()
+            if key.startswith('_rating_')
+        }
+        rating_data = self._rename('title_ratings', rating_data)
+        data.update(self._clean(rating_data, ('movieID',)))
+        episode_data = {
+            key: value for key, value in row.items()
+            if not key.startswith(('_title_', '_rating_'))
+        }
+        episode_data = self._rename('title_episode', episode_data)
+        self._clean(episode_data, ('movieID', 'parentTconst'))
+        data.update(episode_data)
+        data['episode of'] = parent
+        return Movie(movieID=row['tconst'], data=data,
+                     accessSystem=self.accessSystem)
+
+    def get_series_seasons(self, movieID):
+        """Return the seasons of a series, computed by the database
+        without reading its episodes: a list of dictionaries with the
+        'season' number ('unknown season' for episodes without one), the
+        'number of episodes', and, when known, the average 'rating' of
+        the rated episodes, their total 'votes', and the 'year' and 'end
+        year' of the first and last episodes."""
+        seasons = []
+        for row in self._adapter.season_rows(int(movieID)):
+            season = row['seasonNumber']
+            info = {
+                'season': season if season is not None else 'unknown season',
+                'number of episodes': row['episodes'],
+                'rated episodes': row['rated'],
+                'rating': row['averageRating'],
+                'votes': row['numVotes'],
+                'year': row['startYear'],
+                'end year': row['endYear'],
+            }
+            if info['rating'] is not None:
+                info['rating'] = round(info['rating'], 2)
+            seasons.append({key: value for key, value in info.items()
+                            if value is not None})
+        return seasons
+
+    def get_episodes_page(self, movieID, seasons=None, results=100,
+                          after=None):
+        """Return a page of the episodes of a series, as a list of Movie
+        objects with their basic data, ordered by season and episode
+        number (episodes without them last).
+
+        seasons restricts the page to some seasons ('unknown season' for
+        the episodes without one); after is the last Movie of the previous
+        page, so that deep pages cost as much as the first one."""
+        movieID = int(movieID)
+        if seasons is not None:
+            if isinstance(seasons, (int, str)):
+                seasons = [seasons]
+            seasons = [None if season == 'unknown season' else int(season)
+                       for season in seasons]
+        cursor = None
+        if after is not None:
+            cursor = (after.get('seasonNr'), after.get('episodeNr'),
+                      int(after.movieID))
+        rows = self._adapter.episode_page(movieID, seasons=seasons,
+                                          after=cursor, limit=int(results))
+        if not rows:
+            return []
+        parent = self._series(movieID)
+        return [self._episode_movie(row, parent) for row in rows]
+
+    def _adjacent_episode(self, movieID, previous):
+        rows = list(self._adapter.get_rows_in('title_episode', 'tconst',
+                                              [int(movieID)]))
+        if not rows:
+            return None
+        row = rows[0]
+        cursor = (row['seasonNumber'], row['episodeNumber'], row['tconst'])
+        rows = self._adapter.episode_page(row['parentTconst'], after=cursor,
+                                          limit=1, descending=previous)
+        if not rows:
+            return None
+        return self._episode_movie(rows[0], self._series(row['parentTconst']))
+
+    def get_next_episode(self, movieID):
+        """Return the episode following the given one in its series, in
+        the order of get_episodes_page, or None."""
+        return self._adjacent_episode(movieID, previous=False)
+
+    def get_previous_episode(self, movieID):
+        """Return the episode preceding the given one in its series, in
+        the order of get_episodes_page, or None."""
+        return self._adjacent_episode(movieID, previous=True)
+
+    def get_person_main(self, personID, fields=None):
         personID = int(personID)
-        data = self._base_person_info(personID)
-        self._clean(data, ('personID',))
-        return {'data': data, 'info sets': self.get_person_infoset()}
+        return self._get_people_main([personID], fields=fields)[personID]
 
-    get_person_filmography = get_person_main
     get_person_biography = get_person_main
 
+    def _get_people_main(self, personIDs, fields=None):
+        """Return the main info set of many people, as a dictionary keyed
+        by the given personIDs, fetched with set-based queries; known-for
+        titles are not retrieved unless fields asks for them."""
+        _persons_cache = self._people_info(
+            [int(personID) for personID in personIDs], {}, {},
+            lazy=fields is not None and 'known for' not in fields,
+        )
+        results = {}
+        for personID in personIDs:
+            data = project(_persons_cache[int(personID)], fields)
+            self._clean(data, ('personID',))
+            results[personID] = {
+                'data': data, 'info sets': ['main', 'biography'],
+            }
+        return results
+
+    _get_people_biography = _get_people_main
+
+    def _credit_movies(self, rows, movies_cache):
+        """Return a Movie object for every title_principals row."""
+        return [
+            Movie(movieID=row['tconst'],
+                  data=dict(movies_cache.get(row['tconst']) or {}),
+                  currentRole=split_characters(row.get('characters')),
+                  notes=row.get('job') or '',
+                  accessSystem=self.accessSystem)
+            for row in rows
+        ]
+
+    def get_person_filmography(self, personID, fields=None):
+        personID = int(personID)
+        return self._get_people_filmography([personID],
+                                            fields=fields)[personID]
+
+    def _crew_credits(self, personIDs, credit_rows):
+        """Add to credit_rows, a dictionary of the title_principals rows
+        of the given people, a row for every title listing them among its
+        directors or writers in title_crew, unless title_principals
+        already credits them as such."""
+        wanted = set(personIDs)
+        credits = {}
+        for row in self._adapter.crew_rows(personIDs):
+            for column, category in (('directors', 'director'),
+                                     ('writers', 'writer')):
+                for personID in split_array(row.get(column) or ''):
+                    if personID and int(personID) in wanted:
+                        credits.setdefault(int(personID), set()).add(
+                            (row['tconst'], category))
+        for personID, pairs in credits.items():
+            rows = credit_rows.setdefault(personID, [])
+            pairs.difference_update((credit['tconst'], credit['category'])
+                                    for credit in rows)
+            rows.extend({'tconst': tconst, 'category': category}
+                        for tconst, category in sorted(pairs))
+
+    def _get_people_filmography(self, personIDs, fields=None):
+        """Return the filmography info set of many people: all their
+        credits in title_principals, and the titles listing them as
+        directors or writers in title_crew, grouped by category (e.g.
+        'actor', 'director', 'archive footage') and sorted by year, most
+        recent first; titles without a year come first.
+
+        Credits are read with one indexed query and one scan of the crew
+        lists, and their titles with batched IN lookups."""
+        ids = list(dict.fromkeys(int(personID) for personID in personIDs))
+        credit_rows = {}
+        if fields is None or 'filmography' in fields:
+            credit_rows = self._rows_by_id(
+                'title_principals', 'nconst', ids,
+                order_by=('nconst', 'tconst', 'ordering'),
+            )
+            self._crew_credits(ids, credit_rows)
+        movies_cache = self._titles_info(
+            [row['tconst'] for rows in credit_rows.values() for row in rows],
+            {},
+        )
+        results = {}
+        for personID in personIDs:
+            filmography = {}
+            rows = credit_rows.get(int(personID), ())
+            for row, movie in zip(rows, self._credit_movies(rows,
+                                                            movies_cache)):
+                if row.get('category'):
+                    filmography.setdefault(filmography_key(row['category']),
+                                           []).append(movie)
+            for movies in filmography.values():
+                movies.sort(key=credit_sort_key)
+            data = {'filmography': filmography} if filmography else {}
+            results[personID] = {'data': data, 'info sets': ['filmography']}
+        return results
+
+    def get_person_credits(self, personID, category, results=100,
+                           after=None):
+        """Return a page of the credits of a person in a category (e.g.
+        'actor', 'producer'), as a list of Movie objects sorted like the
+        filmography info set.
+
+        after is the last Movie of the previous page; deep pages cost
+        as much as the first one, even for very prolific people.  A person
+        credited more than once on a title gets a Movie for every credit,
+        told apart by their creditOrdering attribute."""
+        if isinstance(category, str):
+            category = [category]
+        cursor = None
+        if after is not None:
+            cursor = (credit_year(after), after.movieID,
+                      getattr(after, 'creditOrdering', None))
+        rows = self._adapter.person_credits(
+            int(personID), [filmography_category(name) for name in category],
+            after=cursor, limit=int(results),
+        )
+        movies_cache = self._titles_info([row['tconst'] for row in rows], {})
+        movies = self._credit_movies(rows, movies_cache)
+        for row, movie in zip(rows, movies):
+            movie.creditOrdering = row.get('ordering')
+        return movies
+
+    def get_collaborators(self, personID, top=10):
+        """Return the top people credited with the given person on the
+        most titles, as Person objects with their basic data and the
+        number of titles in the 'shared titles' key.
+
+        The collaborators table built by the importer is used, if
+        available; otherwise, the credits are joined at every call."""
+        rows = self._adapter.collaborators(
+            int(personID), limit=int(top) if top is not None else None,
+        )
+        persons_cache = self._people_info([row['nconst'] for row in rows],
+                                          {}, {}, lazy=True)
+        people = []
+        for row in rows:
+            data = dict(persons_cache[row['nconst']])
+            data['shared titles'] = row['titles']
+            people.append(Person(personID=row['nconst'], data=data,
+                                 modFunct=self._defModFunct,
+                                 accessSystem=self.accessSystem))
+        return people
+
+    def get_shared_titles(self, personID1, personID2):
+        """Return the titles crediting both people, as Movie objects
+        sorted like the filmography info set."""
+        movieIDs = [row['tconst'] for row in self._adapter.shared_titles(
+            int(personID1), int(personID2),
+        )]
+        movies_cache = self._titles_info(movieIDs, {})
+        movies = [Movie(movieID=movieID, data=dict(movies_cache[movieID]),
+                        modFunct=self._defModFunct,
+                        accessSystem=self.accessSystem)
+                  for movieID in movieIDs]
+        movies.sort(key=credit_sort_key)
+        return movies
+
+    def _structure(self, name, cls):
+        """Return the in-memory structure of the given class, loading it
+        on first use and again after the database is rebuilt."""
+        generation = self._adapter.generation()
+        with self._structures_lock:
+            structure = self._structures.get(name)
+            if structure is None or structure.generation != generation:
+                structure = cls.from_adapter(self._adapter)
+                structure.generation = generation
+                self._structures[name] = structure
+                self._s3_logger.info('loaded the %s: %s', name,
+                                     structure.stats())
+        return structure
+
+    def credit_graph(self):
+        """Return the in-memory graph of the credits, loading it on first
+        use and again after the database is rebuilt."""
+        return self._structure('credit graph', CreditGraph)
+
+    def title_index(self):
+        """Return the in-memory TitleIndex of the rating, votes, year and
+        kind of every title, loading it on first use and again after the
+        database is rebuilt."""
+        return self._structure('title index', TitleIndex)
+
+    def get_title_summaries(self, movieIDs):
+        """Return a dictionary mapping the given movieIDs to dictionaries
+        with the kind and, when known, the rating, votes and year of each
+        title, read from the title index with no query; titles not in the
+        database are left out."""
+        return self.title_index().get_many(movieIDs)
+
+    def shortest_path(self, personA, personB, max_depth=DEFAULT_MAX_DEPTH,
+                      kinds=None):
+        """Return the shortest chain of shared titles between two people,
+        as a list alternating Person and Movie objects, starting with
+        personA and ending with personB; None if they are not linked by
+        at most max_depth titles.
+
+        kinds (e.g. ['movie']) restricts the titles of the chain.  The
+        search runs on the credit graph, loaded on first use."""
+        if kinds is not None:
+            if isinstance(kinds, str):
+                kinds = [kinds]
+            kinds = [KIND.get(kind, kind) for kind in kinds]
+        path = self.credit_graph().shortest_path(
+            int(personA), int(personB), max_depth=int(max_depth), kinds=kinds,
+        )
+        if path is None:
+            return None
+        persons_cache = self._people_info(path[0::2], {}, {}, lazy=True)
+        movies_cache = self._titles_info(path[1::2], {})
+        chain = []
+        for position, itemID in enumerate(path):
+            if position % 2:
+                chain.append(Movie(movieID=itemID,
+                                   data=dict(movies_cache[itemID]),
+                                   modFunct=self._defModFunct,
+                                   accessSystem=self.accessSystem))
+            else:
+                chain.append(Person(personID=itemID,
+                                    data=dict(persons_cache[itemID]),
+                                    modFunct=self._defModFunct,
+                                    accessSystem=self.accessSystem))
+        return chain
+
+    def iter_movies(self, kinds=None, adult=None, year_from=None,
+                    year_to=None, batch_size=DEFAULT_BATCH_SIZE, info=None):
+        """Yield a Movie object for every title matching the filters,
+        ordered by movieID; titles are read batch_size at a time, so
+        memory does not depend on the size of the database.
+
+        kinds is a list of kinds (e.g. 'movie', 'tv series'); year_from
+        and year_to limit the start year.  Without info, the movies carry
+        only the basic data of the title; otherwise the given info sets
+        are retrieved with get_movies, one batch at a time."""
+        batch_size = batch_size_option(batch_size)
+        conditions = []
+        if kinds:
+            if isinstance(kinds, str):
+                kinds = [kinds]
+            conditions.append(('titleType', 'in',
+                               [KIND.get(kind, kind) for kind in kinds]))
+        if adult is not None:
+            conditions.append(('isAdult', '=', 1 if adult else 0))
+        if year_from is not None:
+            conditions.append(('startYear', '>=', int(year_from)))
+        if year_to is not None:
+            conditions.append(('startYear', '<=', int(year_to)))
+        rows = self._adapter.iter_rows('title_basics', 'tconst', conditions,
+                                       batch_size=batch_size)
+        for batch in batched(rows, batch_size):
+            if info is not None:
+                yield from self.get_movies([row['tconst'] for row in batch],
+                                           info=info)
+                continue
+            for row in batch:
+                data = self._clean(self._normalize_title_data(row),
+                                   ('t_soundex',))
+                yield Movie(movieID=row['tconst'], data=data,
+                            modFunct=self._defModFunct,
+                            accessSystem=self.accessSystem)
+
+    def iter_people(self, profession=None, batch_size=DEFAULT_BATCH_SIZE,
+                    info=None):
+        """Yield a Person object for every person, or for the ones with
+        the given primary profession (e.g. 'director'), ordered by
+        personID and read batch_size at a time.
+
+        Without info, the people carry only their basic data, and no
+        known-for titles; otherwise the given info sets are retrieved
+        with get_people, one batch at a time."""
+        batch_size = batch_size_option(batch_size)
+        conditions = []
+        if profession:
+            conditions.append(('primaryProfession', 'has', profession))
+        rows = self._adapter.iter_rows('name_basics', 'nconst', conditions,
+                                       batch_size=batch_size)
+        for batch in batched(rows, batch_size):
+            if info is not None:
+                yield from self.get_people([row['nconst'] for row in batch],
+                                           info=info)
+                continue
+            for row in batch:
+                data = self._clean(
+                    self._rename('name_basics', dict(row)),
+                    ('ns_soundex', 'sn_soundex', 's_soundex', 'personID',
+                     'known for'),
+                )
+                yield Person(personID=row['nconst'], data=data,
+                             modFunct=self._defModFunct,
+                             accessSystem=self.accessSystem)
+
+    def iter_episodes(self, movieID, batch_size=DEFAULT_BATCH_SIZE,
+                      info=None):
+        """Yield a Movie object for every episode of the given series,
+        ordered by movieID and read batch_size at a time.
+
+        Without info, the episodes carry their basic data, season and
+        episode numbers; otherwise the given info sets are retrieved with
+        get_movies, one batch at a time."""
+        batch_size = batch_size_option(batch_size)
+        movieID = int(movieID)
+        rows = self._adapter.iter_rows(
+            'title_episode', 'tconst', [('parentTconst', '=', movieID)],
+            batch_size=batch_size,
+        )
+        parent = None
+        for batch in batched(rows, batch_size):
+            if parent is None:
+                parent = Movie(movieID=movieID,
+                               data=self._base_title_info(movieID),
+                               accessSystem=self.accessSystem)
+            episodeIDs = [row['tconst'] for row in batch]
+            if info is not None:
+                yield from self.get_movies(episodeIDs, info=info)
+                continue
+            movies_cache = self._titles_info(episodeIDs, {})
+            for row in batch:
+                data = dict(movies_cache[row['tconst']])
+                episode_data = self._rename('title_episode', dict(row))
+                self._clean(episode_data, ('movieID', 'parentTconst'))
+                data.update(episode_data)
+                data['episode of'] = parent
+                self._clean(data, ('t_soundex',))
+                yield Movie(movieID=row['tconst'], data=data,
+                            modFunct=self._defModFunct,
+                            accessSystem=self.accessSystem)
+
     def _search_movie(self, title, results, _episodes=False, adult=None, title_types=None):
         title = title.strip()
         if not title:
@@ -360,51 +1161,196 @@ class IMDbS3AccessSystem(IMDbBase):
         title_info = analyze_title(title)
         search_title = title_info.get('title', title).strip()
         search_year = title_info.get('year')
-        search_title_types = title_types
-
-        def _search(search_title, search_year=None):
-            t_soundex = title_soundex(search_title)
-            normalized_types = None
-            if search_title_types:
-                if isinstance(search_title_types, str):
-                    normalized_title_types = [search_title_types]
-                else:
-                    normalized_title_types = list(search_title_types)
-                normalized_types = []
-                for t in normalized_title_types:
-                    if t in self._KIND_REV:
-                        normalized_types.append(self._KIND_REV[t])
-                    else:
-                        normalized_types.append(t)
-
-            results, ta_results = self._adapter.search_titles(
-                t_soundex,
-                search_title,
-                year=search_year,
-                episodes=_episodes,
-                adult=adult,
-                title_types=normalized_types,
-            )
-            results = [(x['tconst'], self._clean(self._normalize_title_data(x), ('t_soundex',)))
-                       for x in results]
+        normalized_types = None
+        if title_types:
+            if isinstance(title_types, str):
+                title_types = [title_types]
+            normalized_types = [self._KIND_REV.get(t, t) for t in title_types]
 
-            # Also search the AKAs
-            ta_results = [(x['titleId'], self._clean(self._rename('title_akas', dict(x)), ('t_soundex',)))
-                          for x in ta_results]
-            results += ta_results
+        # With a year, the titles of that year are read first, by the same
+        # queries, and searched before the others.
+        rows, aka_rows = self._adapter.search_titles(
+            title_soundex(search_title),
+            search_title,
+            episodes=_episodes,
+            adult=adult,
+            title_types=normalized_types,
+            lengths=title_length_window(search_title),
+            limit=self.searchCandidates or None,
+            year_first=search_year,
+        )
+        # Candidates are scanned by their title, kind and year: only the
+        # rows of the best ones are normalized.
+        candidates = [(x['tconst'], {'title': x.get('primaryTitle'),
+                                     'kind': x.get('titleType', x.get('kind')),
+                                     'year': x.get('startYear') or x.get('endYear'),
+                                     'row': x},
+                       x.get('startYear'))
+                      for x in rows]
+        # Also search the AKAs
+        candidates += [(x['titleId'], {'title': x.get('title'), 'aka row': x},
+                        x.get('startYear'))
+                       for x in aka_rows]
 
-            results = scan_titles(results, search_title)
-            return [x[1] for x in results]
+        def _scan(candidates):
+            found = []
+            for _ratio, (movieID, scanned) in scan_titles(candidates, search_title, results=results,
+                                                          scorer=self.scorer):
+                if 'aka row' in scanned:
+                    data = self._rename('title_akas', dict(scanned['aka row']))
+                    data.pop('startYear', None)
+                    data = self._clean(data, ('t_soundex', 't_length'))
+                else:
+                    data = self._clean(self._normalize_title_data(scanned['row']), ('t_soundex',))
+                found.append((movieID, data))
+            return found
 
         if search_year is not None:
-            results = _search(search_title, search_year)
-            if results:
-                return results
-        return _search(search_title)
+            found = _scan([(movieID, scanned) for movieID, scanned, year in candidates
+                           if year is not None and str(year) == str(search_year)])
+            if found:
+                return found
+        return _scan([(movieID, scanned) for movieID, scanned, _year in candidates])
 
     def _search_movie_advanced(self, title=None, adult=None, results=None, sort=None,
-                               sort_dir=None, title_types=None):
-        return self._search_movie(title, results, adult=adult, title_types=title_types)
+                               sort_dir=None, title_types=None, year_from=None,
+                               year_to=None, rating_min=None, rating_max=None,
+                               votes_min=None, votes_max=None, runtime_min=None,
+                               runtime_max=None, genres=None, after=None):
+        """Return (movieID, data) tuples of the titles matching every given
+        filter; filters and sorting are run by the database.
+
+        sort is one of the keys of SORT_FIELDS; with a sort, after can be
+        the last Movie of the previous page, to get the next one.  Without
+        a sort, titles are ranked by similarity to title, if given, or
+        ordered by movieID."""
+        conditions = []
+        rating_conditions = []
+        if title is not None and title.strip():
+            title_info = analyze_title(title.strip())
+            title = title_info.get('title', title).strip()
+            if 'year' in title_info and year_from is None and year_to is None:
+                year_from = year_to = title_info['year']
+            columns = self._adapter.column_names('title_basics')
+            t_soundex = title_soundex(title)
+            if 't_soundex' in columns and t_soundex is None:
+                # Titles without letters have no soundex: as search_titles
+                # does, they are matched exactly.
+                conditions.append(('primaryTitle', '=', title))
+            elif 't_soundex' in columns:
+                conditions.append(('t_soundex', '=', t_soundex))
+                if 't_length' in columns:
+                    shortest, longest = title_length_window(title)
+                    conditions += [('t_length', '>=', shortest),
+                                   ('t_length', '<=', longest)]
+            else:
+                conditions.append(('primaryTitle', 'like', '%%%s%%' % title))
+        else:
+            title = None
+        if title_types:
+            if isinstance(title_types, str):
+                title_types = [title_types]
+            conditions.append(('titleType', 'in',
+                               [KIND.get(kind, kind) for kind in title_types]))
+        if adult is not None:
+            conditions.append(('isAdult', '=', 1 if adult else 0))
+        for column, operator, value in (
+                ('startYear', '>=', year_from), ('startYear', '<=', year_to),
+                ('runtimeMinutes', '>=', runtime_min),
+                ('runtimeMinutes', '<=', runtime_max)):
+            if value is not None:
+                conditions.append((column, operator, int(value)))
+        for column, operator, value in (
+                ('averageRating', '>=', rating_min),
+                ('averageRating', '<=', rating_max),
+                ('numVotes', '>=', votes_min), ('numVotes', '<=', votes_max)):
+            if value is not None:
+                rating_conditions.append((column, operator, value))
+        if genres:
+            if isinstance(genres, str):
+                genres = [genres]
+            for genre in genres:
+                conditions.append(('genres', 'has', genre.strip()))
+
+        sort_column = None
+        cursor = None
+        if sort is not None:
+            try:
+                field, sort_column, default_dir = SORT_FIELDS[sort]
+            except KeyError as exc:
+                raise IMDbError('unknown sort %r; expected one of: %s' % (
+                    sort, ', '.join(sorted(SORT_FIELDS)))) from exc
+            sort_dir = (sort_dir or default_dir).lower()
+            if sort_dir not in ('asc', 'desc'):
+                raise IMDbError('invalid sort direction: %r' % sort_dir)
+            if after is not None:
+                cursor = (_sort_value(after, field), after.movieID)
+        elif after is not None:
+            if title is not None:
+                raise IMDbError('after needs a sort, when searching a title')
+            cursor = after.movieID
+            sort_dir = (sort_dir or 'asc').lower()
+        # Ranking by similarity needs every candidate with the same soundex.
+        limit = results if title is None or sort is not None else None
+        rows = self._adapter.filter_titles(
+            conditions, rating_conditions, sort=sort_column,
+            descending=sort_dir == 'desc', after=cursor, limit=limit,
+        )
+        found = self._filtered_titles(rows)
+        if title is not None and sort is None:
+            found = [x[1] for x in scan_titles(found, title, results=results,
+                                               scorer=self.scorer)]
+        return found[:results]
+
+    def _filtered_titles(self, rows):
+        """Return (movieID, data) tuples of rows from filter_titles."""
+        rating_columns = self._adapter.column_names('title_ratings')
+        rating_columns.discard('tconst')
+        found = []
+        for row in rows:
+            row = dict(row)
+            ratings = {column: row.pop(column, None)
+                       for column in rating_columns}
+            data = self._normalize_title_data(row)
+            data.update(self._rename('title_ratings', ratings))
+            found.append((row['tconst'], self._clean(data, ('t_soundex',))))
+        return found
+
+    def get_top_titles(self, kind=None, genre=None, decade=None, n=250,
+                       min_votes=None):
+        """Return the n titles with the highest weighted rating, as a list
+        of Movie objects with their basic data and ratings.
+
+        kind (e.g. 'movie' or 'tv series'), genre and decade (e.g. 1990
+        or '1990s') restrict the chart; min_votes excludes titles with
+        fewer votes.  Weighted ratings are computed by the importer."""
+        if 'weightedRating' not in self._adapter.column_names('title_ratings'):
+            raise IMDbDataAccessError(
+                'the database has no weighted ratings: import the datasets '
+                'again to build charts'
+            )
+        conditions = []
+        if kind:
+            conditions.append(('titleType', '=', KIND.get(kind, kind)))
+        if genre:
+            conditions.append(('genres', 'has', genre.strip()))
+        if decade is not None:
+            try:
+                decade = int(str(decade).strip().rstrip('s')) // 10 * 10
+            except ValueError as exc:
+                raise IMDbError('invalid decade: %r' % decade) from exc
+            conditions += [('startYear', '>=', decade),
+                           ('startYear', '<=', decade + 9)]
+        rating_conditions = []
+        if min_votes is not None:
+            rating_conditions.append(('numVotes', '>=', int(min_votes)))
+        rows = self._adapter.filter_titles(
+            conditions, rating_conditions, sort='weightedRating',
+            descending=True, limit=int(n),
+        )
+        return [Movie(movieID=movieID, data=data, modFunct=self._defModFunct,
+                      accessSystem=self.accessSystem)
+                for movieID, data in self._filtered_titles(rows)]
 
     def _search_episode(self, title, results):
         return self._search_movie(title, results=results, _episodes=True)
@@ -417,10 +1363,9 @@ class IMDbS3AccessSystem(IMDbBase):
         query_soundexes = [x for x in (ns_soundex, sn_soundex, s_soundex) if x]
         if not query_soundexes:
             return []
-        results = self._adapter.search_people(query_soundexes)
-        results = [(x['nconst'], self._clean(self._rename('name_basics', dict(x)),
-                                             ('ns_soundex', 'sn_soundex', 's_soundex')))
-                   for x in results]
-        results = scan_names(results, name)
-        results = [x[1] for x in results]
-        return results
+        rows = self._adapter.search_people(query_soundexes)
+        candidates = [(x['nconst'], self._clean(self._rename('name_basics', dict(x)),
+                                                ('ns_soundex', 'sn_soundex', 's_soundex')))
+                      for x in rows]
+        return [x[1] for x in scan_names(candidates, name, results=results,
+                                         scorer=self.scorer)]
@@ -7,12 +7,51 @@
 
 """Database adapters used by the dataset-backed access system."""
 
+import itertools
+import os
+import threading
+import time
+import weakref
 from pathlib import Path
 from urllib.parse import unquote
 
+from imdb._cache import LRUCache, cache_size_option
 from imdb._exceptions import IMDbDataAccessError, IMDbError
 
+from .utils import COLLABORATORS_TABLE
+
 NO_SOUNDEX_TITLE_LIMIT = 100
+# Rows read from each of title_basics and title_akas by a search by
+# soundex, the ones with the most votes first.
+DEFAULT_SEARCH_CANDIDATES = 1000
+# Read-side defaults: map up to 256 MiB of the database file, so that pages
+# are read with no copy and shared among processes through the page cache,
+# and keep a private page cache of 16 MiB (negative values are KiB) for
+# every connection.
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_SIZE = -16 * 1024
+# Number of values bound in a single IN (...) query; it is kept well below
+# the 999 variables limit of SQLite versions older than 3.32.
+IN_QUERY_CHUNK_SIZE = 500
+# Number of rows read by every query of a keyset-paginated iteration.
+DEFAULT_BATCH_SIZE = 1000
+# Sort columns of filter_titles read from title_ratings.
+RATING_SORT_COLUMNS = ('averageRating', 'numVotes', 'weightedRating')
+# Operators of the (column, operator, value) conditions of iter_rows;
+# 'has' matches a whole item of a comma-separated list, e.g. of genres.
+CONDITION_OPERATORS = ('=', '<', '<=', '>', '>=', 'in', 'like', 'has')
+
+# Every column of every table, and every column covered by an index, read
+# with a single statement through SQLite's table-valued pragma functions.
+SQLITE_CATALOG_QUERY = """
+    SELECT 'column' AS kind, m.name AS table_name, p.name AS column_name
+      FROM sqlite_master AS m, pragma_table_info(m.name) AS p
+     WHERE m.type = 'table'
+ UNION ALL
+    SELECT 'index', m.tbl_name, i.name
+      FROM sqlite_master AS m, pragma_index_info(m.name) AS i
+     WHERE m.type = 'index'
+"""
 
 
 def sqlite_path_from_uri(uri):
@@ -32,10 +71,129 @@ def sqlite_path_from_uri(uri):
     return str(Path(path))
 
 
-def adapter_for_uri(uri):
-    """Create the appropriate adapter without importing SQLAlchemy for SQLite."""
+def names_option(name, value):
+    """Return a list of names, given as a sequence or as a string of
+    comma-separated names (e.g. from a configuration file), or None."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    try:
+        names = [str(item).strip() for item in value]
+    except TypeError as exc:
+        raise IMDbError('invalid %s value %r; expected a list of names'
+                        % (name, value)) from exc
+    return [item for item in names if item]
+
+
+def integer_option(name, value):
+    """Return the value of an integer option, which may come from a
+    configuration file as a string."""
+    if isinstance(value, bool):
+        raise IMDbError('invalid %s value %r; expected an integer'
+                        % (name, value))
+    try:
+        return int(value)
+    except (TypeError, ValueError) as exc:
+        raise IMDbError('invalid %s value %r; expected an integer'
+                        % (name, value)) from exc
+
+
+def item_pattern(value):
+    """Return the LIKE pattern, escaped with a backslash, matching the
+    comma-separated lists, wrapped in commas, with the given item."""
+    for char in '\\%_':
+        value = value.replace(char, '\\' + char)
+    return '%%,%s,%%' % value
+
+
+def crew_conditions(nconsts, columns):
+    """Return the 'has' conditions of the directors and writers lists of
+    title_crew (among the given columns) naming any of the people; the
+    IDs are stored as in the datasets, with at least seven digits, or as
+    plain numbers."""
+    return [(column, 'has', item)
+            for nconst in dict.fromkeys(nconsts)
+            for item in dict.fromkeys((str(nconst), '%07d' % nconst))
+            for column in ('directors', 'writers') if column in columns]
+
+
+def sqlite_conditions(conditions, prefix=''):
+    """Return the SQL fragments and the parameters of a sequence of
+    (column, operator, value) conditions; prefix qualifies the columns
+    (e.g. 'tb.')."""
+    fragments = []
+    parameters = []
+    for column, operator, value in conditions:
+        if operator not in CONDITION_OPERATORS:
+            raise IMDbError('invalid condition operator: %r' % operator)
+        if operator == 'in':
+            value = list(value)
+            fragments.append('%s"%s" IN (%s)' % (
+                prefix, column, ', '.join('?' for _ in value) or 'NULL'
+            ))
+            parameters.extend(value)
+        elif operator == 'has':
+            fragments.append("(',' || %s\"%s\" || ',') LIKE ? ESCAPE '\\'"
+                             % (prefix, column))
+            parameters.append(item_pattern(value))
+        else:
+            fragments.append('%s"%s" %s ?' % (prefix, column,
+                                             operator.upper()))
+            parameters.append(value)
+    return fragments, parameters
+
+
+def sqlite_episode_keyset(after, descending=False, prefix=''):
+    """Return the SQL fragment and the parameters selecting the episodes
+    after the (seasonNumber, episodeNumber, tconst) triple of the order
+    of episode_page: unknown seasons and episodes last, or first if
+    descending."""
+    season, episode, tconst = after
+    fragment = '%stconst %s ?' % (prefix, '<' if descending else '>')
+    parameters = [tconst]
+    for column, value in (('episodeNumber', episode),
+                          ('seasonNumber', season)):
+        column = prefix + column
+        if value is None:
+            equal = '%s IS NULL' % column
+            following = '%s IS NOT NULL' % column if descending else None
+            value_parameters = []
+        else:
+            equal = '%s = ?' % column
+            if descending:
+                following = '%s < ?' % column
+            else:
+                following = '(%s > ? OR %s IS NULL)' % (column, column)
+            value_parameters = [value]
+        fragment = '(%s AND %s)' % (equal, fragment)
+        parameters = value_parameters + parameters
+        if following is not None:
+            fragment = '(%s OR %s)' % (following, fragment)
+            parameters = value_parameters + parameters
+    return fragment, parameters
+
+
+def sqlite_episode_order(descending=False, prefix=''):
+    """Return the ORDER BY terms of episode_page."""
+    direction = ' DESC' if descending else ''
+    terms = []
+    for column in ('seasonNumber', 'episodeNumber'):
+        terms.append('%s%s IS NULL%s' % (prefix, column, direction))
+        terms.append('%s%s%s' % (prefix, column, direction))
+    terms.append('%stconst%s' % (prefix, direction))
+    return ', '.join(terms)
+
+
+def adapter_for_uri(uri, **options):
+    """Create the appropriate adapter without importing SQLAlchemy for SQLite.
+
+    Options, like thread_safe, are passed to the adapter."""
     if uri.startswith('sqlite:'):
-        return SQLiteAdapter(sqlite_path_from_uri(uri))
+        return SQLiteAdapter(sqlite_path_from_uri(uri), **options)
+    if uri.startswith('snapshot:'):
+        from .snapshot import SnapshotAdapter, snapshot_path_from_uri
+        return SnapshotAdapter(snapshot_path_from_uri(uri), **options)
     try:
         from .sqlalchemy_adapter import SQLAlchemyAdapter
     except ImportError as exc:
@@ -45,13 +203,136 @@ def adapter_for_uri(uri):
                 'cinemagoer[sqlalchemy] extra and an appropriate database driver'
             ) from exc
         raise
-    return SQLAlchemyAdapter(uri)
+    return SQLAlchemyAdapter(uri, **options)
+
+
+# Numbers of the in-memory copies of databases, unique in the process.
+_memory_databases = itertools.count()
+
+
+class SchemaCatalog:
+    """Columns, indexes and query text of one database generation.
+
+    A catalog is immutable once built: adapters replace it as a whole when
+    the database generation changes, so it can be shared between threads.
+    Query text for the fixed query shapes is built on first use and kept
+    for the lifetime of the catalog."""
+
+    def __init__(self, generation, columns, indexed):
+        self.generation = generation
+        self.columns = {
+            table: frozenset(names) for table, names in columns.items()
+        }
+        self.indexed = {
+            table: frozenset(names) for table, names in indexed.items()
+        }
+        self._statements = {}
+
+    def column_names(self, table):
+        return self.columns.get(table, frozenset())
+
+    def is_indexed(self, table, column):
+        return column in self.indexed.get(table, ())
+
+    def statement(self, key, build):
+        """Return the query stored under *key*, calling *build* once."""
+        try:
+            return self._statements[key]
+        except KeyError:
+            pass
+        statement = build()
+        # setdefault keeps the first statement if two threads race here.
+        return self._statements.setdefault(key, statement)
+
+
+class RowCache:
+    """Rows returned by get_row, get_rows and get_rows_in, cached by table,
+    column, ordering and value in a memory-bounded LRU cache.
+
+    The cache is emptied as soon as a query sees a new database
+    generation, e.g. after the database was imported again."""
+
+    def __init__(self, max_bytes):
+        self.cache = LRUCache(max_bytes)
+
+    def rows(self, generation, table, column, values, order_by, fetch):
+        """Return the rows of the given values, calling fetch(values) only
+        for the values not in the cache; copies of the cached rows are
+        returned, grouped by value in the order of values."""
+        self.cache.check_generation(generation)
+        order_by = tuple(order_by or ())
+        values = list(dict.fromkeys(values))
+        found = {}
+        missing = []
+        for value in values:
+            rows = self.cache.get((table, column, order_by, value))
+            if rows is None:
+                missing.append(value)
+            else:
+                found[value] = rows
+        fetched = {value: [] for value in missing}
+        extra = []
+        if missing:
+            for row in fetch(missing):
+                group = fetched.get(row.get(column))
+                if group is None:
+                    # The database converted the value (e.g. '1' to 1):
+                    # the grouping is not reliable enough to be cached.
+                    extra.append(row)
+                else:
+                    group.append(row)
+            if not extra:
+                for value, rows in fetched.items():
+                    self.cache.set((table, column, order_by, value),
+                                   [dict(row) for row in rows],
+                                   generation=generation)
+        result = []
+        for value in values:
+            if value in fetched:
+                result.extend(fetched[value])
+            else:
+                result.extend(dict(row) for row in found[value])
+        return result + extra
+
+    def stats(self):
+        return self.cache.stats()
 
 
 class SQLiteAdapter:
-    """Query IMDb datasets using Python's standard-library sqlite3 module."""
+    """Query IMDb datasets using Python's standard-library sqlite3 module.
+
+    File-backed databases are read through one connection for each thread,
+    opened on first use and reopened when the database generation changes;
+    an adapter can therefore be shared by many threads.  An in-memory
+    database lives in a single connection: with *thread_safe* set, that
+    connection can be used by every thread, one query at a time.
+
+    Every connection is configured with the given *mmap_size* (bytes of the
+    file accessed through memory mapping) and *cache_size* (pages, or KiB if
+    negative) pragmas.  With *immutable* set, a file-backed database is
+    opened with the immutable=1 URI flag: SQLite skips locking and change
+    detection, so the file must never be modified while in use; replace it
+    with a new file instead.
 
-    def __init__(self, database):
+    A *row_cache_size* greater than 0 keeps up to that many bytes of rows
+    read by key in a RowCache, exposed as the row_cache attribute.
+
+    The shared_generation attribute tells whether the generation
+    identifies the database in other processes too, i.e. unless the
+    database is a private in-memory one.
+
+    With *in_memory* set, a file-backed database is copied at startup into
+    an in-memory database, shared by the per-thread connections, and never
+    read again: all the queries run from RAM, and rebuilding the file does
+    not change the results.  *memory_tables* and *memory_indexes* limit the
+    copy to some tables and indexes (by default, every index of the copied
+    tables); the other ones cannot be queried.  The memory_stats attribute
+    reports the time taken by the copy and the bytes it uses."""
+
+    def __init__(self, database, thread_safe=False, immutable=False,
+                 mmap_size=DEFAULT_MMAP_SIZE, cache_size=DEFAULT_CACHE_SIZE,
+                 row_cache_size=0, in_memory=False, memory_tables=None,
+                 memory_indexes=None):
         try:
             import sqlite3
         except ImportError as exc:  # pragma: no cover - platform dependent
@@ -60,11 +341,34 @@ class SQLiteAdapter:
             ) from exc
         self._sqlite3 = sqlite3
         self.database = database
+        self.thread_safe = bool(thread_safe)
+        self.immutable = bool(immutable)
+        self.mmap_size = integer_option('mmap_size', mmap_size)
+        self.cache_size = integer_option('cache_size', cache_size)
+        row_cache_size = cache_size_option('row_cache_size', row_cache_size)
+        self.row_cache = RowCache(row_cache_size) if row_cache_size else None
         self._database_uri = None
+        self._catalog = None
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        # (thread, connection) pairs of the per-thread connections, so that
+        # they can be closed by close() or once their thread is gone.
+        self._connections = []
         self.connection = None
+        self.in_memory = bool(in_memory)
+        self.shared_generation = database != ':memory:'
+        self.memory_stats = None
+        self._memory_generation = None
+        self._memory_connection = None
+        memory_tables = names_option('memory_tables', memory_tables)
+        memory_indexes = names_option('memory_indexes', memory_indexes)
         try:
             if database == ':memory:':
+                if self.in_memory:
+                    raise IMDbError('in_memory requires a file-backed '
+                                    'SQLite database')
                 self.connection = self._connect()
+                self._memory_generation = 0
             else:
                 database_path = Path(database)
                 if not database_path.is_file():
@@ -74,95 +378,602 @@ class SQLiteAdapter:
                     )
                 self._database_uri = '%s?mode=ro' % \
                     database_path.resolve().as_uri()
-                connection = self._connect()
-                connection.close()
-        except IMDbDataAccessError:
+                if self.immutable:
+                    self._database_uri += '&immutable=1'
+                if self.in_memory:
+                    self._copy_to_memory(memory_tables, memory_indexes)
+                else:
+                    connection = self._connect()
+                    connection.close()
+        except IMDbError:
             raise
         except sqlite3.Error as exc:
             raise IMDbDataAccessError(
                 'unable to open SQLite database %r: %s' % (database, exc)
             ) from exc
 
+    def _copy_to_memory(self, tables=None, indexes=None):
+        """Copy the database file, or some of its tables and indexes, into
+        a shared-cache in-memory database, read from now on instead of the
+        file; the connection opened here keeps it alive until close()."""
+        started = time.perf_counter()
+        generation = self._file_generation()
+        memory_uri = 'file:cinemagoer-memory-%d-%d?mode=memory&cache=shared' \
+            % (os.getpid(), next(_memory_databases))
+        memory = self._sqlite3.connect(memory_uri, uri=True,
+                                       check_same_thread=False)
+        try:
+            if tables is None and indexes is None:
+                source = self._sqlite3.connect(self._database_uri, uri=True)
+                try:
+                    source.backup(memory)
+                finally:
+                    source.close()
+            else:
+                self._copy_schema(memory, tables, indexes)
+            page_count = memory.execute('PRAGMA page_count').fetchone()[0]
+            page_size = memory.execute('PRAGMA page_size').fetchone()[0]
+            copied = [row[0] for row in memory.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                'ORDER BY name'
+            )]
+        except Exception:
+            memory.close()
+            raise
+        self._memory_connection = memory
+        self._memory_generation = generation
+        self._database_uri = memory_uri
+        self.memory_stats = {
+            'tables': copied,
+            'bytes': page_count * page_size,
+            'load seconds': time.perf_counter() - started,
+        }
+
+    def _copy_schema(self, memory, tables, indexes):
+        """Copy some tables, with the given indexes (or all of theirs), of
+        the database file into the memory connection."""
+        memory.execute('ATTACH DATABASE ? AS source', (self._database_uri,))
+        schema = memory.execute(
+            'SELECT type, name, tbl_name, sql FROM source.sqlite_master '
+            "WHERE type IN ('table', 'index') AND sql IS NOT NULL "
+            "AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        available = {name for kind, name, _table, _sql in schema
+                     if kind == 'table'}
+        if tables is None:
+            tables = sorted(available)
+        missing = set(tables).difference(available)
+        if indexes is not None:
+            missing.update(set(indexes).difference(
+                name for kind, name, _table, _sql in schema if kind == 'index'
+            ))
+        if missing:
+            raise IMDbDataAccessError(
+                'unable to copy tables or indexes not in %r: %s'
+                % (self.database, ', '.join(sorted(missing)))
+            )
+        with memory:
+            for kind, name, table, sql in schema:
+                if kind == 'table' and name in tables:
+                    memory.execute(sql)
+                    memory.execute('INSERT INTO main."%s" '
+                                   'SELECT * FROM source."%s"' % (name, name))
+            for kind, name, table, sql in schema:
+                if kind == 'index' and table in tables and \
+                        (indexes is None or name in indexes):
+                    memory.execute(sql)
+        memory.execute('DETACH DATABASE source')
+
     def close(self):
-        if self.connection is not None:
-            self.connection.close()
-            self.connection = None
+        with self._lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            connections = self._connections
+            self._connections = []
+            # Drop the per-thread state: a later query opens new connections.
+            self._local = threading.local()
+            memory = self._memory_connection
+            self._memory_connection = None
+            self.bump_generation()
+        for _thread, connection in connections:
+            connection.close()
+        if memory is not None:
+            # The in-memory copy is freed with its last connection.
+            memory.close()
 
     def _connect(self):
         if self._database_uri is None:
-            connection = self._sqlite3.connect(self.database)
+            connection = self._sqlite3.connect(
+                self.database, check_same_thread=not self.thread_safe
+            )
         else:
-            connection = self._sqlite3.connect(self._database_uri, uri=True)
+            # Per-thread connections may be closed by another thread.
+            connection = self._sqlite3.connect(
+                self._database_uri, uri=True, check_same_thread=False
+            )
+        try:
+            if self._database_uri is not None:
+                connection.execute('PRAGMA mmap_size = %d' % self.mmap_size)
+            connection.execute('PRAGMA cache_size = %d' % self.cache_size)
+        except self._sqlite3.Error:
+            connection.close()
+            raise
         connection.row_factory = self._sqlite3.Row
         return connection
 
-    def _fetchall(self, sql, parameters=()):
+    def _thread_connection(self):
+        """Return the read connection of the calling thread."""
+        generation = self.generation()
+        state = getattr(self._local, 'state', None)
+        if state is not None and state[1] == generation:
+            return state[0]
+        connection = self._connect()
+        stale = []
+        with self._lock:
+            alive = []
+            for thread, other in self._connections:
+                thread = thread()
+                if (state is not None and other is state[0]) or \
+                        thread is None or not thread.is_alive():
+                    stale.append(other)
+                else:
+                    alive.append((weakref.ref(thread), other))
+            alive.append((weakref.ref(threading.current_thread()), connection))
+            self._connections = alive
+        for other in stale:
+            other.close()
+        self._local.state = (connection, generation)
+        return connection
+
+    def _execute(self, connection, sql, parameters, plain):
+        cursor = connection.cursor()
+        if plain:
+            cursor.row_factory = None
+        return cursor.execute(sql, parameters).fetchall()
+
+    def _fetchall(self, sql, parameters=(), plain=False):
+        """Return the rows of a query as dictionaries or, if plain is
+        set, as tuples, which are much cheaper to build."""
         try:
-            if self.connection is not None:
-                rows = self.connection.execute(sql, parameters).fetchall()
+            if self.in_memory and self._memory_connection is None:
+                raise IMDbDataAccessError('the SQLite adapter is closed')
+            if self._database_uri is not None:
+                rows = self._execute(self._thread_connection(), sql,
+                                     parameters, plain)
+            elif self.connection is None:
+                raise IMDbDataAccessError('the SQLite adapter is closed')
+            elif self.thread_safe:
+                with self._lock:
+                    rows = self._execute(self.connection, sql, parameters,
+                                         plain)
             else:
-                connection = self._connect()
-                try:
-                    rows = connection.execute(sql, parameters).fetchall()
-                finally:
-                    connection.close()
+                rows = self._execute(self.connection, sql, parameters, plain)
         except self._sqlite3.Error as exc:
             raise IMDbDataAccessError(
                 'invalid or incomplete Cinemagoer SQLite database: %s' % exc
             ) from exc
+        if plain:
+            return rows
         return [dict(row) for row in rows]
 
     def _fetchone(self, sql, parameters=()):
         rows = self._fetchall(sql, parameters)
         return rows[0] if rows else None
 
+    def generation(self):
+        """Return a token that changes whenever the database is rebuilt.
+
+        File-backed databases are identified by the inode, size and
+        modification time of the file, so checking costs a single stat()
+        call and no query; copies in memory keep the generation of the
+        file they were copied from, and private in-memory databases a
+        counter, raised by bump_generation()."""
+        if self.in_memory or self._database_uri is None:
+            return self._memory_generation
+        return self._file_generation()
+
+    def bump_generation(self):
+        """Start a new generation of a private in-memory database, which
+        is only changed through the connection attribute: call it after
+        changing the schema or the data, so that the cached catalog and
+        rows are read again."""
+        if self._database_uri is None and not self.in_memory:
+            self._memory_generation += 1
+
+    def _file_generation(self):
+        try:
+            stat = os.stat(self.database)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def clear_cache(self):
+        """Empty the row cache, if any."""
+        if self.row_cache is not None:
+            self.row_cache.cache.clear()
+
+    def catalog(self):
+        """Return the schema catalog of the current database generation."""
+        generation = self.generation()
+        catalog = self._catalog
+        if catalog is not None and catalog.generation == generation:
+            return catalog
+        columns = {}
+        indexed = {}
+        for row in self._fetchall(SQLITE_CATALOG_QUERY):
+            target = columns if row['kind'] == 'column' else indexed
+            target.setdefault(row['table_name'], set()).add(row['column_name'])
+        catalog = SchemaCatalog(generation, columns, indexed)
+        self._catalog = catalog
+        return catalog
+
     def column_names(self, table):
-        rows = self._fetchall('PRAGMA table_info("%s")' % table)
-        return {row['name'] for row in rows}
+        return set(self.catalog().column_names(table))
 
     def _column_is_indexed(self, table, column):
-        indexes = self._fetchall('PRAGMA index_list("%s")' % table)
-        for index in indexes:
-            index_name = index['name'].replace('"', '""')
-            indexed_columns = self._fetchall(
-                'PRAGMA index_info("%s")' % index_name
-            )
-            if any(item['name'] == column for item in indexed_columns):
-                return True
-        return False
+        return self.catalog().is_indexed(table, column)
 
     def get_row(self, table, column, value):
+        if self.row_cache is not None:
+            rows = self.get_rows(table, column, value)
+            return rows[0] if rows else None
         return self._fetchone(
             'SELECT * FROM "%s" WHERE "%s" = ? LIMIT 1' % (table, column),
             (value,),
         )
 
-    def get_rows(self, table, column, value):
+    def get_rows(self, table, column, value, order_by=None):
+        if self.row_cache is not None:
+            return self.get_rows_in(table, column, [value], order_by=order_by)
+        sql = 'SELECT * FROM "%s" WHERE "%s" = ?' % (table, column)
+        if order_by:
+            sql += ' ORDER BY ' + ', '.join('"%s"' % name for name in order_by)
+        return self._fetchall(sql, (value,))
+
+    def get_rows_in(self, table, column, values, order_by=None):
+        """Return the rows whose *column* is one of *values*.
+
+        A single IN (...) query is issued for every IN_QUERY_CHUNK_SIZE
+        distinct values not in the row cache; *order_by* is applied to
+        the rows of each value."""
+        if self.row_cache is not None:
+            return self.row_cache.rows(
+                self.generation(), table, column, values, order_by,
+                lambda missing: self._fetch_rows_in(table, column, missing,
+                                                    order_by),
+            )
+        return self._fetch_rows_in(table, column, values, order_by)
+
+    def _fetch_rows_in(self, table, column, values, order_by=None):
+        values = list(dict.fromkeys(values))
+        rows = []
+        for start in range(0, len(values), IN_QUERY_CHUNK_SIZE):
+            chunk = values[start:start + IN_QUERY_CHUNK_SIZE]
+            sql = 'SELECT * FROM "%s" WHERE "%s" IN (%s)' % (
+                table, column, ', '.join('?' for _ in chunk)
+            )
+            if order_by:
+                sql += ' ORDER BY ' + ', '.join(
+                    '"%s"' % name for name in order_by
+                )
+            rows.extend(self._fetchall(sql, chunk))
+        return rows
+
+    def iter_rows(self, table, key, conditions=(),
+                  batch_size=DEFAULT_BATCH_SIZE):
+        """Yield the rows of table matching the (column, operator, value)
+        conditions, ordered by the key column.
+
+        Rows are read batch_size at a time, every batch starting after
+        the last key of the previous one (keyset pagination), so memory
+        does not depend on the size of the table; key must be unique."""
+        fragments, parameters = sqlite_conditions(conditions)
+        base = 'SELECT * FROM "%s"' % table
+        order = ' ORDER BY "%s" LIMIT %d' % (key, batch_size)
+        last = None
+        while True:
+            where = list(fragments)
+            batch_parameters = list(parameters)
+            if last is not None:
+                where.append('"%s" > ?' % key)
+                batch_parameters.append(last)
+            sql = base
+            if where:
+                sql += ' WHERE ' + ' AND '.join(where)
+            rows = self._fetchall(sql + order, batch_parameters)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][key]
+
+    def filter_titles(self, conditions=(), rating_conditions=(), sort=None,
+                      descending=False, after=None, limit=None):
+        """Return the title_basics rows, with the title_ratings columns,
+        matching the conditions on title_basics and on title_ratings.
+
+        Rows are ordered by the sort column (of either table; rows where
+        it is NULL are skipped) and then by tconst.  after is the
+        (sort value, tconst) pair of the last row of the previous page,
+        or just its tconst if sort is None."""
+        catalog = self.catalog()
+        rating_columns = catalog.column_names('title_ratings')
+        with_ratings = bool(rating_conditions) or sort in rating_columns
+        if (rating_conditions or sort in RATING_SORT_COLUMNS) \
+                and not rating_columns:
+            return []
+        fragments, parameters = sqlite_conditions(conditions, 'tb.')
+        rating_fragments, rating_parameters = sqlite_conditions(
+            rating_conditions, 'tr.'
+        )
+        fragments += rating_fragments
+        parameters += rating_parameters
+        selected = ['tb.*']
+        join = ''
+        if rating_columns:
+            selected += ['tr."%s" AS "%s"' % (column, column)
+                         for column in sorted(rating_columns)
+                         if column != 'tconst']
+            join = ' %s JOIN title_ratings AS tr ON tr.tconst = tb.tconst' \
+                % ('INNER' if with_ratings else 'LEFT')
+        direction, comparison = ('DESC', '<') if descending else ('ASC', '>')
+        order = ['tb.tconst %s' % direction]
+        if sort is not None:
+            sort_column = '%s."%s"' % (
+                'tr' if sort in rating_columns else 'tb', sort
+            )
+            fragments.append('%s IS NOT NULL' % sort_column)
+            order.insert(0, '%s %s' % (sort_column, direction))
+            if after is not None:
+                fragments.append('(%s %s ? OR (%s = ? AND tb.tconst %s ?))' % (
+                    sort_column, comparison, sort_column, comparison
+                ))
+                parameters += [after[0], after[0], after[1]]
+        elif after is not None:
+            fragments.append('tb.tconst %s ?' % comparison)
+            parameters.append(after)
+        sql = 'SELECT %s FROM title_basics AS tb%s' % (', '.join(selected),
+                                                       join)
+        if fragments:
+            sql += ' WHERE ' + ' AND '.join(fragments)
+        sql += ' ORDER BY ' + ', '.join(order)
+        if limit is not None:
+            sql += ' LIMIT %d' % limit
+        return self._fetchall(sql, parameters)
+
+    def person_credits(self, nconst, categories=None, after=None,
+                       limit=None):
+        """Return the title_principals rows of a person, with the
+        startYear of their titles, most recent first (titles without a
+        year come first), then by tconst, descending, and by ordering.
+
+        after is the (startYear, tconst, ordering) tuple of the last row
+        of the previous page; with a None ordering, the page starts after
+        every row of that title."""
+        fragments = ['tp.nconst = ?']
+        parameters = [nconst]
+        if categories:
+            category_fragments, category_parameters = sqlite_conditions(
+                [('category', 'in', categories)], 'tp.'
+            )
+            fragments += category_fragments
+            parameters += category_parameters
+        if after is not None:
+            year, tconst, ordering = after
+            # The rows after the last one, among the rows of its year.
+            next_rows = 'tp.tconst < ?'
+            next_parameters = [tconst]
+            if ordering is not None:
+                next_rows = '(tp.tconst < ? OR ' \
+                    '(tp.tconst = ? AND tp.ordering > ?))'
+                next_parameters += [tconst, ordering]
+            if year is None:
+                fragments.append('(tb.startYear IS NOT NULL OR %s)'
+                                 % next_rows)
+                parameters += next_parameters
+            else:
+                fragments.append('(tb.startYear < ? OR '
+                                 '(tb.startYear = ? AND %s))' % next_rows)
+                parameters += [year, year] + next_parameters
+        sql = ('SELECT tp.*, tb.startYear AS "startYear" '
+               'FROM title_principals AS tp '
+               'LEFT JOIN title_basics AS tb ON tb.tconst = tp.tconst '
+               'WHERE %s ORDER BY tb.startYear IS NULL DESC, '
+               'tb.startYear DESC, tp.tconst DESC, tp.ordering'
+               % ' AND '.join(fragments))
+        if limit is not None:
+            sql += ' LIMIT %d' % limit
+        return self._fetchall(sql, parameters)
+
+    def crew_rows(self, nconsts):
+        """Return the title_crew rows listing any of the given people
+        among their directors or writers.
+
+        The lists cannot be indexed: every IN_QUERY_CHUNK_SIZE conditions
+        (see crew_conditions) cost a scan of title_crew."""
+        conditions = crew_conditions(nconsts,
+                                     self.catalog().column_names('title_crew'))
+        rows = []
+        for start in range(0, len(conditions), IN_QUERY_CHUNK_SIZE):
+            fragments, parameters = sqlite_conditions(
+                conditions[start:start + IN_QUERY_CHUNK_SIZE]
+            )
+            rows.extend(self._fetchall(
+                'SELECT * FROM title_crew WHERE %s' % ' OR '.join(fragments),
+                parameters,
+            ))
+        return rows
+
+    def collaborators(self, nconst, limit=None):
+        """Return (nconst, titles) rows of the people credited with the
+        given one, on the most titles first; the collaborators table is
+        used, if the importer built it."""
+        if self.catalog().column_names(COLLABORATORS_TABLE):
+            sql = ('SELECT collaborator AS nconst, titles FROM "%s" '
+                   'WHERE nconst = ? ORDER BY titles DESC, collaborator DESC'
+                   % COLLABORATORS_TABLE)
+        else:
+            sql = ('SELECT b.nconst AS nconst, '
+                   'COUNT(DISTINCT b.tconst) AS titles '
+                   'FROM title_principals AS a '
+                   'JOIN title_principals AS b ON b.tconst = a.tconst '
+                   'WHERE a.nconst = ? AND b.nconst != a.nconst '
+                   'GROUP BY b.nconst ORDER BY titles DESC, b.nconst DESC')
+        if limit is not None:
+            sql += ' LIMIT %d' % limit
+        return self._fetchall(sql, (nconst,))
+
+    def shared_titles(self, nconst, other):
+        """Return the tconst rows of the titles crediting both people."""
+        return self._fetchall(
+            'SELECT DISTINCT a.tconst AS tconst FROM title_principals AS a '
+            'JOIN title_principals AS b ON b.tconst = a.tconst '
+            'WHERE a.nconst = ? AND b.nconst = ?', (nconst, other)
+        )
+
+    def column_range(self, table, column):
+        """Return the minimum and the maximum values of a column."""
+        row = self._fetchone(
+            'SELECT MIN("%s") AS low, MAX("%s") AS high FROM "%s"'
+            % (column, column, table)
+        )
+        return row['low'], row['high']
+
+    def range_pairs(self, table, key, value, start, stop):
+        """Return the (key, value) tuples of the rows of table whose key
+        is in [start, stop) and value is not NULL, ordered by key."""
         return self._fetchall(
-            'SELECT * FROM "%s" WHERE "%s" = ?' % (table, column),
-            (value,),
+            'SELECT "%s", "%s" FROM "%s" WHERE "%s" >= ? AND "%s" < ? '
+            'AND "%s" IS NOT NULL ORDER BY "%s"'
+            % (key, value, table, key, key, value, key),
+            (start, stop), plain=True,
         )
 
-    def episode_rows(self, parent_id):
+    def _episode_columns(self, catalog):
         title_columns = [
             'tb."%s" AS "_title_%s"' % (column, column)
-            for column in sorted(self.column_names('title_basics'))
+            for column in sorted(catalog.column_names('title_basics'))
         ]
         rating_columns = [
             'tr."%s" AS "_rating_%s"' % (column, column)
-            for column in sorted(self.column_names('title_ratings'))
+            for column in sorted(catalog.column_names('title_ratings'))
         ]
-        selected = ', '.join(['te.*'] + title_columns + rating_columns)
-        sql = '''SELECT %s
-                   FROM title_episode AS te
-              LEFT JOIN title_basics AS tb ON tb.tconst = te.tconst
-              LEFT JOIN title_ratings AS tr ON tr.tconst = te.tconst
-                  WHERE te.parentTconst = ?''' % selected
-        return self._fetchall(sql, (parent_id,))
+        return ', '.join(['te.*'] + title_columns + rating_columns)
 
-    def search_titles(self, soundex, search_title, year=None, episodes=False,
-                      adult=None, title_types=None):
-        columns = self.column_names('title_basics')
+    def range_rows(self, table, key, start, stop, order_by=()):
+        """Return the rows of table whose key is in [start, stop), ordered
+        by key and then by the order_by columns."""
+        order = ', '.join('"%s"' % name for name in (key,) + tuple(order_by))
+        return self._fetchall(
+            'SELECT * FROM "%s" WHERE "%s" >= ? AND "%s" < ? ORDER BY %s'
+            % (table, key, key, order), (start, stop),
+        )
+
+    def title_summaries(self, start, stop):
+        """Return the (tconst, titleType, startYear, averageRating,
+        numVotes) tuples of the titles whose tconst is in [start, stop),
+        ordered by tconst."""
+        if self.catalog().column_names('title_ratings'):
+            ratings = 'tr.averageRating, tr.numVotes'
+            join = ' LEFT JOIN title_ratings AS tr ON tr.tconst = tb.tconst'
+        else:
+            ratings, join = 'NULL, NULL', ''
+        return self._fetchall(
+            'SELECT tb.tconst, tb.titleType, tb.startYear, %s '
+            'FROM title_basics AS tb%s WHERE tb.tconst >= ? AND tb.tconst < ? '
+            'ORDER BY tb.tconst' % (ratings, join),
+            (start, stop), plain=True,
+        )
+
+    def episode_rows(self, parent_id):
+        catalog = self.catalog()
+
+        def build():
+            return '''SELECT %s
+                       FROM title_episode AS te
+                  LEFT JOIN title_basics AS tb ON tb.tconst = te.tconst
+                  LEFT JOIN title_ratings AS tr ON tr.tconst = te.tconst
+                      WHERE te.parentTconst = ?''' % self._episode_columns(catalog)
+
+        return self._fetchall(
+            catalog.statement('episode_rows', build), (parent_id,)
+        )
+
+    def episode_page(self, parent_id, seasons=None, after=None, limit=None,
+                     descending=False):
+        """Return the rows of the episodes of a series, like episode_rows,
+        ordered by season, episode number and tconst, with unknown seasons
+        and episodes last (first, if descending).
+
+        seasons restricts the rows to some season numbers (None for the
+        unknown season); after is the (seasonNumber, episodeNumber, tconst)
+        triple of the last row of the previous page.  Only the page of
+        episodes, read from the (parentTconst, seasonNumber, episodeNumber)
+        index, is joined with their titles and ratings."""
+        fragments = ['parentTconst = ?']
+        parameters = [parent_id]
+        if seasons is not None:
+            seasons = list(seasons)
+            numbers = [season for season in seasons if season is not None]
+            season_fragments, parameters_in = sqlite_conditions(
+                [('seasonNumber', 'in', numbers)]
+            )
+            if None in seasons:
+                season_fragments.append('"seasonNumber" IS NULL')
+            fragments.append('(%s)' % ' OR '.join(season_fragments))
+            parameters += parameters_in
+        if after is not None:
+            fragment, after_parameters = sqlite_episode_keyset(after,
+                                                               descending)
+            fragments.append(fragment)
+            parameters += after_parameters
+        page = 'SELECT * FROM title_episode WHERE %s ORDER BY %s' % (
+            ' AND '.join(fragments), sqlite_episode_order(descending),
+        )
+        if limit is not None:
+            page += ' LIMIT %d' % limit
+        sql = ('SELECT %s FROM (%s) AS te '
+               'LEFT JOIN title_basics AS tb ON tb.tconst = te.tconst '
+               'LEFT JOIN title_ratings AS tr ON tr.tconst = te.tconst '
+               'ORDER BY %s' % (self._episode_columns(self.catalog()), page,
+                                sqlite_episode_order(descending, 'te.')))
+        return self._fetchall(sql, parameters)
+
+    def season_rows(self, parent_id):
+        """Return a row for every season of a series, ordered by season
+        number (the unknown season last): its number of episodes, of rated
+        episodes, their average rating and total votes, and the years of
+        its first and last episodes."""
+        return self._fetchall(
+            '''SELECT te.seasonNumber AS "seasonNumber",
+                      COUNT(*) AS episodes,
+                      COUNT(tr.averageRating) AS rated,
+                      AVG(tr.averageRating) AS "averageRating",
+                      SUM(tr.numVotes) AS "numVotes",
+                      MIN(tb.startYear) AS "startYear",
+                      MAX(tb.startYear) AS "endYear"
+                 FROM title_episode AS te
+            LEFT JOIN title_basics AS tb ON tb.tconst = te.tconst
+            LEFT JOIN title_ratings AS tr ON tr.tconst = te.tconst
+                WHERE te.parentTconst = ?
+             GROUP BY te.seasonNumber
+             ORDER BY te.seasonNumber IS NULL, te.seasonNumber''',
+            (parent_id,),
+        )
+
+    def _search_titles_sql(self, catalog, no_soundex, with_year, episodes,
+                           with_adult, title_types_count, with_lengths,
+                           with_limit, year_first):
+        """Return the (title, aka) query text for one search shape; either
+        is None when that table cannot be searched without a full scan.
+
+        Searches by soundex can be bound to a window of title lengths, on
+        databases storing them, and to the titles with the most votes;
+        the titles equal to the searched one are then added by an indexed
+        lookup, however few their votes.  With year_first, the titles of
+        a year are read first, and the akas are read with the startYear
+        of their titles."""
+        columns = catalog.column_names('title_basics')
         kind_column = None
         if 'titleType' in columns:
             kind_column = 'titleType'
@@ -173,64 +984,157 @@ class SQLiteAdapter:
             adult_column = 'isAdult'
         elif 'adult' in columns:
             adult_column = 'adult'
-        if soundex is None:
-            conditions = [
-                'tb.t_soundex IS NULL',
-                'tb.primaryTitle = ?',
-            ]
-            parameters = [search_title]
+        # Whether the titles and the akas are bound to the window.
+        title_lengths = with_lengths and not no_soundex and \
+            't_length' in columns
+        aka_lengths = with_lengths and not no_soundex and \
+            't_length' in catalog.column_names('title_akas')
+        if no_soundex:
+            conditions = ['tb.t_soundex IS NULL', 'tb.primaryTitle = ?']
         else:
             conditions = ['tb.t_soundex = ?']
-            parameters = [soundex]
+        if title_lengths:
+            conditions.append('tb.t_length BETWEEN ? AND ?')
         filter_conditions = []
-        filter_parameters = []
-        if year is not None:
+        if with_year:
             filter_conditions.append('tb.startYear = ?')
-            filter_parameters.append(year)
         if episodes and kind_column is not None:
             filter_conditions.append('tb."%s" IN (?, ?)' % kind_column)
-            filter_parameters.extend(('episode', 'tvEpisode'))
-        if adult is not None and adult_column is not None:
+        if with_adult and adult_column is not None:
             filter_conditions.append('tb."%s" = ?' % adult_column)
-            filter_parameters.append(bool(adult))
-        if title_types and kind_column is not None:
-            placeholders = ', '.join('?' for _ in title_types)
+        if title_types_count and kind_column is not None:
+            placeholders = ', '.join('?' for _ in range(title_types_count))
             filter_conditions.append(
                 'tb."%s" IN (%s)' % (kind_column, placeholders)
             )
-            filter_parameters.extend(title_types)
         where = ' AND '.join(conditions + filter_conditions)
         title_limit = ' LIMIT %d' % NO_SOUNDEX_TITLE_LIMIT \
-            if soundex is None else ''
-        if soundex is not None or \
-                self._column_is_indexed('title_basics', 'primaryTitle'):
-            rows = self._fetchall(
-                'SELECT tb.* FROM title_basics AS tb WHERE ' + where + title_limit,
-                parameters + filter_parameters,
-            )
-        else:
-            rows = []
+            if no_soundex else ''
+        ranked = with_limit and not no_soundex
+        by_votes = ranked and \
+            'numVotes' in catalog.column_names('title_ratings')
+        if ranked:
+            title_limit = ' LIMIT ?'
+        order = []
+        # Only a limit makes the order of the rows matter.
+        if year_first and title_limit:
+            order.append('CASE WHEN tb.startYear = ? THEN 0 ELSE 1 END')
+        if by_votes:
+            order += ['tr.numVotes IS NULL', 'tr.numVotes DESC']
+        # Whether the exact matches are added to the ranked titles.
+        title_exact = ranked and \
+            catalog.is_indexed('title_basics', 'primaryTitle')
+        aka_exact = ranked and catalog.is_indexed('title_akas', 'title')
+        title_sql = None
+        if not no_soundex or \
+                catalog.is_indexed('title_basics', 'primaryTitle'):
+            title_sql = 'SELECT tb.* FROM title_basics AS tb'
+            if by_votes:
+                title_sql += ' LEFT JOIN title_ratings AS tr' \
+                    ' ON tr.tconst = tb.tconst'
+            title_sql += ' WHERE ' + where
+            if order:
+                title_sql += ' ORDER BY ' + ', '.join(order + ['tb.tconst'])
+            title_sql += title_limit
+            if title_exact:
+                title_sql = 'SELECT * FROM (%s) UNION ' \
+                    'SELECT tb.* FROM title_basics AS tb WHERE %s' % (
+                        title_sql,
+                        ' AND '.join(['tb.primaryTitle = ?'] +
+                                     filter_conditions),
+                    )
 
-        if soundex is None:
+        if no_soundex:
             aka_conditions = ['ta.t_soundex IS NULL', 'ta.title = ?']
-            aka_parameters = [search_title]
         else:
             aka_conditions = ['ta.t_soundex = ?']
-            aka_parameters = [soundex]
+        if aka_lengths:
+            aka_conditions.append('ta.t_length BETWEEN ? AND ?')
         aka_where = ' AND '.join(aka_conditions + filter_conditions)
-        aka_parameters.extend(filter_parameters)
-        join = ' JOIN title_basics AS tb ON ta.titleId = tb.tconst' \
-            if filter_conditions else ''
-        if soundex is not None or \
-                self._column_is_indexed('title_akas', 'title'):
-            aka_rows = self._fetchall(
-                'SELECT ta.* FROM title_akas AS ta%s WHERE %s%s' % (
-                    join, aka_where, title_limit,
-                ),
-                aka_parameters,
+        join = ''
+        if filter_conditions:
+            join = ' JOIN title_basics AS tb ON ta.titleId = tb.tconst'
+        elif year_first:
+            join = ' LEFT JOIN title_basics AS tb ON ta.titleId = tb.tconst'
+        if by_votes:
+            join += ' LEFT JOIN title_ratings AS tr ON tr.tconst = ta.titleId'
+        aka_sql = None
+        if not no_soundex or catalog.is_indexed('title_akas', 'title'):
+            aka_select = 'SELECT ta.*%s FROM title_akas AS ta' % (
+                ', tb.startYear AS "startYear"' if year_first else '',
+            )
+            aka_sql = '%s%s WHERE %s' % (aka_select, join, aka_where)
+            if order:
+                order.append('ta.titleId')
+                if 'ordering' in catalog.column_names('title_akas'):
+                    order.append('ta.ordering')
+                aka_sql += ' ORDER BY ' + ', '.join(order)
+            aka_sql += title_limit
+            if aka_exact:
+                exact_join = ''
+                if filter_conditions:
+                    exact_join = ' JOIN title_basics AS tb' \
+                        ' ON ta.titleId = tb.tconst'
+                elif year_first:
+                    exact_join = ' LEFT JOIN title_basics AS tb' \
+                        ' ON ta.titleId = tb.tconst'
+                aka_sql = 'SELECT * FROM (%s) UNION %s%s WHERE %s' % (
+                    aka_sql, aka_select, exact_join,
+                    ' AND '.join(['ta.title = ?'] + filter_conditions),
+                )
+        return (title_sql, aka_sql, kind_column, adult_column,
+                (title_lengths, aka_lengths), (title_exact, aka_exact))
+
+    def search_titles(self, soundex, search_title, year=None, episodes=False,
+                      adult=None, title_types=None, lengths=None,
+                      limit=None, year_first=None):
+        """Return the (title, aka) rows of the titles with the given
+        soundex or, if it is None, the given title.
+
+        lengths is a (shortest, longest) window of title lengths, and
+        limit the number of rows read from each table, the titles with
+        the most votes first; both apply only to searches by soundex.
+        year_first, unlike year, does not filter the titles: the ones of
+        that year are read first, and the aka rows carry the startYear of
+        their titles, so that they can be told apart."""
+        catalog = self.catalog()
+        shape = (
+            soundex is None, year is not None, bool(episodes),
+            adult is not None, len(title_types or ()), lengths is not None,
+            limit is not None, year_first is not None,
+        )
+        title_sql, aka_sql, kind_column, adult_column, windows, exact = \
+            catalog.statement(
+                ('search_titles',) + shape,
+                lambda: self._search_titles_sql(catalog, *shape),
             )
+        if soundex is None:
+            parameters = [search_title]
         else:
-            aka_rows = []
+            parameters = [soundex]
+        filters = []
+        if year is not None:
+            filters.append(year)
+        if episodes and kind_column is not None:
+            filters.extend(('episode', 'tvEpisode'))
+        if adult is not None and adult_column is not None:
+            filters.append(bool(adult))
+        if title_types and kind_column is not None:
+            filters.extend(title_types)
+        filter_parameters = list(filters)
+        if year_first is not None and (limit is not None or
+                                       soundex is None):
+            filter_parameters.append(year_first)
+        if limit is not None and soundex is not None:
+            filter_parameters.append(limit)
+        title_parameters, aka_parameters = (
+            parameters + (list(lengths) if window else []) + filter_parameters
+            + ([search_title] + filters if with_exact else [])
+            for window, with_exact in zip(windows, exact)
+        )
+        rows = self._fetchall(title_sql, title_parameters) \
+            if title_sql else []
+        aka_rows = self._fetchall(aka_sql, aka_parameters) if aka_sql else []
         return rows, aka_rows
 
     def search_people(self, soundexes):
@@ -0,0 +1,171 @@
+# Copyright 2026 Davide Alberani <da@mimante.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Asyncio front-end for the dataset-backed access system.
+
+Database drivers are blocking, so every call is run on a thread pool
+managed by :class:`AsyncIMDb`; the event loop is never blocked and many
+lookups can be gathered concurrently::
+
+    async with AsyncIMDb(uri='sqlite:///cinemagoer.db') as ia:
+        movies = await asyncio.gather(*(ia.get_movie(i) for i in ids))
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from imdb._exceptions import IMDbError
+from imdb.Movie import Movie
+from imdb.Person import Person
+
+from .adapters import sqlite_path_from_uri
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class AsyncIMDb:
+    """Asynchronous access to IMDb's data through the s3 dataset.
+
+    Calls run on a private pool of *max_workers* threads; each worker
+    thread lazily opens its own :class:`~imdb.parser.s3.IMDbS3AccessSystem`,
+    so connections are never shared between threads.  At most *concurrency*
+    calls (by default, *max_workers*) are in flight at the same time; the
+    other ones wait without occupying the pool.  Other keywords are passed
+    to every IMDbS3AccessSystem instance."""
+
+    def __init__(self, uri='sqlite:///cinemagoer.db',
+                 max_workers=DEFAULT_MAX_WORKERS, concurrency=None,
+                 **keywords):
+        if uri.startswith('sqlite:') and sqlite_path_from_uri(uri) == ':memory:':
+            raise IMDbError(
+                'in-memory SQLite URI %r cannot be shared by worker threads'
+                % uri
+            )
+        try:
+            max_workers = int(max_workers)
+        except (TypeError, ValueError):
+            max_workers = DEFAULT_MAX_WORKERS
+        if max_workers < 1:
+            max_workers = DEFAULT_MAX_WORKERS
+        if concurrency is None:
+            concurrency = max_workers
+        concurrency = int(concurrency)
+        if concurrency < 1:
+            # A semaphore of 0 would never let any call run.
+            raise ValueError('concurrency must be at least 1, not %d'
+                             % concurrency)
+        self.uri = uri
+        self.max_workers = max_workers
+        self.concurrency = concurrency
+        self._keywords = keywords
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = []
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='cinemagoer'
+        )
+
+    def _access(self):
+        """Return the access system of the current worker thread."""
+        access = getattr(self._local, 'access', None)
+        if access is None:
+            from . import IMDbS3AccessSystem
+            access = IMDbS3AccessSystem(uri=self.uri, **self._keywords)
+            with self._lock:
+                if self._executor is None:
+                    access.close()
+                    raise IMDbError('the AsyncIMDb instance is closed')
+                self._instances.append(access)
+            self._local.access = access
+        return access
+
+    def _run(self, name, args, kwargs):
+        return getattr(self._access(), name)(*args, **kwargs)
+
+    async def _call(self, name, *args, **kwargs):
+        async with self._semaphore:
+            executor = self._executor
+            if executor is None:
+                raise IMDbError('the AsyncIMDb instance is closed')
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, functools.partial(self._run, name, args, kwargs)
+            )
+
+    async def get_movie(self, movieID, info=Movie.default_info, modFunct=None,
+                        fields=None):
+        """Return a Movie object for the given movieID."""
+        return await self._call('get_movie', movieID, info=info,
+                                modFunct=modFunct, fields=fields)
+
+    get_episode = get_movie
+
+    async def get_movies(self, movieIDs, info=Movie.default_info,
+                         modFunct=None, fields=None):
+        """Return a list of Movie objects for the given movieIDs."""
+        return await self._call('get_movies', list(movieIDs), info=info,
+                                modFunct=modFunct, fields=fields)
+
+    async def get_movie_episodes(self, movieID, season_nums='all'):
+        """Return the episodes of a series, as get_movie_episodes of
+        IMDbS3AccessSystem does."""
+        return await self._call('get_movie_episodes', movieID,
+                                season_nums=season_nums)
+
+    async def get_person(self, personID, info=Person.default_info,
+                         modFunct=None, fields=None):
+        """Return a Person object for the given personID."""
+        return await self._call('get_person', personID, info=info,
+                                modFunct=modFunct, fields=fields)
+
+    async def get_people(self, personIDs, info=Person.default_info,
+                         modFunct=None, fields=None):
+        """Return a list of Person objects for the given personIDs."""
+        return await self._call('get_people', list(personIDs), info=info,
+                                modFunct=modFunct, fields=fields)
+
+    async def search_movie(self, title, results=None):
+        """Return a list of Movie objects for a query for the given title."""
+        return await self._call('search_movie', title, results=results)
+
+    async def search_episode(self, title, results=None):
+        """Return a list of Movie objects, searching only episodes."""
+        return await self._call('search_episode', title, results=results)
+
+    async def search_person(self, name, results=None):
+        """Return a list of Person objects for a query for the given name."""
+        return await self._call('search_person', name, results=results)
+
+    async def update(self, mop, info=None, override=0, fields=None):
+        """Retrieve the given info sets for a Movie or Person object."""
+        return await self._call('update', mop, info=info, override=override,
+                                fields=fields)
+
+    async def close(self):
+        """Wait for the running calls, then close every worker's database
+        resources; repeated calls are safe."""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, executor.shutdown)
+        with self._lock:
+            instances = self._instances
+            self._instances = []
+        for access in instances:
+            access.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
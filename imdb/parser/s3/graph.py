@@ -0,0 +1,208 @@
+# Copyright 2026 Davide Alberani <da@mimante.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""In-memory graph of the people credited on titles.
+
+The credits of title_principals are loaded once into compressed sparse
+row (CSR) arrays: for every title the IDs of its people, and for every
+person the IDs of their titles, each stored as a flat array of 32-bit
+integers plus an array of offsets.  Paths between people are searched
+with a bidirectional breadth-first search, never touching the database.
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+
+# Range of IDs read by every query while loading the graph.
+DEFAULT_GRAPH_STEP = 50000
+DEFAULT_MAX_DEPTH = 6
+
+
+def _load_adjacency(adapter, key, value, step, kinds=None):
+    """Return the (ids, offsets, neighbours, codes) arrays of the credits
+    grouped by key ('tconst' or 'nconst'); if kinds is a dictionary,
+    codes holds the kind of every title, as indexes of the kinds
+    registered there."""
+    ids = array('I')
+    offsets = array('I')
+    neighbours = array('I')
+    codes = array('B')
+    low, high = adapter.column_range('title_principals', key)
+    start = low
+    while low is not None and start <= high:
+        stop = start + step
+        if kinds is not None:
+            title_kinds = dict(adapter.range_pairs(
+                'title_basics', 'tconst', 'titleType', start, stop,
+            ))
+        group = set()
+        for row_key, row_value in adapter.range_pairs(
+                'title_principals', key, value, start, stop):
+            if not ids or ids[-1] != row_key:
+                ids.append(row_key)
+                offsets.append(len(neighbours))
+                group.clear()
+                if kinds is not None:
+                    codes.append(kinds.setdefault(
+                        title_kinds.get(row_key), len(kinds)
+                    ))
+            if row_value not in group:
+                group.add(row_value)
+                neighbours.append(row_value)
+        start = stop
+    offsets.append(len(neighbours))
+    return ids, offsets, neighbours, codes
+
+
+class CreditGraph:
+    """A read-only bipartite graph of people and titles, in CSR arrays.
+
+    Build it with from_adapter(); stats() returns its size, its memory
+    footprint and the time it took to load."""
+
+    def __init__(self, title_ids, title_offsets, title_people, title_kinds,
+                 person_ids, person_offsets, person_titles, kinds,
+                 load_seconds=None):
+        self.title_ids = title_ids
+        self.title_offsets = title_offsets
+        self.title_people = title_people
+        self.title_kinds = title_kinds
+        self.person_ids = person_ids
+        self.person_offsets = person_offsets
+        self.person_titles = person_titles
+        self.kinds = kinds
+        self.load_seconds = load_seconds
+        self.generation = None
+
+    @classmethod
+    def from_adapter(cls, adapter, step=DEFAULT_GRAPH_STEP):
+        """Load the credits through a database adapter; every query reads
+        the credits of step consecutive IDs."""
+        started = time.perf_counter()
+        kinds = {}
+        title_ids, title_offsets, title_people, title_kinds = \
+            _load_adjacency(adapter, 'tconst', 'nconst', step, kinds)
+        person_ids, person_offsets, person_titles, _codes = \
+            _load_adjacency(adapter, 'nconst', 'tconst', step)
+        return cls(title_ids, title_offsets, title_people, title_kinds,
+                   person_ids, person_offsets, person_titles, kinds,
+                   load_seconds=time.perf_counter() - started)
+
+    def stats(self):
+        """Return a dictionary with the number of people, titles and
+        credits, the bytes used by the arrays and the load time."""
+        arrays = (self.title_ids, self.title_offsets, self.title_people,
+                  self.title_kinds, self.person_ids, self.person_offsets,
+                  self.person_titles)
+        return {
+            'people': len(self.person_ids),
+            'titles': len(self.title_ids),
+            'credits': len(self.title_people),
+            'bytes': sum(len(a) * a.itemsize for a in arrays),
+            'load seconds': self.load_seconds,
+        }
+
+    @staticmethod
+    def _find(ids, key):
+        index = bisect_left(ids, key)
+        if index < len(ids) and ids[index] == key:
+            return index
+        return None
+
+    def titles_of(self, personID):
+        """Return the movieIDs of the titles crediting a person."""
+        index = self._find(self.person_ids, personID)
+        if index is None:
+            return ()
+        return self.person_titles[self.person_offsets[index]:
+                                  self.person_offsets[index + 1]]
+
+    def people_of(self, movieID):
+        """Return the personIDs of the people credited on a title."""
+        index = self._find(self.title_ids, movieID)
+        if index is None:
+            return ()
+        return self.title_people[self.title_offsets[index]:
+                                 self.title_offsets[index + 1]]
+
+    def kind_of(self, movieID):
+        """Return the kind of a title, as stored in the database."""
+        index = self._find(self.title_ids, movieID)
+        if index is None:
+            return None
+        for kind, code in self.kinds.items():
+            if code == self.title_kinds[index]:
+                return kind
+        return None
+
+    def shortest_path(self, source, target, max_depth=DEFAULT_MAX_DEPTH,
+                      kinds=None):
+        """Return the shortest chain of shared titles between two people,
+        as a list alternating personIDs and movieIDs, from source to
+        target; None if they are not linked by at most max_depth titles.
+
+        kinds, if given, are the only kinds of titles followed.  The two
+        searches start from both ends, and the smaller frontier is always
+        expanded first."""
+        if self._find(self.person_ids, source) is None or \
+                self._find(self.person_ids, target) is None:
+            return None
+        if source == target:
+            return [source]
+        allowed = None
+        if kinds is not None:
+            allowed = {self.kinds[kind] for kind in kinds
+                       if kind in self.kinds}
+        # For every reached person: (title, previous person, depth).
+        parents = ({source: (None, None, 0)}, {target: (None, None, 0)})
+        seen_titles = (set(), set())
+        frontiers = [[source], [target]]
+        depths = [0, 0]
+        while frontiers[0] and frontiers[1] and sum(depths) < max_depth:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            reached, others = parents[side], parents[1 - side]
+            depth = depths[side] + 1
+            frontier = []
+            meetings = []
+            for person in frontiers[side]:
+                for title in self.titles_of(person):
+                    if title in seen_titles[side]:
+                        continue
+                    seen_titles[side].add(title)
+                    if allowed is not None:
+                        index = self._find(self.title_ids, title)
+                        if self.title_kinds[index] not in allowed:
+                            continue
+                    for other in self.people_of(title):
+                        if other in reached:
+                            continue
+                        reached[other] = (title, person, depth)
+                        frontier.append(other)
+                        if other in others:
+                            meetings.append(other)
+            depths[side] = depth
+            frontiers[side] = frontier
+            if meetings:
+                meeting = min(meetings, key=lambda p: others[p][2])
+                return self._join(parents, meeting)
+        return None
+
+    @staticmethod
+    def _join(parents, meeting):
+        """Return the path through meeting, from the source to the
+        target of the two searches."""
+        path = [meeting]
+        title, person, _depth = parents[0][meeting]
+        while person is not None:
+            path[:0] = [person, title]
+            title, person, _depth = parents[0][person]
+        title, person, _depth = parents[1][meeting]
+        while person is not None:
+            path += [title, person]
+            title, person, _depth = parents[1][person]
+        return path
@@ -17,7 +17,18 @@ from imdb._exceptions import IMDbDataAccessError, IMDbError
 from imdb.version import __version__
 
 from .adapters import sqlite_path_from_uri
-from .utils import DB_TRANSFORM, name_soundexes, title_soundex
+from .utils import (
+    COLLABORATORS_INDEX,
+    COLLABORATORS_TABLE,
+    DB_INDEXES,
+    DB_TRANSFORM,
+    DEFAULT_WEIGHT_VOTES,
+    index_name,
+    name_soundexes,
+    title_length,
+    title_soundex,
+    weighted_rating,
+)
 
 TSV_EXT = '.tsv.gz'
 BLOCK_SIZE = 10000
@@ -106,8 +117,10 @@ def generate_content(fd, headers, table_name, block_size=BLOCK_SIZE,
                     info[key] = transform(info[key])
             if table_name == 'title_basics':
                 info['t_soundex'] = title_soundex(info['primaryTitle'])
+                info['t_length'] = title_length(info['primaryTitle'])
             elif table_name == 'title_akas':
                 info['t_soundex'] = title_soundex(info['title'])
+                info['t_length'] = title_length(info['title'])
             elif table_name == 'name_basics':
                 soundexes = name_soundexes(info['primaryName'])
                 info['ns_soundex'], info['sn_soundex'], info['s_soundex'] = \
@@ -237,6 +250,17 @@ def _write_manifest(directory, manifest):
     return manifest_path
 
 
+def weight_votes_option(weight_votes):
+    """Return the votes given to the mean rating by weighted ratings."""
+    try:
+        weight_votes = float(weight_votes)
+    except (TypeError, ValueError) as exc:
+        raise IMDbError('invalid weight votes: %r' % weight_votes) from exc
+    if weight_votes < 0:
+        raise IMDbError('invalid weight votes: %r' % weight_votes)
+    return weight_votes
+
+
 def table_definition(filename, headers):
     """Return a neutral table definition for a dataset file."""
     table_name = table_name_from_filename(filename)
@@ -259,7 +283,9 @@ class SQLiteImporter:
         None: 'TEXT',
     }
 
-    def __init__(self, database):
+    def __init__(self, database, weight_votes=DEFAULT_WEIGHT_VOTES):
+        self.weight_votes = weight_votes_option(weight_votes)
+        self.mean_rating = None
         try:
             import sqlite3
         except ImportError as exc:  # pragma: no cover - platform dependent
@@ -315,21 +341,70 @@ class SQLiteImporter:
                 ]
                 self.connection.executemany(insert, values)
                 count += len(block)
-            for column, conf in columns:
-                if conf.get('index'):
-                    index_name = 'ix_%s_%s' % (table_name, column)
-                    self.connection.execute(
-                        'CREATE INDEX "%s" ON "%s" ("%s")' % (
-                            index_name, table_name, column
-                        )
+            if table_name == 'title_ratings':
+                self._weight_ratings()
+            indexes = [(column,) for column, conf in columns
+                       if conf.get('index')]
+            indexes += [index for index in DB_INDEXES.get(table_name, ())
+                        if set(index).issubset(column_names)]
+            for index in indexes:
+                self.connection.execute(
+                    'CREATE INDEX "%s" ON "%s" (%s)' % (
+                        index_name(table_name, index), table_name,
+                        ', '.join('"%s"' % column for column in index)
                     )
+                )
             return count
 
+    def _weight_ratings(self):
+        """Store the weighted rating of every title, see weighted_rating."""
+        self.mean_rating = self.connection.execute(
+            'SELECT AVG("averageRating") FROM title_ratings'
+        ).fetchone()[0]
+        if self.mean_rating is None:
+            return
+        self.connection.execute(
+            'UPDATE title_ratings SET "weightedRating" = '
+            '("numVotes" * "averageRating" + ? * ?) / ("numVotes" + ?)',
+            (self.weight_votes, self.mean_rating, self.weight_votes),
+        )
+
+    def drop_collaborators(self):
+        self.connection.execute('DROP TABLE IF EXISTS "%s"'
+                                % COLLABORATORS_TABLE)
+
+    def build_collaborators(self):
+        """Build the collaborators table from title_principals, and return
+        the number of its rows."""
+        self.drop_collaborators()
+        self.connection.execute(
+            'CREATE TABLE "%s" (nconst INTEGER, collaborator INTEGER, '
+            'titles INTEGER)' % COLLABORATORS_TABLE
+        )
+        count = self.connection.execute(
+            'INSERT INTO "%s" (nconst, collaborator, titles) '
+            'SELECT a.nconst, b.nconst, COUNT(DISTINCT a.tconst) '
+            'FROM title_principals AS a '
+            'JOIN title_principals AS b '
+            'ON b.tconst = a.tconst AND b.nconst != a.nconst '
+            'GROUP BY a.nconst, b.nconst' % COLLABORATORS_TABLE
+        ).rowcount
+        self.connection.execute(
+            'CREATE INDEX "%s" ON "%s" (%s)' % (
+                index_name(COLLABORATORS_TABLE, COLLABORATORS_INDEX),
+                COLLABORATORS_TABLE,
+                ', '.join('"%s"' % column for column in COLLABORATORS_INDEX)
+            )
+        )
+        return count
+
 
 class SQLAlchemyImporter:
     """Optional dialect-neutral SQLAlchemy dataset importer."""
 
-    def __init__(self, uri):
+    def __init__(self, uri, weight_votes=DEFAULT_WEIGHT_VOTES):
+        self.weight_votes = weight_votes_option(weight_votes)
+        self.mean_rating = None
         try:
             import sqlalchemy
         except ImportError as exc:
@@ -402,11 +477,72 @@ class SQLAlchemyImporter:
                 column_type = column_type(length=conf['length'])
             columns.append(sa.Column(name, column_type))
             if conf.get('index'):
-                indexed.append(name)
+                indexed.append((name,))
+        names = {name for name, _conf in definition}
+        indexed += [index for index in DB_INDEXES.get(table_name, ())
+                    if names.issuperset(index)]
         table = sa.Table(table_name, self.metadata, *columns)
-        table.info['indexed_columns'] = indexed
+        table.info['indexes'] = indexed
         return table
 
+    def _weight_ratings(self, table):
+        """Store the weighted rating of every title, see weighted_rating."""
+        sa = self.sqlalchemy
+        self.mean_rating = self.connection.execute(
+            sa.select(sa.func.avg(table.c.averageRating))
+        ).scalar()
+        if self.mean_rating is None:
+            return
+        self.mean_rating = float(self.mean_rating)
+        self.connection.execute(table.update().values(
+            weightedRating=weighted_rating(
+                table.c.averageRating, table.c.numVotes, self.mean_rating,
+                self.weight_votes,
+            )
+        ))
+
+    def _collaborators_table(self):
+        sa = self.sqlalchemy
+        table = self.metadata.tables.get(COLLABORATORS_TABLE)
+        if table is None:
+            table = sa.Table(
+                COLLABORATORS_TABLE, self.metadata,
+                sa.Column('nconst', sa.Integer),
+                sa.Column('collaborator', sa.Integer),
+                sa.Column('titles', sa.Integer),
+            )
+        return table
+
+    def drop_collaborators(self):
+        self._collaborators_table().drop(bind=self.connection,
+                                         checkfirst=True)
+
+    def build_collaborators(self):
+        """Build the collaborators table from title_principals, and return
+        the number of its rows."""
+        sa = self.sqlalchemy
+        table = self._collaborators_table()
+        table.drop(bind=self.connection, checkfirst=True)
+        table.create(bind=self.connection)
+        principals = self.metadata.tables.get('title_principals')
+        if principals is None:
+            principals = sa.Table('title_principals', self.metadata,
+                                  autoload_with=self.connection)
+        a = principals.alias('a')
+        b = principals.alias('b')
+        pairs = sa.select(
+            a.c.nconst, b.c.nconst, sa.func.count(sa.distinct(a.c.tconst)),
+        ).select_from(a.join(b, sa.and_(b.c.tconst == a.c.tconst,
+                                        b.c.nconst != a.c.nconst))) \
+            .group_by(a.c.nconst, b.c.nconst)
+        count = self.connection.execute(table.insert().from_select(
+            ['nconst', 'collaborator', 'titles'], pairs
+        )).rowcount
+        sa.Index(index_name(COLLABORATORS_TABLE, COLLABORATORS_INDEX),
+                 *(table.c[column] for column in COLLABORATORS_INDEX)) \
+            .create(self.connection)
+        return count
+
     def import_file(self, filename):
         count = 0
         with gzip.GzipFile(filename, 'rb') as gz_file:
@@ -419,24 +555,33 @@ class SQLAlchemyImporter:
                     gz_file, headers, table.name, filename=filename):
                 connection.execute(table.insert(), block)
                 count += len(block)
-            for column_name in table.info['indexed_columns']:
+            if table.name == 'title_ratings':
+                self._weight_ratings(table)
+            for columns in table.info['indexes']:
                 index = self.sqlalchemy.Index(
-                    'ix_%s_%s' % (table.name, column_name),
-                    table.c[column_name],
+                    index_name(table.name, columns),
+                    *(table.c[column] for column in columns),
                 )
                 index.create(connection, checkfirst=True)
         return count
 
 
-def importer_for_uri(uri):
+def importer_for_uri(uri, weight_votes=DEFAULT_WEIGHT_VOTES):
     if uri.startswith('sqlite:'):
-        return SQLiteImporter(sqlite_path_from_uri(uri))
-    return SQLAlchemyImporter(uri)
+        return SQLiteImporter(sqlite_path_from_uri(uri),
+                              weight_votes=weight_votes)
+    return SQLAlchemyImporter(uri, weight_votes=weight_votes)
+
 
+def import_dir(directory, uri, cleanup=False,
+               weight_votes=DEFAULT_WEIGHT_VOTES, collaborators=False):
+    """Preflight and import a complete IMDb dataset into *uri*.
 
-def import_dir(directory, uri, cleanup=False):
-    """Preflight and import a complete IMDb dataset into *uri*."""
+    weight_votes is the m of the weighted ratings computed for charts;
+    with collaborators set, the table of the people credited together
+    is built, too."""
     validate_destination_uri(uri)
+    weight_votes = weight_votes_option(weight_votes)
     filenames, file_metadata = preflight_directory(directory)
     manifest = {
         'cinemagoer_version': __version__,
@@ -444,11 +589,13 @@ def import_dir(directory, uri, cleanup=False):
         'files': file_metadata,
         'removed_files': [],
         'status': 'preflight-complete',
+        'weight_votes': weight_votes,
+        'collaborators': bool(collaborators),
     }
     manifest_path = _write_manifest(directory, manifest)
     importer = None
     try:
-        importer = importer_for_uri(uri)
+        importer = importer_for_uri(uri, weight_votes=weight_votes)
         importer.check_connection()
         importer.begin()
         metadata_by_name = {
@@ -465,7 +612,15 @@ def import_dir(directory, uri, cleanup=False):
                     % (filename, count, metadata['source_rows'])
                 )
             logger.info('processed file %s: %d entries', filename, count)
+        if collaborators:
+            logger.info('begin building the collaborators table')
+            manifest['collaborator_rows'] = importer.build_collaborators()
+            logger.info('built the collaborators table: %d entries',
+                        manifest['collaborator_rows'])
+        else:
+            importer.drop_collaborators()
         importer.commit()
+        manifest['mean_rating'] = importer.mean_rating
     except Exception as exc:
         if importer is not None:
             try:
@@ -0,0 +1,87 @@
+# Copyright 2026 Davide Alberani <da@mimante.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Lists whose items are retrieved only when they are first used."""
+
+import threading
+
+
+class LazyList(list):
+    """A list filled by its BatchLoader the first time its content is
+    used; copying or pickling it returns a plain, complete list."""
+
+    def __init__(self, batch):
+        list.__init__(self)
+        self._batch = batch
+
+    def _materialize(self):
+        batch = self._batch
+        if batch is not None:
+            batch.load()
+
+    def _fill(self, items):
+        list.extend(self, items)
+        self._batch = None
+
+    def __reduce_ex__(self, protocol):
+        return list, (list(self),)
+
+    def __repr__(self):
+        self._materialize()
+        return list.__repr__(self)
+
+
+def _materializing(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._materialize()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+# Every list method that reads or changes the items loads them first.
+for _name in ('__iter__', '__len__', '__getitem__', '__setitem__',
+              '__delitem__', '__contains__', '__reversed__', '__eq__',
+              '__ne__', '__lt__', '__le__', '__gt__', '__ge__', '__add__',
+              '__iadd__', '__mul__', '__imul__', 'append', 'extend',
+              'insert', 'remove', 'pop', 'clear', 'index', 'count', 'sort',
+              'reverse', 'copy'):
+    setattr(LazyList, _name, _materializing(_name))
+
+
+class BatchLoader:
+    """Fill many LazyList objects at once, the first time any of them is
+    used.
+
+    load is called with the keys given to add(), and must return a
+    list of items for every key, in the same order."""
+
+    def __init__(self, load):
+        self._load = load
+        self._lists = []
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        """Return a new LazyList, filled with the items of key."""
+        lazy = LazyList(self)
+        self._lists.append((lazy, key))
+        return lazy
+
+    def load(self):
+        """Fill every pending LazyList; repeated calls do nothing."""
+        with self._lock:
+            pending = self._lists
+            if not pending:
+                return
+            results = self._load([key for _lazy, key in pending])
+            self._lists = []
+            for (lazy, _key), items in zip(pending, results):
+                lazy._fill(items)
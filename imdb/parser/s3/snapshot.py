@@ -0,0 +1,602 @@
+# Copyright 2026 Davide Alberani <da@mimante.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""Read-only binary snapshots of a Cinemagoer database.
+
+A snapshot is a single file, exported from a database by
+:func:`export_snapshot`, and read through ``mmap`` by
+:class:`SnapshotAdapter`: opening it costs a few system calls, and its pages
+are shared by every process reading it through the page cache.
+
+The file starts with the magic bytes, the length of a JSON table of
+contents and the table of contents itself; then come the sections, each a
+native-endian array aligned to 8 bytes.  The rows of every table are sorted
+by their key (tconst, nconst or titleId) and stored by column:
+
+- the distinct keys ('i') and, for each of them, the offset of its first
+  row ('I', one more than the keys): the ID offset index;
+- integer columns as 32-bit integers ('i', NULL is -2**31), booleans as
+  bytes ('b', NULL is -1) and floats as doubles ('d', NULL is NaN);
+- string columns as a heap of UTF-8 bytes and the offset of the end of
+  every string ('Q', one more than the rows); the top bit marks NULLs.
+
+Some columns, like title_principals.nconst, also have a secondary index:
+their distinct values, offsets and, for each value, the keys of the rows
+holding it.
+"""
+
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from urllib.parse import unquote
+
+from imdb._exceptions import IMDbDataAccessError, IMDbError
+
+from .adapters import SchemaCatalog, SQLiteAdapter, adapter_for_uri
+from .utils import DB_TRANSFORM
+
+SNAPSHOT_MAGIC = b'CGSNAP01'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<8sQ')
+# Key column and row order of the tables a snapshot can hold.
+SNAPSHOT_TABLES = {
+    'title_basics': ('tconst', ()),
+    'title_akas': ('titleId', ('ordering',)),
+    'title_crew': ('tconst', ()),
+    'title_episode': ('tconst', ()),
+    'title_principals': ('tconst', ('ordering',)),
+    'title_ratings': ('tconst', ()),
+    'name_basics': ('nconst', ()),
+}
+# Columns with a secondary index, by table.
+SNAPSHOT_INDEXES = {
+    'title_episode': ('parentTconst',),
+    'title_principals': ('nconst',),
+}
+# Range of keys read by every query of the export.
+DEFAULT_SNAPSHOT_STEP = 10000
+
+# Array typecodes and NULL values of the column types.
+_TYPECODES = {'int': 'i', 'bool': 'b', 'float': 'd'}
+_NULLS = {'int': -2 ** 31, 'bool': -1, 'float': math.nan}
+_NULL_STRING = 1 << 63
+_OFFSET_MASK = _NULL_STRING - 1
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_path_from_uri(uri):
+    """Return the path of the snapshot file of a snapshot:/// URI."""
+    if not uri.startswith('snapshot:///'):
+        raise IMDbError(
+            'invalid snapshot URI %r; use snapshot:///relative.snapshot or '
+            'snapshot:////absolute/path.snapshot' % uri
+        )
+    path = unquote(uri[len('snapshot:///'):])
+    if not path or '?' in path or '#' in path:
+        raise IMDbError('invalid snapshot URI %r' % uri)
+    return path
+
+
+def _column_type(table, column):
+    kind = DB_TRANSFORM.get(table, {}).get(column, {}).get('type')
+    if kind == 'integer':
+        return 'int'
+    if kind == 'boolean':
+        return 'bool'
+    if kind == 'float':
+        return 'float'
+    return 'str'
+
+
+class _SectionWriter:
+    """Sections of a snapshot being written, each to its own temporary
+    file, then copied one after the other into the snapshot."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sections = []
+
+    def add(self, typecode):
+        """Return the index of a new, empty section of arrays of
+        typecode (or None for raw bytes)."""
+        path = os.path.join(self.directory, 'section-%d' % len(self.sections))
+        self.sections.append([typecode, path, open(path, 'wb'), 0])
+        return len(self.sections) - 1
+
+    def write(self, section, data):
+        """Append an array, or bytes, to a section."""
+        entry = self.sections[section]
+        if isinstance(data, array):
+            data.tofile(entry[2])
+            entry[3] += len(data) * data.itemsize
+        else:
+            entry[2].write(data)
+            entry[3] += len(data)
+
+    def close(self):
+        for entry in self.sections:
+            entry[2].close()
+
+    def layout(self):
+        """Return the (offset, length) of every section, relative to the
+        first one, each aligned to 8 bytes."""
+        positions = []
+        position = 0
+        for entry in self.sections:
+            positions.append([position, entry[3]])
+            position += -(-entry[3] // 8) * 8
+        return positions
+
+    def copy_to(self, stream):
+        for entry in self.sections:
+            with open(entry[1], 'rb') as source:
+                while True:
+                    chunk = source.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    stream.write(chunk)
+            stream.write(b'\0' * (-entry[3] % 8))
+
+
+def _export_table(adapter, writer, table, step):
+    key, order_by = SNAPSHOT_TABLES[table]
+    columns = sorted(adapter.column_names(table) - {key})
+    types = {column: _column_type(table, column) for column in columns}
+    info = {
+        'key': key,
+        'rows': 0,
+        'keys': writer.add('i'),
+        'offsets': writer.add('I'),
+        'columns': {},
+        'indexes': {},
+    }
+    strings = {}
+    for column in columns:
+        if types[column] == 'str':
+            info['columns'][column] = {
+                'type': 'str', 'ends': writer.add('Q'),
+                'heap': writer.add(None),
+            }
+            strings[column] = 0
+            writer.write(info['columns'][column]['ends'], array('Q', [0]))
+        else:
+            info['columns'][column] = {
+                'type': types[column],
+                'data': writer.add(_TYPECODES[types[column]]),
+            }
+    rows = 0
+    last = None
+    low, high = adapter.column_range(table, key)
+    start = low
+    while low is not None and start <= high:
+        stop = start + step
+        batch = adapter.range_rows(table, key, start, stop, order_by)
+        keys = array('i')
+        offsets = array('I')
+        for row in batch:
+            if row[key] != last:
+                last = row[key]
+                keys.append(last)
+                offsets.append(rows)
+            rows += 1
+        writer.write(info['keys'], keys)
+        writer.write(info['offsets'], offsets)
+        for column in columns:
+            column_info = info['columns'][column]
+            if types[column] == 'str':
+                ends = array('Q')
+                heap = bytearray()
+                end = strings[column]
+                for row in batch:
+                    value = row.get(column)
+                    if value is None:
+                        ends.append(end | _NULL_STRING)
+                        continue
+                    data = str(value).encode('utf-8')
+                    heap += data
+                    end += len(data)
+                    ends.append(end)
+                strings[column] = end
+                writer.write(column_info['ends'], ends)
+                writer.write(column_info['heap'], bytes(heap))
+            else:
+                kind = types[column]
+                null = _NULLS[kind]
+                convert = float if kind == 'float' else int
+                data = array(_TYPECODES[kind], [
+                    null if row.get(column) is None
+                    else convert(row[column])
+                    for row in batch
+                ])
+                writer.write(column_info['data'], data)
+        start = stop
+    writer.write(info['offsets'], array('I', [rows]))
+    info['rows'] = rows
+    for column in SNAPSHOT_INDEXES.get(table, ()):
+        if column in columns:
+            info['indexes'][column] = _export_index(adapter, writer, table,
+                                                    key, column, step)
+    return info
+
+
+def _export_index(adapter, writer, table, key, column, step):
+    """Write the secondary index of a column: its distinct values, with
+    the offsets of their keys, and the distinct keys of every value."""
+    info = {
+        'keys': writer.add('i'),
+        'offsets': writer.add('I'),
+        'targets': writer.add('i'),
+    }
+    count = 0
+    low, high = adapter.column_range(table, column)
+    start = low
+    last = None
+    group = set()
+    while low is not None and start <= high:
+        stop = start + step
+        values = array('i')
+        offsets = array('I')
+        targets = array('i')
+        for value, target in adapter.range_pairs(table, column, key, start,
+                                                 stop):
+            if value != last:
+                last = value
+                group.clear()
+                values.append(value)
+                offsets.append(count)
+            if target not in group:
+                group.add(target)
+                targets.append(target)
+                count += 1
+        writer.write(info['keys'], values)
+        writer.write(info['offsets'], offsets)
+        writer.write(info['targets'], targets)
+        start = stop
+    writer.write(info['offsets'], array('I', [count]))
+    return info
+
+
+def export_snapshot(uri, path, tables=None, step=DEFAULT_SNAPSHOT_STEP):
+    """Export the tables (by default, every table of SNAPSHOT_TABLES in the
+    database) of the database at uri into a snapshot file at path.
+
+    The snapshot is written to a temporary file in the same directory,
+    then renamed over path: readers of the old file are not disturbed.
+    Return a dictionary with the number of rows of every table, the size
+    of the file and the seconds taken."""
+    started = time.perf_counter()
+    if tables is None:
+        tables = list(SNAPSHOT_TABLES)
+    unknown = set(tables).difference(SNAPSHOT_TABLES)
+    if unknown:
+        raise IMDbError('tables not supported by snapshots: %s'
+                        % ', '.join(sorted(unknown)))
+    directory = os.path.dirname(os.path.abspath(path))
+    adapter = adapter_for_uri(uri)
+    temporary = None
+    try:
+        with tempfile.TemporaryDirectory(dir=directory,
+                                         prefix='.snapshot-') as sections:
+            writer = _SectionWriter(sections)
+            contents = {
+                'version': SNAPSHOT_VERSION,
+                'byteorder': sys.byteorder,
+                'tables': {},
+            }
+            try:
+                for table in tables:
+                    if not adapter.column_names(table):
+                        logger.info('skipped missing table %s', table)
+                        continue
+                    logger.info('begin exporting table %s', table)
+                    contents['tables'][table] = _export_table(
+                        adapter, writer, table, step
+                    )
+                    logger.info('exported table %s: %d rows', table,
+                                contents['tables'][table]['rows'])
+            finally:
+                writer.close()
+            layout = writer.layout()
+            for table_info in contents['tables'].values():
+                _resolve_sections(table_info, layout)
+            encoded = json.dumps(contents, sort_keys=True).encode('utf-8')
+            with tempfile.NamedTemporaryFile(
+                    dir=directory, prefix='.%s.' % os.path.basename(path),
+                    delete=False) as stream:
+                temporary = stream.name
+                stream.write(_HEADER.pack(SNAPSHOT_MAGIC, len(encoded)))
+                stream.write(encoded)
+                stream.write(b'\0' * (-stream.tell() % 8))
+                writer.copy_to(stream)
+                size = stream.tell()
+            os.replace(temporary, path)
+            temporary = None
+    except OSError as exc:
+        raise IMDbDataAccessError(
+            'unable to write snapshot %r: %s' % (path, exc)
+        ) from exc
+    finally:
+        adapter.close()
+        if temporary is not None:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+    return {
+        'tables': {table: table_info['rows']
+                   for table, table_info in contents['tables'].items()},
+        'bytes': size,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def _resolve_sections(info, layout):
+    """Replace the section numbers of the information of a table with
+    their (offset, length)."""
+    for name in ('keys', 'offsets'):
+        info[name] = layout[info[name]]
+    for column_info in info['columns'].values():
+        for name in ('data', 'ends', 'heap'):
+            if name in column_info:
+                column_info[name] = layout[column_info[name]]
+    for index_info in info['indexes'].values():
+        for name in ('keys', 'offsets', 'targets'):
+            index_info[name] = layout[index_info[name]]
+
+
+class _Table:
+    """The arrays of a table of a snapshot."""
+
+    def __init__(self, name, info, view):
+        self.name = name
+        self.key = info['key']
+        self.rows = info['rows']
+        self.keys = view(info['keys'], 'i')
+        self.offsets = view(info['offsets'], 'I')
+        self.columns = {}
+        for column, column_info in info['columns'].items():
+            kind = column_info['type']
+            if kind == 'str':
+                self.columns[column] = (kind, view(column_info['ends'], 'Q'),
+                                        view(column_info['heap'], 'B'))
+            else:
+                self.columns[column] = (kind, view(column_info['data'],
+                                                   _TYPECODES[kind]), None)
+        self.indexes = {
+            column: (view(index['keys'], 'i'), view(index['offsets'], 'I'),
+                     view(index['targets'], 'i'))
+            for column, index in info['indexes'].items()
+        }
+
+    def key_range(self, key):
+        """Return the range of the positions of the rows of a key."""
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return range(self.offsets[index], self.offsets[index + 1])
+        return range(0)
+
+    def row(self, position, key):
+        row = {self.key: key}
+        for column, (kind, data, heap) in self.columns.items():
+            if kind == 'str':
+                end = data[position + 1]
+                if end & _NULL_STRING:
+                    row[column] = None
+                else:
+                    start = data[position] & _OFFSET_MASK
+                    row[column] = str(heap[start:end], 'utf-8')
+            else:
+                value = data[position]
+                if kind == 'float':
+                    row[column] = None if math.isnan(value) else value
+                else:
+                    row[column] = None if value == _NULLS[kind] else value
+        return row
+
+    def rows_of(self, key):
+        return [self.row(position, key) for position in self.key_range(key)]
+
+    def keys_of(self, column, value):
+        """Return the keys of the rows whose column holds value."""
+        values, offsets, targets = self.indexes[column]
+        index = bisect_left(values, value)
+        if index < len(values) and values[index] == value:
+            return targets[offsets[index]:offsets[index + 1]].tolist()
+        return []
+
+
+class SnapshotAdapter:
+    """Serve the rows of a snapshot written by export_snapshot.
+
+    The file is mapped in memory and never copied: every lookup is a
+    binary search on the ID offset index of a table (or on a secondary
+    index), and only the values of the returned rows are decoded.  Rows
+    can be read by the key of their table, or by a column with a
+    secondary index; searches and the other queries of the SQL adapters
+    are not supported.
+
+    A snapshot never changes while it is open, so the adapter can be
+    shared by many threads; the other options of the SQL adapters are
+    accepted and ignored."""
+
+    row_cache = None
+    shared_generation = True
+
+    def __init__(self, path, **_options):
+        self.database = path
+        self._views = []
+        self._mmap = None
+        try:
+            with open(path, 'rb') as stream:
+                stat = os.fstat(stream.fileno())
+                self._generation = (stat.st_ino, stat.st_size,
+                                    stat.st_mtime_ns)
+                header = stream.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    raise IMDbDataAccessError('not a snapshot: %r' % path)
+                magic, length = _HEADER.unpack(header)
+                if magic != SNAPSHOT_MAGIC:
+                    raise IMDbDataAccessError('not a snapshot: %r' % path)
+                contents = json.loads(stream.read(length).decode('utf-8'))
+                self._mmap = mmap.mmap(stream.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        except OSError as exc:
+            raise IMDbDataAccessError(
+                'unable to open snapshot %r: %s' % (path, exc)
+            ) from exc
+        except ValueError as exc:
+            raise IMDbDataAccessError(
+                'invalid snapshot %r: %s' % (path, exc)
+            ) from exc
+        if contents.get('version') != SNAPSHOT_VERSION or \
+                contents.get('byteorder') != sys.byteorder:
+            self.close()
+            raise IMDbDataAccessError(
+                'snapshot %r has version %r and byte order %r; export it '
+                'again on this system' % (path, contents.get('version'),
+                                          contents.get('byteorder'))
+            )
+        base = _HEADER.size + length
+        base += -base % 8
+        self._base = memoryview(self._mmap)
+        self._views.append(self._base)
+
+        def view(section, typecode):
+            offset, size = section
+            data = self._base[base + offset:base + offset + size]
+            self._views.append(data)
+            data = data.cast(typecode)
+            self._views.append(data)
+            return data
+
+        self.tables = {
+            name: _Table(name, info, view)
+            for name, info in contents['tables'].items()
+        }
+        self._catalog = SchemaCatalog(
+            self._generation,
+            {name: set(table.columns) | {table.key}
+             for name, table in self.tables.items()},
+            {name: set(table.indexes) | {table.key}
+             for name, table in self.tables.items()},
+        )
+
+    def close(self):
+        """Release the memory map; repeated calls are safe."""
+        views = self._views
+        self._views = []
+        for view in reversed(views):
+            view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def generation(self):
+        """Return the inode, size and modification time the snapshot had
+        when it was opened."""
+        return self._generation
+
+    def clear_cache(self):
+        """Do nothing: snapshots have no cache but the page cache."""
+
+    def catalog(self):
+        return self._catalog
+
+    def column_names(self, table):
+        return set(self._catalog.column_names(table))
+
+    def _table(self, table):
+        if self._mmap is None:
+            raise IMDbDataAccessError('the snapshot adapter is closed')
+        return self.tables.get(table)
+
+    def get_row(self, table, column, value):
+        rows = self.get_rows_in(table, column, [value])
+        return rows[0] if rows else None
+
+    def get_rows(self, table, column, value, order_by=None):
+        return self.get_rows_in(table, column, [value], order_by=order_by)
+
+    def get_rows_in(self, table, column, values, order_by=None):
+        """Return the rows whose column is one of values, which must be
+        the key of the table or have a secondary index; order_by is
+        applied to the rows of each value (NULLs first)."""
+        snapshot_table = self._table(table)
+        if snapshot_table is None:
+            return []
+        if column != snapshot_table.key and \
+                column not in snapshot_table.indexes:
+            raise IMDbDataAccessError(
+                'the snapshot cannot look up %s by %s' % (table, column)
+            )
+        rows = []
+        for value in dict.fromkeys(values):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                continue
+            if column == snapshot_table.key:
+                group = snapshot_table.rows_of(value)
+            else:
+                group = [
+                    row for key in snapshot_table.keys_of(column, value)
+                    for row in snapshot_table.rows_of(key)
+                    if row[column] == value
+                ]
+            if order_by:
+                group.sort(key=lambda row: tuple(
+                    (row[name] is not None, row[name]) for name in order_by
+                ))
+            rows.extend(group)
+        return rows
+
+    def crew_rows(self, nconsts):
+        """Return no rows: the directors and writers lists of title_crew
+        cannot be searched in a snapshot, so filmographies hold only the
+        credits of title_principals."""
+        return []
+
+    def episode_rows(self, parent_id):
+        """Return the rows of the episodes of a series, as
+        SQLiteAdapter.episode_rows does."""
+        episodes = self.get_rows_in('title_episode', 'parentTconst',
+                                    [parent_id])
+        ids = [row['tconst'] for row in episodes]
+        prefixed = []
+        for table, prefix in (('title_basics', '_title_'),
+                              ('title_ratings', '_rating_')):
+            found = {row['tconst']: row
+                     for row in self.get_rows_in(table, 'tconst', ids)}
+            columns = sorted(self.column_names(table))
+            prefixed.append((prefix, columns, found))
+        rows = []
+        for episode in episodes:
+            row = dict(episode)
+            for prefix, columns, found in prefixed:
+                other = found.get(episode['tconst'], {})
+                for column in columns:
+                    row[prefix + column] = other.get(column)
+            rows.append(row)
+        return rows
+
+    def __getattr__(self, name):
+        if not name.startswith('_') and hasattr(SQLiteAdapter, name):
+            def unsupported(*args, **kwargs):
+                raise IMDbDataAccessError(
+                    '%s is not supported by snapshot databases' % name
+                )
+            return unsupported
+        raise AttributeError(name)
@@ -7,19 +7,171 @@
 
 """Optional SQLAlchemy adapter for non-native database dialects."""
 
+import contextlib
+import os
+import threading
+import weakref
+from collections.abc import Mapping
 from pathlib import Path
 
 import sqlalchemy
 
-from imdb._exceptions import IMDbDataAccessError
+from imdb._cache import cache_size_option
+from imdb._exceptions import IMDbDataAccessError, IMDbError
 
-from .adapters import NO_SOUNDEX_TITLE_LIMIT
+from .adapters import (
+    CONDITION_OPERATORS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_MMAP_SIZE,
+    IN_QUERY_CHUNK_SIZE,
+    NO_SOUNDEX_TITLE_LIMIT,
+    RATING_SORT_COLUMNS,
+    RowCache,
+    SchemaCatalog,
+    crew_conditions,
+    integer_option,
+    item_pattern,
+)
+from .utils import COLLABORATORS_TABLE, DB_TRANSFORM
+
+# The tables written by the importer: the only ones reflected together.
+KNOWN_TABLES = frozenset(DB_TRANSFORM).union((COLLABORATORS_TABLE,))
+# Compiled forms of the statements kept by the engine (SQLAlchemy's own
+# default); every query shape of the adapter takes one entry.
+DEFAULT_QUERY_CACHE_SIZE = 500
+
+
+class ReflectedTables(Mapping):
+    """The tables of a database, reflected on first use.
+
+    Looking up a table reflects only that table, and remembers the ones
+    that do not exist; iterating reflects, in one pass, the tables of the
+    importer that were not looked up yet, and no other table."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.metadata = sqlalchemy.MetaData()
+        self._missing = set()
+        self._complete = False
+        self._lock = threading.RLock()
+
+    def _reflect(self, **options):
+        try:
+            self.metadata.reflect(bind=self.engine, **options)
+        except sqlalchemy.exc.InvalidRequestError:
+            # Raised for the tables that do not exist.
+            raise
+        except sqlalchemy.exc.SQLAlchemyError as exc:
+            raise IMDbDataAccessError(
+                'unable to inspect database %r: %s' % (
+                    self.engine.url.render_as_string(hide_password=True),
+                    exc,
+                )
+            ) from exc
+
+    def __getitem__(self, name):
+        table = self.metadata.tables.get(name)
+        if table is not None:
+            return table
+        if name in self._missing or self._complete and name in KNOWN_TABLES:
+            raise KeyError(name)
+        with self._lock:
+            if name not in self.metadata.tables:
+                try:
+                    self._reflect(only=[name])
+                except sqlalchemy.exc.InvalidRequestError:
+                    self._missing.add(name)
+                    raise KeyError(name) from None
+        return self.metadata.tables[name]
+
+    def _reflect_known(self):
+        if self._complete:
+            return
+        with self._lock:
+            if not self._complete:
+                self._reflect(only=lambda name, _metadata:
+                              name in KNOWN_TABLES and
+                              name not in self.metadata.tables)
+                self._missing.update(
+                    KNOWN_TABLES.difference(self.metadata.tables)
+                )
+                self._complete = True
+
+    def __iter__(self):
+        self._reflect_known()
+        return iter(list(self.metadata.tables))
+
+    def __len__(self):
+        self._reflect_known()
+        return len(self.metadata.tables)
+
+
+class ReflectedCatalog(SchemaCatalog):
+    """Schema catalog of ReflectedTables: the columns and the indexes of
+    a table are read, and the table reflected, the first time they are
+    asked for, so that the catalog never reflects the whole database."""
+
+    def __init__(self, generation, tables):
+        super().__init__(generation, {}, {})
+        self.tables = tables
+
+    def _describe(self, table):
+        try:
+            reflected = self.tables[table]
+        except KeyError:
+            columns = indexed = frozenset()
+        else:
+            columns = frozenset(reflected.c.keys())
+            indexed = frozenset(column.name
+                                for index in reflected.indexes
+                                for column in index.columns)
+        self.indexed.setdefault(table, indexed)
+        return self.columns.setdefault(table, columns)
+
+    def column_names(self, table):
+        columns = self.columns.get(table)
+        if columns is None:
+            columns = self._describe(table)
+        return columns
+
+    def is_indexed(self, table, column):
+        if table not in self.indexed:
+            self._describe(table)
+        return column in self.indexed[table]
 
 
 class SQLAlchemyAdapter:
-    """Dialect-neutral query adapter backed by SQLAlchemy."""
+    """Dialect-neutral query adapter backed by SQLAlchemy.
+
+    Every query checks out a connection from the thread-safe engine pool.
+    With *thread_safe* set, an in-memory SQLite database is kept in a single
+    connection shared by every thread, one query at a time.  The
+    *immutable*, *mmap_size* and *cache_size* options are applied to SQLite
+    databases, as the native SQLite adapter does, and ignored otherwise.
+
+    A *row_cache_size* greater than 0 keeps up to that many bytes of rows
+    read by key in a RowCache, exposed as the row_cache attribute; only
+    SQLite files are checked for a new generation, so call clear_cache()
+    after importing again into another database system.
 
-    def __init__(self, uri):
+    Tables are reflected on first use (see ReflectedTables), and the
+    queries run by key are built once, with bound parameters, so that the
+    engine finds their compiled form in its cache of *query_cache_size*
+    statements.  With *pin_connections* set, every thread keeps checked
+    out a connection of its own, instead of checking one out of the pool
+    for every query; each query still runs in its own transaction."""
+
+    def __init__(self, uri, thread_safe=False, immutable=False,
+                 mmap_size=DEFAULT_MMAP_SIZE, cache_size=DEFAULT_CACHE_SIZE,
+                 row_cache_size=0, query_cache_size=DEFAULT_QUERY_CACHE_SIZE,
+                 pin_connections=False):
+        mmap_size = integer_option('mmap_size', mmap_size)
+        cache_size = integer_option('cache_size', cache_size)
+        query_cache_size = integer_option('query_cache_size',
+                                          query_cache_size)
+        row_cache_size = cache_size_option('row_cache_size', row_cache_size)
+        self.row_cache = RowCache(row_cache_size) if row_cache_size else None
         try:
             url = sqlalchemy.engine.make_url(uri)
         except sqlalchemy.exc.ArgumentError as exc:
@@ -38,12 +190,39 @@ class SQLAlchemyAdapter:
                 )
             query = dict(url.query)
             query.update({'mode': 'ro', 'uri': 'true'})
+            if immutable:
+                query['immutable'] = '1'
             engine_uri = url.set(
                 database='file:%s' % sqlite_path.resolve().as_posix(),
                 query=query,
             )
+        self._sqlite_path = sqlite_path
+        # See SQLiteAdapter.
+        self.shared_generation = url.get_backend_name() != 'sqlite' or \
+            sqlite_path is not None
+        engine_options = {}
+        self._lock = None
+        if thread_safe and url.get_backend_name() == 'sqlite' and \
+                sqlite_path is None:
+            # The default pool gives every thread a different database.
+            engine_options = {
+                'poolclass': sqlalchemy.pool.StaticPool,
+                'connect_args': {'check_same_thread': False},
+            }
+            self._lock = threading.RLock()
+        self.thread_safe = bool(thread_safe)
+        # A single shared connection is already pinned.
+        self.pin_connections = bool(pin_connections) and self._lock is None
+        self._local = threading.local()
+        self._pinned_lock = threading.Lock()
+        # (thread, connection) pairs of the pinned connections, so that
+        # they can be closed by close() or once their thread is gone.
+        self._pinned = []
         try:
-            self.engine = sqlalchemy.create_engine(engine_uri, echo=False)
+            self.engine = sqlalchemy.create_engine(
+                engine_uri, echo=False, query_cache_size=query_cache_size,
+                **engine_options
+            )
         except ModuleNotFoundError as exc:
             raise IMDbDataAccessError(
                 'the database driver required by %r is not installed: %s'
@@ -53,53 +232,431 @@ class SQLAlchemyAdapter:
             @sqlalchemy.event.listens_for(self.engine, 'connect')
             def _set_query_only(dbapi_connection, _connection_record):
                 dbapi_connection.execute('PRAGMA query_only = ON')
-        self.metadata = sqlalchemy.MetaData()
+                dbapi_connection.execute('PRAGMA mmap_size = %d' % mmap_size)
+        if url.get_backend_name() == 'sqlite':
+            @sqlalchemy.event.listens_for(self.engine, 'connect')
+            def _set_cache_size(dbapi_connection, _connection_record):
+                dbapi_connection.execute('PRAGMA cache_size = %d' % cache_size)
+        self._reflect()
+
+    def _reflect(self):
+        """Forget the reflected tables and the catalog."""
+        self.tables = ReflectedTables(self.engine)
+        self.metadata = self.tables.metadata
+        self._catalog = None
+        self._reflections = getattr(self, '_reflections', 0) + 1
+
+    def catalog(self):
+        """Return the schema catalog of the current database generation;
+        the tables are reflected again when the generation changes."""
+        generation = self.generation()
+        catalog = self._catalog
+        if catalog is not None and catalog.generation == generation:
+            return catalog
+        if catalog is not None:
+            self._reflect()
+            generation = self.generation()
+        catalog = ReflectedCatalog(generation, self.tables)
+        self._catalog = catalog
+        return catalog
+
+    def generation(self):
+        """Return a token that changes whenever the database is rebuilt.
+
+        Only SQLite files can be checked, as the native SQLite adapter
+        does; for other databases the token changes only when the tables
+        are reflected again, by clear_cache()."""
+        if self._sqlite_path is None:
+            return self._reflections
         try:
-            self.metadata.reflect(bind=self.engine)
-        except sqlalchemy.exc.SQLAlchemyError as exc:
-            self.engine.dispose()
-            raise IMDbDataAccessError(
-                'unable to inspect database %r: %s' % (uri, exc)
-            ) from exc
-        self.tables = self.metadata.tables
+            stat = os.stat(self._sqlite_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def clear_cache(self):
+        """Empty the row cache, if any, and reflect the tables again."""
+        if self.row_cache is not None:
+            self.row_cache.cache.clear()
+        self._reflect()
 
     def close(self):
+        with self._pinned_lock:
+            pinned = self._pinned
+            self._pinned = []
+            self._local = threading.local()
+        for _thread, connection in pinned:
+            connection.close()
         self.engine.dispose()
 
-    def _fetchone(self, statement):
-        with self.engine.connect() as connection:
-            row = connection.execute(statement).mappings().first()
+    def _pinned_connection(self):
+        """Return the connection pinned to the calling thread."""
+        generation = self.generation()
+        state = getattr(self._local, 'state', None)
+        if state is not None and state[1] == generation and \
+                not state[0].closed:
+            return state[0]
+        connection = self.engine.connect()
+        stale = []
+        with self._pinned_lock:
+            alive = []
+            for thread, other in self._pinned:
+                thread = thread()
+                if (state is not None and other is state[0]) or \
+                        thread is None or not thread.is_alive():
+                    stale.append(other)
+                else:
+                    alive.append((weakref.ref(thread), other))
+            alive.append((weakref.ref(threading.current_thread()),
+                          connection))
+            self._pinned = alive
+        for other in stale:
+            other.close()
+        self._local.state = (connection, generation)
+        return connection
+
+    @contextlib.contextmanager
+    def _connection(self):
+        if self._lock is not None:
+            with self._lock, self.engine.connect() as connection:
+                yield connection
+        elif self.pin_connections:
+            connection = self._pinned_connection()
+            try:
+                yield connection
+            finally:
+                # Do not leave a transaction open between queries.
+                connection.rollback()
+        else:
+            with self.engine.connect() as connection:
+                yield connection
+
+    def _fetchone(self, statement, parameters=None):
+        with self._connection() as connection:
+            row = connection.execute(statement, parameters).mappings().first()
         return dict(row) if row else None
 
-    def _fetchall(self, statement):
-        with self.engine.connect() as connection:
-            rows = connection.execute(statement).mappings().all()
+    def _fetchall(self, statement, parameters=None, plain=False):
+        """Return the rows of a query as dictionaries or, if plain is
+        set, as tuples."""
+        with self._connection() as connection:
+            result = connection.execute(statement, parameters)
+            if plain:
+                return [tuple(row) for row in result]
+            rows = result.mappings().all()
         return [dict(row) for row in rows]
 
     def column_names(self, table):
-        return set(self.tables[table].c.keys())
+        return set(self.catalog().column_names(table))
 
     def _column_is_indexed(self, table, column):
-        return any(
-            indexed_column.name == column
-            for index in self.tables[table].indexes
-            for indexed_column in index.columns
+        return self.catalog().is_indexed(table, column)
+
+    def _rows_statement(self, table, column, order_by=None, many=False):
+        """Return the select of the rows of table by column, built once,
+        with a 'value' parameter or, if many is set, a 'values' list."""
+        order_by = tuple(order_by or ())
+
+        def build():
+            table_obj = self.tables[table]
+            if many:
+                clause = table_obj.c[column].in_(
+                    sqlalchemy.bindparam('values', expanding=True)
+                )
+            else:
+                clause = table_obj.c[column] == sqlalchemy.bindparam('value')
+            return sqlalchemy.select(table_obj).where(clause).order_by(
+                *(table_obj.c[name] for name in order_by)
+            )
+
+        return self.catalog().statement(
+            ('rows', table, column, order_by, many), build,
         )
 
     def get_row(self, table, column, value):
+        if self.row_cache is not None:
+            rows = self.get_rows(table, column, value)
+            return rows[0] if rows else None
+        return self._fetchone(self._rows_statement(table, column),
+                              {'value': value})
+
+    def get_rows(self, table, column, value, order_by=None):
+        if self.row_cache is not None:
+            return self.get_rows_in(table, column, [value], order_by=order_by)
+        return self._fetchall(self._rows_statement(table, column, order_by),
+                              {'value': value})
+
+    def get_rows_in(self, table, column, values, order_by=None):
+        """Return the rows whose *column* is one of *values*, with one
+        IN (...) query every IN_QUERY_CHUNK_SIZE distinct values not in
+        the row cache."""
+        if self.row_cache is not None:
+            return self.row_cache.rows(
+                self.generation(), table, column, values, order_by,
+                lambda missing: self._fetch_rows_in(table, column, missing,
+                                                    order_by),
+            )
+        return self._fetch_rows_in(table, column, values, order_by)
+
+    def _fetch_rows_in(self, table, column, values, order_by=None):
+        values = list(dict.fromkeys(values))
+        if not values:
+            return []
+        statement = self._rows_statement(table, column, order_by, many=True)
+        rows = []
+        for start in range(0, len(values), IN_QUERY_CHUNK_SIZE):
+            rows.extend(self._fetchall(statement, {
+                'values': values[start:start + IN_QUERY_CHUNK_SIZE],
+            }))
+        return rows
+
+    def _conditions(self, table_obj, conditions):
+        """Return the expressions of (column, operator, value) conditions;
+        like and has are case insensitive, as they are in SQLite."""
+        clauses = []
+        for column, operator, value in conditions:
+            if operator not in CONDITION_OPERATORS:
+                raise IMDbError('invalid condition operator: %r' % operator)
+            column = table_obj.c[column]
+            if operator == 'in':
+                clauses.append(column.in_(list(value)))
+            elif operator == 'like':
+                clauses.append(column.ilike(value))
+            elif operator == 'has':
+                items = sqlalchemy.literal(',') + column + \
+                    sqlalchemy.literal(',')
+                clauses.append(items.ilike(item_pattern(value), escape='\\'))
+            else:
+                clauses.append(column.op(operator)(value))
+        return clauses
+
+    def iter_rows(self, table, key, conditions=(),
+                  batch_size=DEFAULT_BATCH_SIZE):
+        """Yield the rows of table matching the (column, operator, value)
+        conditions, ordered by the key column, batch_size rows at a time
+        with keyset pagination; key must be unique."""
         table_obj = self.tables[table]
-        return self._fetchone(
-            sqlalchemy.select(table_obj).where(table_obj.c[column] == value)
+        key_column = table_obj.c[key]
+        clauses = self._conditions(table_obj, conditions)
+        last = None
+        while True:
+            statement = sqlalchemy.select(table_obj).where(*clauses)
+            if last is not None:
+                statement = statement.where(key_column > last)
+            rows = self._fetchall(
+                statement.order_by(key_column).limit(batch_size)
+            )
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][key]
+
+    def filter_titles(self, conditions=(), rating_conditions=(), sort=None,
+                      descending=False, after=None, limit=None):
+        """Return the title_basics rows, with the title_ratings columns,
+        matching the conditions, as SQLiteAdapter.filter_titles does."""
+        tb = self.tables['title_basics']
+        tr = self.tables.get('title_ratings')
+        rating_names = set(tr.c.keys()) if tr is not None else set()
+        if (rating_conditions or sort in RATING_SORT_COLUMNS) \
+                and tr is None:
+            return []
+        with_ratings = bool(rating_conditions) or sort in rating_names
+        columns = list(tb.c)
+        from_clause = tb
+        if tr is not None:
+            columns += [column for column in tr.c if column.name != 'tconst']
+            from_clause = tb.join(tr, tr.c.tconst == tb.c.tconst,
+                                  isouter=not with_ratings)
+        clauses = self._conditions(tb, conditions)
+        if rating_conditions:
+            clauses += self._conditions(tr, rating_conditions)
+        order = [tb.c.tconst.desc() if descending else tb.c.tconst.asc()]
+        if sort is not None:
+            sort_column = (tr if sort in rating_names else tb).c[sort]
+            clauses.append(sort_column.isnot(None))
+            order.insert(0, sort_column.desc() if descending
+                         else sort_column.asc())
+            if after is not None:
+                if descending:
+                    clauses.append(sqlalchemy.or_(
+                        sort_column < after[0],
+                        sqlalchemy.and_(sort_column == after[0],
+                                        tb.c.tconst < after[1]),
+                    ))
+                else:
+                    clauses.append(sqlalchemy.or_(
+                        sort_column > after[0],
+                        sqlalchemy.and_(sort_column == after[0],
+                                        tb.c.tconst > after[1]),
+                    ))
+        elif after is not None:
+            clauses.append(tb.c.tconst < after if descending
+                           else tb.c.tconst > after)
+        statement = sqlalchemy.select(*columns).select_from(from_clause) \
+            .where(*clauses).order_by(*order)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return self._fetchall(statement)
+
+    def person_credits(self, nconst, categories=None, after=None,
+                       limit=None):
+        """Return the title_principals rows of a person, with the
+        startYear of their titles, as SQLiteAdapter.person_credits does."""
+        tp = self.tables['title_principals']
+        tb = self.tables['title_basics']
+        year = tb.c.startYear
+        clauses = [tp.c.nconst == nconst]
+        if categories:
+            clauses.append(tp.c.category.in_(list(categories)))
+        if after is not None:
+            after_year, tconst, ordering = after
+            next_rows = tp.c.tconst < tconst
+            if ordering is not None:
+                next_rows = sqlalchemy.or_(next_rows, sqlalchemy.and_(
+                    tp.c.tconst == tconst, tp.c.ordering > ordering,
+                ))
+            if after_year is None:
+                clauses.append(sqlalchemy.or_(year.isnot(None), next_rows))
+            else:
+                clauses.append(sqlalchemy.or_(
+                    year < after_year,
+                    sqlalchemy.and_(year == after_year, next_rows),
+                ))
+        statement = sqlalchemy.select(tp, year.label('startYear')) \
+            .select_from(tp.outerjoin(tb, tb.c.tconst == tp.c.tconst)) \
+            .where(*clauses) \
+            .order_by(year.is_(None).desc(), year.desc(), tp.c.tconst.desc(),
+                      tp.c.ordering)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return self._fetchall(statement)
+
+    def crew_rows(self, nconsts):
+        """Return the title_crew rows listing any of the given people, as
+        SQLiteAdapter.crew_rows does."""
+        table_obj = self.tables.get('title_crew')
+        if table_obj is None:
+            return []
+        conditions = crew_conditions(nconsts, set(table_obj.c.keys()))
+        rows = []
+        for start in range(0, len(conditions), IN_QUERY_CHUNK_SIZE):
+            clauses = self._conditions(
+                table_obj, conditions[start:start + IN_QUERY_CHUNK_SIZE]
+            )
+            rows.extend(self._fetchall(
+                sqlalchemy.select(table_obj).where(sqlalchemy.or_(*clauses))
+            ))
+        return rows
+
+    def collaborators(self, nconst, limit=None):
+        """Return (nconst, titles) rows of the people credited with the
+        given one, as SQLiteAdapter.collaborators does."""
+        table = self.tables.get(COLLABORATORS_TABLE)
+        if table is not None:
+            statement = sqlalchemy.select(
+                table.c.collaborator.label('nconst'), table.c.titles,
+            ).where(table.c.nconst == nconst).order_by(
+                table.c.titles.desc(), table.c.collaborator.desc(),
+            )
+        else:
+            tp = self.tables['title_principals']
+            a = tp.alias('a')
+            b = tp.alias('b')
+            titles = sqlalchemy.func.count(sqlalchemy.distinct(b.c.tconst))
+            statement = sqlalchemy.select(
+                b.c.nconst.label('nconst'), titles.label('titles'),
+            ).select_from(a.join(b, b.c.tconst == a.c.tconst)).where(
+                a.c.nconst == nconst, b.c.nconst != a.c.nconst,
+            ).group_by(b.c.nconst).order_by(titles.desc(), b.c.nconst.desc())
+        if limit is not None:
+            statement = statement.limit(limit)
+        return self._fetchall(statement)
+
+    def shared_titles(self, nconst, other):
+        """Return the tconst rows of the titles crediting both people."""
+        tp = self.tables['title_principals']
+        a = tp.alias('a')
+        b = tp.alias('b')
+        statement = sqlalchemy.select(a.c.tconst).distinct() \
+            .select_from(a.join(b, b.c.tconst == a.c.tconst)) \
+            .where(a.c.nconst == nconst, b.c.nconst == other)
+        return self._fetchall(statement)
+
+    def column_range(self, table, column):
+        """Return the minimum and the maximum values of a column."""
+        column = self.tables[table].c[column]
+        row = self._fetchone(sqlalchemy.select(
+            sqlalchemy.func.min(column).label('low'),
+            sqlalchemy.func.max(column).label('high'),
+        ))
+        return row['low'], row['high']
+
+    def range_pairs(self, table, key, value, start, stop):
+        """Return the (key, value) tuples of the rows of table whose key
+        is in [start, stop) and value is not NULL, ordered by key."""
+        def build():
+            table_obj = self.tables[table]
+            key_column, value_column = table_obj.c[key], table_obj.c[value]
+            return sqlalchemy.select(key_column, value_column).where(
+                key_column >= sqlalchemy.bindparam('start'),
+                key_column < sqlalchemy.bindparam('stop'),
+                value_column.isnot(None),
+            ).order_by(key_column)
+
+        return self._fetchall(
+            self.catalog().statement(('range_pairs', table, key, value),
+                                     build),
+            {'start': start, 'stop': stop}, plain=True,
         )
 
-    def get_rows(self, table, column, value):
-        table_obj = self.tables[table]
+    def range_rows(self, table, key, start, stop, order_by=()):
+        """Return the rows of table whose key is in a range, as
+        SQLiteAdapter.range_rows does."""
+        order_by = tuple(order_by)
+
+        def build():
+            table_obj = self.tables[table]
+            key_column = table_obj.c[key]
+            return sqlalchemy.select(table_obj).where(
+                key_column >= sqlalchemy.bindparam('start'),
+                key_column < sqlalchemy.bindparam('stop'),
+            ).order_by(key_column, *(table_obj.c[name] for name in order_by))
+
         return self._fetchall(
-            sqlalchemy.select(table_obj).where(table_obj.c[column] == value)
+            self.catalog().statement(('range_rows', table, key, order_by),
+                                     build),
+            {'start': start, 'stop': stop},
         )
 
-    def episode_rows(self, parent_id):
-        te = self.tables['title_episode']
+    def title_summaries(self, start, stop):
+        """Return the (tconst, titleType, startYear, averageRating,
+        numVotes) tuples of some titles, as SQLiteAdapter.title_summaries
+        does."""
+        def build():
+            tb = self.tables['title_basics']
+            tr = self.tables.get('title_ratings')
+            if tr is not None:
+                ratings = (tr.c.averageRating, tr.c.numVotes)
+                selected = tb.outerjoin(tr, tr.c.tconst == tb.c.tconst)
+            else:
+                ratings = (sqlalchemy.null(), sqlalchemy.null())
+                selected = tb
+            return sqlalchemy.select(
+                tb.c.tconst, tb.c.titleType, tb.c.startYear, *ratings,
+            ).select_from(selected).where(
+                tb.c.tconst >= sqlalchemy.bindparam('start'),
+                tb.c.tconst < sqlalchemy.bindparam('stop'),
+            ).order_by(tb.c.tconst)
+
+        return self._fetchall(
+            self.catalog().statement('title_summaries', build),
+            {'start': start, 'stop': stop}, plain=True,
+        )
+
+    def _episode_select(self, te):
+        """Return the select of the rows of the episodes in te, joined
+        with their titles and ratings."""
         tb = self.tables['title_basics']
         tr = self.tables['title_ratings']
         title_columns = [
@@ -108,27 +665,135 @@ class SQLAlchemyAdapter:
         rating_columns = [
             column.label('_rating_%s' % column.name) for column in tr.c
         ]
-        return self._fetchall(
+        return (
             sqlalchemy.select(*te.c, *title_columns, *rating_columns)
             .select_from(te)
             .outerjoin(tb, tb.c.tconst == te.c.tconst)
             .outerjoin(tr, tr.c.tconst == te.c.tconst)
-            .where(te.c.parentTconst == parent_id)
         )
 
-    def search_titles(self, soundex, search_title, year=None, episodes=False,
-                      adult=None, title_types=None):
+    @staticmethod
+    def _episode_order(te, descending=False):
+        terms = []
+        for column in (te.c.seasonNumber, te.c.episodeNumber):
+            if descending:
+                terms += [column.is_(None).desc(), column.desc()]
+            else:
+                terms += [column.is_(None), column]
+        terms.append(te.c.tconst.desc() if descending else te.c.tconst)
+        return terms
+
+    @staticmethod
+    def _episode_keyset(te, after, descending=False):
+        """Return the clause selecting the episodes after a triple, as
+        sqlite_episode_keyset does."""
+        season, episode, tconst = after
+        clause = te.c.tconst < tconst if descending else te.c.tconst > tconst
+        for column, value in ((te.c.episodeNumber, episode),
+                              (te.c.seasonNumber, season)):
+            if value is None:
+                clause = sqlalchemy.and_(column.is_(None), clause)
+                if descending:
+                    clause = sqlalchemy.or_(column.isnot(None), clause)
+            else:
+                if descending:
+                    following = column < value
+                else:
+                    following = sqlalchemy.or_(column > value,
+                                               column.is_(None))
+                clause = sqlalchemy.or_(
+                    following, sqlalchemy.and_(column == value, clause),
+                )
+        return clause
+
+    def episode_rows(self, parent_id):
+        def build():
+            te = self.tables['title_episode']
+            return self._episode_select(te).where(
+                te.c.parentTconst == sqlalchemy.bindparam('parent_id')
+            )
+
+        return self._fetchall(
+            self.catalog().statement('episode_rows', build),
+            {'parent_id': parent_id},
+        )
+
+    def episode_page(self, parent_id, seasons=None, after=None, limit=None,
+                     descending=False):
+        """Return a page of the rows of the episodes of a series, as
+        SQLiteAdapter.episode_page does."""
+        te = self.tables['title_episode']
+        clauses = [te.c.parentTconst == parent_id]
+        if seasons is not None:
+            seasons = list(seasons)
+            numbers = [season for season in seasons if season is not None]
+            season_clauses = [te.c.seasonNumber.in_(numbers)]
+            if None in seasons:
+                season_clauses.append(te.c.seasonNumber.is_(None))
+            clauses.append(sqlalchemy.or_(*season_clauses))
+        if after is not None:
+            clauses.append(self._episode_keyset(te, after, descending))
+        page = sqlalchemy.select(te).where(*clauses) \
+            .order_by(*self._episode_order(te, descending))
+        if limit is not None:
+            page = page.limit(limit)
+        page = page.subquery('te')
+        statement = self._episode_select(page) \
+            .order_by(*self._episode_order(page, descending))
+        return self._fetchall(statement)
+
+    def season_rows(self, parent_id):
+        """Return a row for every season of a series, as
+        SQLiteAdapter.season_rows does."""
+        te = self.tables['title_episode']
+        tb = self.tables['title_basics']
+        tr = self.tables['title_ratings']
+        func = sqlalchemy.func
+        statement = sqlalchemy.select(
+            te.c.seasonNumber,
+            func.count().label('episodes'),
+            func.count(tr.c.averageRating).label('rated'),
+            func.avg(tr.c.averageRating).label('averageRating'),
+            func.sum(tr.c.numVotes).label('numVotes'),
+            func.min(tb.c.startYear).label('startYear'),
+            func.max(tb.c.startYear).label('endYear'),
+        ).select_from(te) \
+            .outerjoin(tb, tb.c.tconst == te.c.tconst) \
+            .outerjoin(tr, tr.c.tconst == te.c.tconst) \
+            .where(te.c.parentTconst == parent_id) \
+            .group_by(te.c.seasonNumber) \
+            .order_by(te.c.seasonNumber.is_(None), te.c.seasonNumber)
+        return self._fetchall(statement)
+
+    def _search_titles_statements(self, no_soundex, with_year, episodes,
+                                  with_adult, with_title_types, with_lengths,
+                                  with_limit, year_first):
+        """Return the (title, aka) statements for one search shape; either
+        is None when that table cannot be searched without a full scan.
+        See SQLiteAdapter.search_titles for the lengths, the limit, the
+        exact matches and year_first."""
+        catalog = self.catalog()
+        bindparam = sqlalchemy.bindparam
         tb = self.tables['title_basics']
-        if soundex is None:
+        ta = self.tables['title_akas']
+        tr = self.tables.get('title_ratings')
+        with_lengths = with_lengths and not no_soundex
+        ranked = with_limit and not no_soundex
+        by_votes = ranked and tr is not None and 'numVotes' in tr.c
+        if no_soundex:
             conditions = [
                 tb.c.t_soundex.is_(None),
-                tb.c.primaryTitle == search_title,
+                tb.c.primaryTitle == bindparam('search_title'),
             ]
         else:
-            conditions = [tb.c.t_soundex == soundex]
+            conditions = [tb.c.t_soundex == bindparam('soundex')]
+        if with_lengths and 't_length' in tb.c:
+            conditions.append(tb.c.t_length.between(
+                bindparam('shortest'), bindparam('longest'),
+            ))
         filters = []
-        if year is not None:
-            filters.append(tb.c.startYear == year)
+        if with_year:
+            filters.append(tb.c.startYear == bindparam('year'))
         kind_column = tb.c.get('titleType')
         if kind_column is None:
             kind_column = tb.c.get('kind')
@@ -137,42 +802,151 @@ class SQLAlchemyAdapter:
         adult_column = tb.c.get('isAdult')
         if adult_column is None:
             adult_column = tb.c.get('adult')
-        if adult is not None and adult_column is not None:
-            filters.append(adult_column == bool(adult))
-        if title_types and kind_column is not None:
-            filters.append(kind_column.in_(title_types))
-        title_statement = sqlalchemy.select(tb).where(
-            sqlalchemy.and_(*(conditions + filters))
-        )
-        if soundex is None:
-            title_statement = title_statement.limit(NO_SOUNDEX_TITLE_LIMIT)
-        if soundex is not None or \
-                self._column_is_indexed('title_basics', 'primaryTitle'):
-            title_rows = self._fetchall(title_statement)
-        else:
-            title_rows = []
+        if with_adult and adult_column is not None:
+            filters.append(adult_column == bindparam('adult'))
+        if with_title_types and kind_column is not None:
+            filters.append(
+                kind_column.in_(bindparam('title_types', expanding=True))
+            )
+        order = []
+        # Only a limit makes the order of the rows matter.
+        if year_first and (no_soundex or ranked):
+            order.append(sqlalchemy.case(
+                (tb.c.startYear == bindparam('year_first'), 0), else_=1,
+            ))
+        if by_votes:
+            order += [tr.c.numVotes.is_(None), tr.c.numVotes.desc()]
+        title_statement = None
+        if not no_soundex or \
+                catalog.is_indexed('title_basics', 'primaryTitle'):
+            title_statement = sqlalchemy.select(tb)
+            if by_votes:
+                title_statement = title_statement.outerjoin(
+                    tr, tr.c.tconst == tb.c.tconst
+                )
+            if order:
+                title_statement = title_statement.order_by(
+                    *(order + [tb.c.tconst])
+                )
+            title_statement = title_statement.where(
+                sqlalchemy.and_(*(conditions + filters))
+            )
+            if no_soundex:
+                title_statement = title_statement.limit(
+                    NO_SOUNDEX_TITLE_LIMIT
+                )
+            elif ranked:
+                title_statement = title_statement.limit(
+                    bindparam('candidates')
+                )
+            if ranked and catalog.is_indexed('title_basics', 'primaryTitle'):
+                title_statement = sqlalchemy.union(
+                    sqlalchemy.select(title_statement.subquery()),
+                    sqlalchemy.select(tb).where(sqlalchemy.and_(
+                        tb.c.primaryTitle == bindparam('search_title'),
+                        *filters
+                    )),
+                )
 
-        ta = self.tables['title_akas']
-        if soundex is None:
+        if no_soundex:
             aka_conditions = [
                 ta.c.t_soundex.is_(None),
-                ta.c.title == search_title,
+                ta.c.title == bindparam('search_title'),
             ]
         else:
-            aka_conditions = [ta.c.t_soundex == soundex]
-        statement = sqlalchemy.select(ta)
-        if filters:
-            statement = statement.join(tb, ta.c.titleId == tb.c.tconst)
-        statement = statement.where(
-            sqlalchemy.and_(*(aka_conditions + filters))
+            aka_conditions = [ta.c.t_soundex == bindparam('soundex')]
+        if with_lengths and 't_length' in ta.c:
+            aka_conditions.append(ta.c.t_length.between(
+                bindparam('shortest'), bindparam('longest'),
+            ))
+        aka_statement = None
+        if not no_soundex or catalog.is_indexed('title_akas', 'title'):
+            aka_statement = sqlalchemy.select(ta)
+            if year_first:
+                aka_statement = aka_statement.add_columns(
+                    tb.c.startYear.label('startYear')
+                )
+            if filters:
+                aka_statement = aka_statement.join(
+                    tb, ta.c.titleId == tb.c.tconst
+                )
+            elif year_first:
+                aka_statement = aka_statement.outerjoin(
+                    tb, ta.c.titleId == tb.c.tconst
+                )
+            if by_votes:
+                aka_statement = aka_statement.outerjoin(
+                    tr, tr.c.tconst == ta.c.titleId
+                )
+            if order:
+                order.append(ta.c.titleId)
+                if 'ordering' in ta.c:
+                    order.append(ta.c.ordering)
+                aka_statement = aka_statement.order_by(*order)
+            aka_statement = aka_statement.where(
+                sqlalchemy.and_(*(aka_conditions + filters))
+            )
+            if no_soundex:
+                aka_statement = aka_statement.limit(NO_SOUNDEX_TITLE_LIMIT)
+            elif ranked:
+                aka_statement = aka_statement.limit(bindparam('candidates'))
+            if ranked and catalog.is_indexed('title_akas', 'title'):
+                exact_statement = sqlalchemy.select(ta)
+                if year_first:
+                    exact_statement = exact_statement.add_columns(
+                        tb.c.startYear.label('startYear')
+                    )
+                if filters:
+                    exact_statement = exact_statement.join(
+                        tb, ta.c.titleId == tb.c.tconst
+                    )
+                elif year_first:
+                    exact_statement = exact_statement.outerjoin(
+                        tb, ta.c.titleId == tb.c.tconst
+                    )
+                aka_statement = sqlalchemy.union(
+                    sqlalchemy.select(aka_statement.subquery()),
+                    exact_statement.where(sqlalchemy.and_(
+                        ta.c.title == bindparam('search_title'), *filters
+                    )),
+                )
+        return title_statement, aka_statement
+
+    def search_titles(self, soundex, search_title, year=None, episodes=False,
+                      adult=None, title_types=None, lengths=None,
+                      limit=None, year_first=None):
+        """Return the (title, aka) rows of a search, as
+        SQLiteAdapter.search_titles does."""
+        shape = (
+            soundex is None, year is not None, bool(episodes),
+            adult is not None, bool(title_types), lengths is not None,
+            limit is not None, year_first is not None,
         )
-        if soundex is None:
-            statement = statement.limit(NO_SOUNDEX_TITLE_LIMIT)
-        if soundex is not None or \
-                self._column_is_indexed('title_akas', 'title'):
-            aka_rows = self._fetchall(statement)
-        else:
-            aka_rows = []
+        title_statement, aka_statement = self.catalog().statement(
+            ('search_titles',) + shape,
+            lambda: self._search_titles_statements(*shape),
+        )
+        parameters = {'search_title': search_title}
+        if soundex is not None:
+            parameters['soundex'] = soundex
+        if year is not None:
+            parameters['year'] = year
+        if adult is not None:
+            parameters['adult'] = bool(adult)
+        if title_types:
+            parameters['title_types'] = list(title_types)
+        if lengths is not None:
+            parameters['shortest'], parameters['longest'] = lengths
+        if limit is not None:
+            parameters['candidates'] = limit
+        if year_first is not None:
+            parameters['year_first'] = year_first
+        title_rows = []
+        if title_statement is not None:
+            title_rows = self._fetchall(title_statement, parameters)
+        aka_rows = []
+        if aka_statement is not None:
+            aka_rows = self._fetchall(aka_statement, parameters)
         return title_rows, aka_rows
 
     def search_people(self, soundexes):
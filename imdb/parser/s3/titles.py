@@ -0,0 +1,159 @@
+# Copyright 2026 Davide Alberani <da@mimante.net>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+
+"""In-memory index of the rating, votes, year and kind of every title.
+
+The columns are loaded once into parallel arrays, sorted by movieID, and
+read with a binary search, never touching the database; a title takes 13
+bytes: its movieID and votes (32-bit integers), its rating multiplied by
+ten and its year (16-bit integers) and the code of its kind (a byte).
+
+A dense table with a slot for every possible movieID would avoid the
+search, but IMDb's IDs are sparse: a table of the position of the first
+title of every bucket of 16 consecutive IDs narrows each search to a few
+titles, for less than a byte per title.
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+
+# Range of movieIDs read by every query while loading the index.
+DEFAULT_INDEX_STEP = 50000
+# Bits of the movieIDs dropped to get their bucket.
+BUCKET_BITS = 4
+
+
+def _buckets(movie_ids):
+    """Return the position in the sorted movie_ids of the first ID of
+    every bucket, plus a final one past the end."""
+    buckets = array('I')
+    if not movie_ids:
+        return buckets
+    position = 0
+    size = len(movie_ids)
+    for bucket in range((movie_ids[-1] >> BUCKET_BITS) + 2):
+        while position < size and movie_ids[position] >> BUCKET_BITS < bucket:
+            position += 1
+        buckets.append(position)
+    return buckets
+
+
+class TitleIndex:
+    """A read-only index of the rating, votes, year and kind of titles.
+
+    Build it with from_adapter(); stats() returns its size, its memory
+    footprint and the time it took to load."""
+
+    def __init__(self, movie_ids, ratings, votes, years, kinds, kind_names,
+                 load_seconds=None):
+        self.movie_ids = movie_ids
+        self.ratings = ratings
+        self.votes = votes
+        self.years = years
+        self.kinds = kinds
+        self.kind_names = kind_names
+        self.buckets = _buckets(movie_ids)
+        self.load_seconds = load_seconds
+        self.generation = None
+
+    @classmethod
+    def from_adapter(cls, adapter, step=DEFAULT_INDEX_STEP):
+        """Load the titles through a database adapter; every query reads
+        the titles of step consecutive movieIDs."""
+        started = time.perf_counter()
+        movie_ids = array('I')
+        ratings = array('H')
+        votes = array('I')
+        years = array('H')
+        kinds = array('B')
+        codes = {}
+        low, high = adapter.column_range('title_basics', 'tconst')
+        start = low
+        while low is not None and start <= high:
+            stop = start + step
+            for movieID, kind, year, rating, count in \
+                    adapter.title_summaries(start, stop):
+                if movie_ids and movie_ids[-1] == movieID:
+                    continue
+                movie_ids.append(movieID)
+                ratings.append(round(rating * 10) if rating is not None else 0)
+                votes.append(count or 0)
+                years.append(year or 0)
+                kinds.append(codes.setdefault(kind, len(codes)))
+            start = stop
+        kind_names = sorted(codes, key=codes.get)
+        return cls(movie_ids, ratings, votes, years, kinds, kind_names,
+                   load_seconds=time.perf_counter() - started)
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def __contains__(self, movieID):
+        return self._find(movieID) is not None
+
+    def stats(self):
+        """Return a dictionary with the number of titles, the bytes used
+        by the arrays and the load time."""
+        arrays = (self.movie_ids, self.ratings, self.votes, self.years,
+                  self.kinds, self.buckets)
+        return {
+            'titles': len(self.movie_ids),
+            'bytes': sum(len(a) * a.itemsize for a in arrays),
+            'load seconds': self.load_seconds,
+        }
+
+    def _find(self, movieID):
+        bucket = movieID >> BUCKET_BITS
+        if bucket < 0 or bucket + 1 >= len(self.buckets):
+            return None
+        index = bisect_left(self.movie_ids, movieID, self.buckets[bucket],
+                            self.buckets[bucket + 1])
+        if index < len(self.movie_ids) and self.movie_ids[index] == movieID:
+            return index
+        return None
+
+    def _info(self, index):
+        info = {'kind': self.kind_names[self.kinds[index]]}
+        if self.ratings[index]:
+            info['rating'] = self.ratings[index] / 10
+            info['votes'] = self.votes[index]
+        if self.years[index]:
+            info['year'] = self.years[index]
+        return info
+
+    def get(self, movieID):
+        """Return a dictionary with the kind and, when known, the rating,
+        votes and year of a title, or None if it is not indexed."""
+        index = self._find(int(movieID))
+        if index is None:
+            return None
+        return self._info(index)
+
+    def get_many(self, movieIDs):
+        """Return a dictionary mapping the indexed movieIDs among the
+        given ones to their information, as get() does."""
+        result = {}
+        find = self._find
+        for movieID in movieIDs:
+            movieID = int(movieID)
+            index = find(movieID)
+            if index is not None:
+                result[movieID] = self._info(index)
+        return result
+
+    def ratings_of(self, movieIDs):
+        """Return the (rating, votes) pairs of the given movieIDs, in the
+        same order; (None, 0) for titles not rated or not indexed."""
+        pairs = []
+        for movieID in movieIDs:
+            index = self._find(int(movieID))
+            if index is None or not self.ratings[index]:
+                pairs.append((None, 0))
+            else:
+                pairs.append((self.ratings[index] / 10, self.votes[index]))
+        return pairs
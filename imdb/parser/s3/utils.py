@@ -18,15 +18,24 @@
 This package provides utilities for the s3 dataset.
 """
 
+import heapq
 import json
 import re
 from difflib import SequenceMatcher
 
-from imdb.utils import _unicodeArticles, canonicalName, canonicalTitle
+from imdb._exceptions import IMDbError
+from imdb.utils import (
+    _unicodeArticles,
+    canonicalName,
+    canonicalTitle,
+    spArticles,
+)
 
 SOUNDEX_LENGTH = 5
 RO_THRESHOLD = 0.6
 STRING_MAXLENDIFFER = 0.7
+# Candidates scored at a time, when only the best results are wanted.
+SCAN_CHUNK = 256
 re_imdbids = re.compile(r'(nm|tt)')
 
 
@@ -101,7 +110,9 @@ DB_TRANSFORM = {
         'endYear': {'type': 'integer', 'transform': transf_int},
         'runtimeMinutes': {'type': 'integer', 'transform': transf_int,
                            'rename': 'runtimes', 'index': True},
-        't_soundex': {'type': 'string', 'length': 5, 'index': True}
+        't_soundex': {'type': 'string', 'length': 5, 'index': True},
+        # Not in the dataset: the length of primaryTitle, see title_length.
+        't_length': {'type': 'integer'}
     },
     'name_basics': {
         'nconst': {'type': 'integer', 'transform': transf_imdbid,
@@ -128,7 +139,8 @@ DB_TRANSFORM = {
         'attributes': {'type': 'string', 'length': 127},
         'isOriginalTitle': {'type': 'boolean', 'transform': transf_bool,
                             'rename': 'original', 'index': True},
-        't_soundex': {'type': 'string', 'length': 5, 'index': True}
+        't_soundex': {'type': 'string', 'length': 5, 'index': True},
+        't_length': {'type': 'integer'}
     },
     'title_crew': {
         'tconst': {'type': 'integer', 'transform': transf_imdbid,
@@ -162,10 +174,54 @@ DB_TRANSFORM = {
         'averageRating': {'type': 'float', 'transform': transf_float,
                           'rename': 'rating', 'index': True},
         'numVotes': {'type': 'integer', 'transform': transf_int,
-                     'rename': 'votes', 'index': True}
+                     'rename': 'votes', 'index': True},
+        # Not in the dataset: computed by the importer, see weighted_rating.
+        'weightedRating': {'type': 'float', 'rename': 'weighted rating'}
     }
 }
 
+# Votes given to the mean rating by weighted_rating, by default.
+DEFAULT_WEIGHT_VOTES = 25000
+
+
+def weighted_rating(rating, votes, mean, weight_votes=DEFAULT_WEIGHT_VOTES):
+    """Return the Bayesian weighted rating of a title: its rating, pulled
+    towards the mean rating of all titles as if weight_votes more votes
+    were given to it (v / (v + m) * R + m / (v + m) * C)."""
+    return (votes * rating + weight_votes * mean) / (votes + weight_votes)
+
+
+# Indexes on more than one column, by table, named ix_<table>_<columns>;
+# most cover the (sort column, tconst) keyset pagination of the searches.
+DB_INDEXES = {
+    # Cover the soundex searches, within a window of title lengths.
+    'title_basics': [('t_soundex', 't_length')],
+    'title_akas': [('t_soundex', 't_length')],
+    # Covers the person side of the credit graph.
+    'title_principals': [('nconst', 'tconst')],
+    # Covers the seasons and the pages of episodes of a series.
+    'title_episode': [
+        ('parentTconst', 'seasonNumber', 'episodeNumber', 'tconst'),
+    ],
+    'title_ratings': [
+        ('numVotes', 'tconst'), ('averageRating', 'tconst'),
+        # Covers the charts of get_top_titles.
+        ('weightedRating', 'tconst', 'averageRating', 'numVotes'),
+    ],
+}
+
+
+# The optional table of collaborators built by the importer: for every
+# pair of people credited in title_principals on the same titles, the
+# number of those titles.
+COLLABORATORS_TABLE = 'name_collaborators'
+COLLABORATORS_INDEX = ('nconst', 'titles', 'collaborator')
+
+
+def index_name(table, columns):
+    """Return the name of the index of the given columns of a table."""
+    return 'ix_%s_%s' % (table, '_'.join(columns))
+
 
 _translate = dict(B='1', C='2', D='3', F='1', G='2', J='2', K='2', L='4',
                     M='5', N='5', P='1', Q='2', R='6', S='2', T='3', V='1',
@@ -259,7 +315,146 @@ def ratcliff(s1, s2, sm):
     return sm.ratio()
 
 
-def scan_names(name_list, name, results=0, ro_threshold=RO_THRESHOLD):
+class DifflibScorer:
+    """Ratcliff-Obershelp similarity, computed by difflib.SequenceMatcher.
+
+    This is the default scorer, returning the same scores as ratcliff.
+    Before running the full comparison, a candidate is compared with the
+    characters of the query, regardless of their order: this gives an
+    upper bound of its score, as SequenceMatcher.quick_ratio does, and
+    the candidates whose bound is lower than the cutoff score 0.0."""
+
+    name = 'difflib'
+
+    def scores(self, query, candidates, cutoff=0.0):
+        """Return the similarity (0.0-1.0) of query to every candidate."""
+        sm = SequenceMatcher()
+        sm.set_seq1(query)
+        query_counts = {}
+        for char in query:
+            query_counts[char] = query_counts.get(char, 0) + 1
+        query_length = len(query)
+        scores = []
+        for candidate in candidates:
+            available = dict(query_counts)
+            matches = 0
+            for char in candidate:
+                if available.get(char, 0) > 0:
+                    available[char] -= 1
+                    matches += 1
+            length = query_length + len(candidate)
+            if not length or 2.0 * matches / length < cutoff:
+                scores.append(0.0)
+                continue
+            sm.set_seq2(candidate)
+            scores.append(sm.ratio())
+        return scores
+
+
+class RapidfuzzScorer:
+    """Indel similarity, computed by the optional rapidfuzz package.
+
+    It is the share of the characters of the two strings in their longest
+    common subsequence: never lower than the difflib score, and equal to
+    it for almost every pair of similar titles or names; it may be higher
+    when difflib's search for the longest common blocks misses some
+    matching characters."""
+
+    name = 'rapidfuzz'
+
+    def __init__(self):
+        try:
+            from rapidfuzz.distance import Indel
+        except ImportError as exc:
+            raise IMDbError(
+                'the rapidfuzz scorer requires the rapidfuzz package'
+            ) from exc
+        self._similarity = Indel.normalized_similarity
+
+    def scores(self, query, candidates, cutoff=0.0):
+        """Return the similarity (0.0-1.0) of query to every candidate;
+        scores lower than cutoff are returned as 0.0."""
+        similarity = self._similarity
+        return [similarity(query, candidate, score_cutoff=cutoff)
+                for candidate in candidates]
+
+
+# Scorers of the similarity of titles and names, by name.
+SCORERS = {
+    DifflibScorer.name: DifflibScorer,
+    RapidfuzzScorer.name: RapidfuzzScorer,
+}
+
+
+def get_scorer(scorer=None):
+    """Return a scorer: the one named scorer in SCORERS, or scorer itself,
+    if it is an object with a scores(query, candidates, cutoff) method;
+    None is the difflib scorer."""
+    if scorer is None:
+        return DifflibScorer()
+    if isinstance(scorer, str):
+        try:
+            return SCORERS[scorer.strip().lower()]()
+        except KeyError:
+            raise IMDbError('unknown scorer %r; expected one of: %s' % (
+                scorer, ', '.join(sorted(SCORERS)))) from None
+    return scorer
+
+
+def _similar_lengths(length, other):
+    """Tell whether strings of these lengths are compared by ratcliff."""
+    if length < other:
+        return float(length) / other >= STRING_MAXLENDIFFER
+    return other and float(other) / length >= STRING_MAXLENDIFFER
+
+
+def _ratios(scorer, query, strings, cutoff, query_length=None, memo=None):
+    """Return the similarity of query to every string, as ratcliff does;
+    only the strings of similar lengths are scored, each of them once,
+    with one call of the scorer.  query_length is the length checked, if
+    not the query's.
+
+    memo maps the strings scored by previous calls, with the same query
+    and no higher cutoff, to their scores; it is updated."""
+    if query_length is None:
+        query_length = len(query)
+    if memo is None:
+        memo = {}
+    lowered = [string.lower() if _similar_lengths(query_length, len(string))
+               else None for string in strings]
+    missing = list(dict.fromkeys(string for string in lowered
+                                 if string is not None and string not in memo))
+    memo.update(zip(missing, scorer.scores(query.lower(), missing,
+                                           max(cutoff, 0.0))))
+    return [0.0 if string is None else memo[string] for string in lowered]
+
+
+def _chunks(items, results):
+    """Return the slices of items scored at a time: all of them, or
+    chunks of SCAN_CHUNK if only the best results are wanted."""
+    size = SCAN_CHUNK if results > 0 else max(len(items), 1)
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _raise_cutoff(resd, results, cutoff):
+    """Return the lowest score still able to enter the best results,
+    given the best score of every candidate found so far in resd."""
+    if 0 < results <= len(resd):
+        worst = heapq.nlargest(results, [item[0] for item in resd.values()])
+        return max(cutoff, worst[-1])
+    return cutoff
+
+
+def _best(items, results, key=None):
+    """Return the items sorted by key, from the highest; only the best
+    results, selected with a heap, if results is not 0."""
+    if results > 0:
+        return heapq.nlargest(results, items, key=key)
+    return sorted(items, key=key, reverse=True)
+
+
+def scan_names(name_list, name, results=0, ro_threshold=RO_THRESHOLD,
+               scorer=None):
     """Scan a list of names, searching for best matches against some variations.
 
     :param name_list: list of (personID, {person_data}) tuples
@@ -270,47 +465,93 @@ def scan_names(name_list, name, results=0, ro_threshold=RO_THRESHOLD):
     :type results: int
     :param ro_threshold: ignore results with a score lower than this value
     :type ro_threshold: float
+    :param scorer: scorer of the similarity, see get_scorer
     :returns: list of results sorted by similarity
     :rtype: list"""
+    scorer = get_scorer(scorer)
     canonical_name = canonicalName(name).replace(',', '')
-    sm1 = SequenceMatcher()
-    sm2 = SequenceMatcher()
-    sm1.set_seq1(name.lower())
-    sm2.set_seq1(canonical_name.lower())
     exact_name = name.strip().lower()
     exact_canonical_name = canonical_name.strip().lower()
     resd = {}
-    for i, n_data in name_list:
-        nil = n_data['name']
+    # The lowest score of a result: the threshold, raised to the score of
+    # the worst of the best results found so far.
+    cutoff = ro_threshold
+    first_memo = {}
+    second_memo = {}
+    for chunk in _chunks(name_list, results):
+        names = [n_data['name'] for _i, n_data in chunk]
+        # Below these cutoffs a ratio cannot reach the threshold; they are a
+        # little lower, so that the sums are never rounded below it.
+        first = _ratios(scorer, name, names, cutoff - 0.1 - 1e-9,
+                        memo=first_memo)
         # Distance with the canonical name.
-        ratios = [ratcliff(name, nil, sm1) + 0.1,
-                  ratcliff(name, canonicalName(nil).replace(',', ''), sm2)]
-        ratio = max(ratios)
-        if exact_name == nil.lower() or exact_canonical_name == nil.lower():
-            ratio = max(ratio, 2.0)
-        if ratio >= ro_threshold:
-            if i in resd:
-                if ratio > resd[i][0]:
+        second = _ratios(
+            scorer, canonical_name,
+            [canonicalName(nil).replace(',', '') for nil in names],
+            cutoff - 1e-9, query_length=len(name), memo=second_memo,
+        )
+        for (i, n_data), first_ratio, second_ratio in zip(chunk, first,
+                                                          second):
+            nil = n_data['name']
+            ratio = max(first_ratio + 0.1, second_ratio)
+            if exact_name == nil.lower() or \
+                    exact_canonical_name == nil.lower():
+                ratio = max(ratio, 2.0)
+            if ratio >= cutoff:
+                if i in resd:
+                    if ratio > resd[i][0]:
+                        resd[i] = (ratio, (i, n_data))
+                else:
                     resd[i] = (ratio, (i, n_data))
-            else:
-                resd[i] = (ratio, (i, n_data))
-    res = list(resd.values())
-    res.sort()
-    res.reverse()
-    if results > 0:
-        res[:] = res[:results]
-    return res
+        cutoff = _raise_cutoff(resd, results, cutoff)
+    return _best(resd.values(), results)
+
+
+# The leading articles moved to the end of a title by canonicalTitle.
+_leading_articles = tuple(spArticles[True])
 
 
 def strip_article(title):
-    no_article_title = canonicalTitle(title)
+    # canonicalTitle changes only the titles starting with an article.
+    if title.lower().startswith(_leading_articles):
+        no_article_title = canonicalTitle(title)
+    else:
+        no_article_title = title
     t2s = no_article_title.split(', ')
     if t2s[-1].lower() in _unicodeArticles:
         no_article_title = ', '.join(t2s[:-1])
     return no_article_title
 
 
-def scan_titles(titles_list, title, results=0, ro_threshold=RO_THRESHOLD):
+# Characters an article adds to a title: the article and a space.
+MAX_ARTICLE_LENGTH = max(len(article) for article in _unicodeArticles) + 1
+
+
+def title_length(title):
+    """Return the length of a title, stored by the importer to bound the
+    candidates of a search; None for a missing title."""
+    if not title:
+        return None
+    return len(title)
+
+
+def title_length_window(title):
+    """Return the (shortest, longest) lengths of the titles that
+    scan_titles could match with the given one.
+
+    ratcliff scores 0.0 the titles whose lengths differ by more than
+    STRING_MAXLENDIFFER, both with and without their articles; the window
+    is rounded outwards, so no matching title is left out."""
+    length = len(title)
+    no_article_length = len(strip_article(title))
+    longest = max(length / STRING_MAXLENDIFFER,
+                  no_article_length / STRING_MAXLENDIFFER + MAX_ARTICLE_LENGTH)
+    return (int(min(length, no_article_length) * STRING_MAXLENDIFFER),
+            int(longest) + 1)
+
+
+def scan_titles(titles_list, title, results=0, ro_threshold=RO_THRESHOLD,
+                scorer=None):
     """Scan a list of titles, searching for best matches amongst some variations.
 
     :param titles_list: list of (movieID, {movie_data}) tuples
@@ -321,13 +562,11 @@ def scan_titles(titles_list, title, results=0, ro_threshold=RO_THRESHOLD):
     :type results: int
     :param ro_threshold: ignore results with a score lower than this value
     :type ro_threshold: float
+    :param scorer: scorer of the similarity, see get_scorer
     :returns: list of results sorted by similarity
     :rtype: list"""
+    scorer = get_scorer(scorer)
     no_article_title = strip_article(title)
-    sm1 = SequenceMatcher()
-    sm1.set_seq1(title.lower())
-    sm2 = SequenceMatcher()
-    sm2.set_seq1(no_article_title.lower())
     resd = {}
 
     kind_scores = {
@@ -350,21 +589,28 @@ def scan_titles(titles_list, title, results=0, ro_threshold=RO_THRESHOLD):
             1 if year not in (None, '', 'None') else 0,
         )
 
-    for i, t_data in titles_list:
-        til = t_data['title']
-        ratios = [ratcliff(title, til, sm1) + 0.1,
-                  ratcliff(no_article_title, strip_article(til), sm2)]
-        ratio = max(ratios)
-        if t_data.get('kind') == 'episode':
-            ratio -= .2
-        if ratio >= ro_threshold:
-            if i in resd:
-                if ratio > resd[i][0]:
+    # As in scan_names, the cutoff rises while the best results are found.
+    cutoff = ro_threshold
+    first_memo = {}
+    second_memo = {}
+    for chunk in _chunks(titles_list, results):
+        titles = [t_data['title'] for _i, t_data in chunk]
+        first = _ratios(scorer, title, titles, cutoff - 0.1 - 1e-9,
+                        memo=first_memo)
+        second = _ratios(scorer, no_article_title,
+                         [strip_article(til) for til in titles],
+                         cutoff - 1e-9, memo=second_memo)
+        for (i, t_data), first_ratio, second_ratio in zip(chunk, first,
+                                                          second):
+            ratio = max(first_ratio + 0.1, second_ratio)
+            if t_data.get('kind') == 'episode':
+                ratio -= .2
+            if ratio >= cutoff:
+                if i in resd:
+                    if ratio > resd[i][0]:
+                        resd[i] = (ratio, (i, t_data))
+                else:
                     resd[i] = (ratio, (i, t_data))
-            else:
-                resd[i] = (ratio, (i, t_data))
-    res = list(resd.values())
-    res.sort(key=lambda item: (item[0],) + _sort_score(item[1][1]), reverse=True)
-    if results > 0:
-        res[:] = res[:results]
-    return res
+        cutoff = _raise_cutoff(resd, results, cutoff)
+    return _best(resd.values(), results,
+                 key=lambda item: (item[0],) + _sort_score(item[1][1]))
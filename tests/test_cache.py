@@ -0,0 +1,83 @@
+import pytest
+
+from imdb._cache import LRUCache, TinyLFUCache, cache_size_option, make_cache
+from imdb._exceptions import IMDbError
+
+
+def test_lru_cache_evicts_least_recently_used_entries():
+    cache = LRUCache(30, sizeof=lambda value: 10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('c', 3)
+    assert cache.get('a') == 1
+    cache.set('d', 4)
+
+    assert 'b' not in cache
+    assert [cache.get(key) for key in 'acd'] == [1, 3, 4]
+    assert cache.get('b') is None
+    assert cache.stats() == {
+        'hits': 4, 'misses': 1, 'evictions': 1, 'rejections': 0,
+        'entries': 3, 'bytes': 30, 'max bytes': 30,
+    }
+
+
+def test_lru_cache_skips_values_larger_than_its_budget():
+    cache = LRUCache(100)
+    cache.set('small', 'x')
+    cache.set('large', 'x' * 1000)
+
+    assert 'small' in cache
+    assert 'large' not in cache
+    assert cache.current_bytes <= 100
+
+
+@pytest.mark.parametrize('value,expected', [
+    (None, 0), ('', 0), ('2048', 2048), (4096, 4096),
+])
+def test_cache_size_option(value, expected):
+    assert cache_size_option('size', value) == expected
+
+
+@pytest.mark.parametrize('value', [True, -1, 'big'])
+def test_cache_size_option_rejects_invalid_values(value):
+    with pytest.raises(IMDbError):
+        cache_size_option('size', value)
+
+
+def test_tinylfu_cache_keeps_popular_entries():
+    cache = make_cache(30, policy='TinyLFU')
+    cache._sizeof = lambda value: 10
+    for key in 'abc':
+        cache.set(key, key)
+        for _ in range(3):
+            cache.get(key)
+    for key in 'xyz':
+        cache.get(key)
+        cache.set(key, key)
+
+    assert isinstance(cache, TinyLFUCache)
+    assert sorted(cache._entries) == ['a', 'b', 'c']
+    assert cache.stats()['rejections'] == 3
+
+    for _ in range(5):
+        cache.get('w')
+    cache.set('w', 'w')
+    assert 'w' in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_make_cache_accepts_callables_and_rejects_unknown_policies():
+    assert isinstance(make_cache(10, policy=LRUCache), LRUCache)
+    with pytest.raises(IMDbError):
+        make_cache(10, policy='random')
+
+
+def test_check_generation_drops_stale_entries():
+    cache = LRUCache(100)
+    cache.check_generation(1)
+    cache.set('a', 'x', generation=1)
+    cache.check_generation(2)
+    cache.set('b', 'x', generation=1)
+
+    assert len(cache) == 0
+    assert cache.current_bytes == 0
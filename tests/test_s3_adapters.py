@@ -0,0 +1,922 @@
+import pytest
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from importlib.util import find_spec
+from pathlib import Path
+
+from imdb import Cinemagoer
+from imdb._exceptions import IMDbError
+
+partial_db = Path(__file__).with_name('partial.db').resolve()
+
+SCHEMA = '''
+    CREATE TABLE title_basics (
+        tconst INTEGER, titleType TEXT, primaryTitle TEXT,
+        originalTitle TEXT, isAdult INTEGER, startYear INTEGER,
+        endYear INTEGER, runtimeMinutes INTEGER, genres TEXT, t_soundex TEXT
+    );
+    CREATE TABLE name_basics (
+        nconst INTEGER, primaryName TEXT, birthYear INTEGER,
+        deathYear INTEGER, primaryProfession TEXT, knownForTitles TEXT,
+        ns_soundex TEXT, sn_soundex TEXT, s_soundex TEXT
+    );
+    CREATE TABLE title_principals (
+        tconst INTEGER, ordering INTEGER, nconst INTEGER, category TEXT,
+        job TEXT, characters TEXT
+    );
+    CREATE TABLE title_crew (tconst INTEGER, directors TEXT, writers TEXT);
+    CREATE TABLE title_episode (
+        tconst INTEGER, parentTconst INTEGER, seasonNumber INTEGER,
+        episodeNumber INTEGER
+    );
+    CREATE TABLE title_ratings (
+        tconst INTEGER, averageRating REAL, numVotes INTEGER
+    );
+    CREATE TABLE title_akas (
+        titleId INTEGER, ordering INTEGER, title TEXT, region TEXT,
+        language TEXT, types TEXT, attributes TEXT, isOriginalTitle INTEGER,
+        t_soundex TEXT
+    );
+'''
+
+
+def _build_database(path, movies):
+    """Create a database with *movies* titles 1..movies, where title N has
+    N cast members, each known for the first four titles."""
+    with closing(sqlite3.connect(path)) as connection, connection:
+        connection.executescript(SCHEMA)
+        for movie_id in range(1, movies + 1):
+            connection.execute(
+                'INSERT INTO title_basics VALUES '
+                "(?, 'movie', ?, ?, 0, ?, NULL, 90, 'Drama,Comedy', NULL)",
+                (movie_id, 'Movie %d' % movie_id, 'Movie %d' % movie_id,
+                 1990 + movie_id),
+            )
+            connection.execute(
+                'INSERT INTO title_ratings VALUES (?, ?, ?)',
+                (movie_id, 5 + movie_id / 10, 100 * movie_id),
+            )
+            connection.execute(
+                "INSERT INTO title_akas VALUES (?, 1, ?, 'IT', 'it', NULL, "
+                'NULL, 0, NULL)',
+                (movie_id, 'Film %d' % movie_id),
+            )
+            director_id = 1000 + movie_id
+            connection.execute(
+                'INSERT INTO title_crew VALUES (?, ?, ?)',
+                (movie_id, str(director_id), '%d,1' % director_id),
+            )
+            for ordering in range(1, movie_id + 1):
+                connection.execute(
+                    "INSERT INTO title_principals VALUES "
+                    "(?, ?, ?, 'actor', NULL, 'Role')",
+                    (movie_id, movie_id + 1 - ordering, ordering),
+                )
+        known_for = ','.join(str(i) for i in range(1, min(movies, 4) + 1))
+        for person_id in list(range(1, movies + 1)) + \
+                [1000 + i for i in range(1, movies + 1)]:
+            connection.execute(
+                'INSERT INTO name_basics (nconst, primaryName, '
+                'knownForTitles) VALUES (?, ?, ?)',
+                (person_id, 'Person %d' % person_id, known_for),
+            )
+    return path
+
+
+def _record_queries(monkeypatch, adapter):
+    queries = []
+    original_fetchall = adapter._fetchall
+
+    def recording_fetchall(statement, *args, **kwargs):
+        queries.append(str(statement))
+        return original_fetchall(statement, *args, **kwargs)
+
+    monkeypatch.setattr(adapter, '_fetchall', recording_fetchall)
+    return queries
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_schema_catalog_is_loaded_once_per_generation(monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    with Cinemagoer('s3', uri=f'{scheme}:///{partial_db}') as ia:
+        ia.search_movie('Miss Jerry')
+        ia.get_movie('989125', info=['episodes'])
+        queries = _record_queries(monkeypatch, ia._adapter)
+
+        assert ia.search_movie('Miss Jerry')[0].movieID == 9
+        series = ia.get_movie('989125', info=['episodes'])
+
+    assert series['number of episodes'] == 13
+    assert queries
+    assert not [query for query in queries
+                if 'PRAGMA' in query or 'sqlite_master' in query]
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_schema_catalog_reloads_when_the_database_is_rebuilt(tmp_path,
+                                                             scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = tmp_path / 'rebuilt.db'
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.execute('CREATE TABLE title_basics (tconst INTEGER)')
+
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        adapter = ia._adapter
+        catalog = adapter.catalog()
+        assert adapter.catalog() is catalog
+        assert adapter.column_names('title_basics') == {'tconst'}
+        assert not adapter._column_is_indexed('title_basics', 'tconst')
+
+        with closing(sqlite3.connect(database)) as connection, connection:
+            connection.execute(
+                'ALTER TABLE title_basics ADD COLUMN primaryTitle TEXT'
+            )
+            connection.execute(
+                'CREATE INDEX ix_title ON title_basics (primaryTitle)'
+            )
+        stat = database.stat()
+        os.utime(database, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert adapter.catalog() is not catalog
+        assert adapter.column_names('title_basics') == {
+            'tconst', 'primaryTitle',
+        }
+        assert adapter._column_is_indexed('title_basics', 'primaryTitle')
+
+
+def test_private_in_memory_catalog_changes_only_with_its_generation(
+        monkeypatch):
+    with Cinemagoer('s3', uri='sqlite://') as ia:
+        adapter = ia._adapter
+        adapter.connection.execute('CREATE TABLE title_basics (tconst INTEGER)')
+        catalog = adapter.catalog()
+        queries = _record_queries(monkeypatch, adapter)
+        assert adapter.catalog() is catalog
+        assert adapter.column_names('title_basics') == {'tconst'}
+        assert queries == []
+
+        adapter.connection.execute(
+            'ALTER TABLE title_basics ADD COLUMN primaryTitle TEXT'
+        )
+        adapter.bump_generation()
+
+        assert adapter.catalog() is not catalog
+        assert adapter.column_names('title_basics') == {
+            'tconst', 'primaryTitle',
+        }
+        assert not [query for query in queries if 'PRAGMA' in query]
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_get_movie_main_uses_a_constant_number_of_queries(
+        tmp_path, monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'cast.db', 12)
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        small = ia.get_movie('2')
+        small_count = len(queries)
+        del queries[:]
+        large = ia.get_movie('12')
+        large_count = len(queries)
+
+    assert len(small['cast']) == 2
+    assert [person['name'] for person in large['cast']] == [
+        'Person %d' % person_id for person_id in range(12, 0, -1)
+    ]
+    assert [person.billingPos for person in large['cast']] == list(
+        range(1, 13)
+    )
+    assert [movie.movieID for movie in large['cast'][0]['known for']] == [
+        1, 2, 3, 4,
+    ]
+    assert large['cast'][0]['known for'][1]['title'] == 'Movie 2'
+    assert large['director'][0]['name'] == 'Person 1012'
+    assert [person['name'] for person in large['writer']] == [
+        'Person 1012', 'Person 1',
+    ]
+    assert small_count == large_count
+    assert large_count <= 8
+
+
+def test_get_rows_in_splits_large_value_lists(monkeypatch):
+    from imdb.parser.s3 import adapters
+
+    monkeypatch.setattr(adapters, 'IN_QUERY_CHUNK_SIZE', 3)
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as ia:
+        queries = _record_queries(monkeypatch, ia._adapter)
+        rows = ia._adapter.get_rows_in(
+            'title_basics', 'tconst', [1, 2, 3, 4, 5, 5, 999999999]
+        )
+
+    assert sorted(row['tconst'] for row in rows) == [1, 2, 3, 4, 5]
+    assert len(queries) == 2
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_get_movies_and_get_people_match_single_object_retrieval(
+        tmp_path, monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'bulk.db', 30)
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        ia._adapter.catalog()
+        expected = [ia.get_movie(str(movie_id)) for movie_id in (3, 1, 30)]
+        expected_people = [ia.get_person(str(person_id))
+                           for person_id in (1001, 2)]
+        queries = _record_queries(monkeypatch, ia._adapter)
+        movies = ia.get_movies(['3', '1', '30', '999'])
+        movie_queries = len(queries)
+        people = ia.get_people(['1001', '2'])
+
+    assert [movie.movieID for movie in movies] == ['3', '1', '30', '999']
+    for movie, single in zip(movies, expected):
+        assert movie.asXML() == single.asXML()
+        assert movie.current_info == single.current_info
+    assert not movies[3].get('title')
+    assert [person.asXML() for person in people] == [
+        person.asXML() for person in expected_people
+    ]
+    assert movie_queries <= 8
+
+
+def test_get_movies_falls_back_to_single_object_info_sets():
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as ia:
+        series, episode = ia.get_movies(
+            ['989125', '42816'], info=['main', 'episodes']
+        )
+
+    assert series['number of episodes'] == 13
+    assert episode['episode of'].movieID == 989125
+    assert 'episodes' in episode.current_info
+
+
+def test_read_side_pragmas_are_applied():
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}', immutable='on',
+                    mmapSize='1048576', cacheSize='-2048') as ia:
+        adapter = ia._adapter
+        connection = adapter._thread_connection()
+        cache_size = connection.execute('PRAGMA cache_size').fetchone()[0]
+        assert ia.search_movie('Miss Jerry')[0].movieID == 9
+
+    assert adapter.immutable
+    assert 'immutable=1' in adapter._database_uri
+    assert adapter.mmap_size == 1048576
+    assert cache_size == -2048
+
+
+def test_sqlalchemy_read_side_pragmas_are_applied():
+    pytest.importorskip('sqlalchemy')
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}'.replace(
+            'sqlite:', 'sqlite+pysqlite:'), immutable=True,
+            cacheSize=-1024) as ia:
+        with ia._adapter._connection() as connection:
+            cache_size = connection.exec_driver_sql(
+                'PRAGMA cache_size').scalar()
+        assert ia.search_movie('Miss Jerry')[0].movieID == 9
+
+    assert cache_size == -1024
+
+
+@pytest.mark.parametrize('options', [{'mmapSize': 'lots'},
+                                     {'cacheSize': True}])
+def test_invalid_read_side_pragmas_are_rejected(options):
+    from imdb._exceptions import IMDbError
+
+    with pytest.raises(IMDbError):
+        Cinemagoer('s3', uri=f'sqlite:///{partial_db}', **options)
+
+
+def test_in_memory_copy_answers_like_the_file(tmp_path):
+    database = _build_database(tmp_path / 'memory.db', 5)
+    with Cinemagoer('s3', uri=f'sqlite:///{database}') as ia:
+        expected = ia.get_movie('3')
+        expected_search = ia.search_movie('Movie 2')
+    with Cinemagoer('s3', uri=f'sqlite:///{database}', inMemory='on') as ia:
+        stats = ia.memory_stats()
+        adapter = ia._adapter
+        os.remove(database)
+        movie = ia.get_movie('3')
+        search = ia.search_movie('Movie 2')
+        thread = threading.Thread(target=lambda: found.append(
+            ia.get_movie('2', info=['ratings'])['rating']))
+        found = []
+        thread.start()
+        thread.join()
+
+    assert movie.data == expected.data
+    assert [m.movieID for m in search] == [m.movieID for m in expected_search]
+    assert found == [5.2]
+    assert 'title_principals' in stats['tables']
+    assert stats['bytes'] > 0
+    assert stats['load seconds'] >= 0
+    with pytest.raises(IMDbError):
+        adapter.get_row('title_basics', 'tconst', 3)
+
+
+def test_in_memory_copy_of_selected_tables(tmp_path):
+    database = _build_database(tmp_path / 'memory.db', 5)
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.execute('CREATE INDEX ix_votes ON title_ratings (numVotes)')
+        connection.execute('CREATE INDEX ix_rating '
+                           'ON title_ratings (averageRating)')
+    with Cinemagoer('s3', uri=f'sqlite:///{database}', inMemory=True,
+                    memoryTables='title_basics, title_ratings',
+                    memoryIndexes=['ix_votes']) as ia:
+        stats = ia.memory_stats()
+        indexes = ia._adapter._fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+        results = ia.search_movie_advanced(sort='votes', sort_dir='desc',
+                                           results=2)
+
+    assert stats['tables'] == ['title_basics', 'title_ratings']
+    assert indexes == [{'name': 'ix_votes'}]
+    assert [movie.movieID for movie in results] == [5, 4]
+
+    with pytest.raises(IMDbError):
+        Cinemagoer('s3', uri=f'sqlite:///{database}', inMemory=True,
+                   memoryTables=['title_basics', 'no_such_table'])
+    with pytest.raises(IMDbError):
+        Cinemagoer('s3', uri='sqlite://', inMemory=True)
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_row_cache_serves_repeated_lookups(tmp_path, monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'cached.db', 6)
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        expected = ia.get_movie('6').asXML()
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}',
+                    rowCacheSize='1048576') as ia:
+        ia._adapter.catalog()
+        first = ia.get_movie('6')
+        first['cast'][0]['name'] = 'Changed'
+        queries = _record_queries(monkeypatch, ia._adapter)
+        second = ia.get_movie('6')
+        director = ia._adapter.get_row('name_basics', 'nconst', 1006)
+        stats = ia.row_cache_stats()
+
+    assert second.asXML() == expected
+    assert director['primaryName'] == 'Person 1006'
+    assert queries == []
+    assert stats['hits'] >= stats['entries'] > 0
+    assert 0 < stats['bytes'] <= stats['max bytes'] == 1048576
+
+
+def test_row_cache_is_dropped_when_the_database_is_rebuilt(tmp_path):
+    database = _build_database(tmp_path / 'rebuilt.db', 2)
+    with Cinemagoer('s3', uri=f'sqlite:///{database}',
+                    rowCacheSize=1 << 20) as ia:
+        assert ia.get_movie('1')['title'] == 'Movie 1'
+        with closing(sqlite3.connect(database)) as connection, connection:
+            connection.execute(
+                "UPDATE title_basics SET primaryTitle = 'New title' "
+                'WHERE tconst = 1'
+            )
+        stat = database.stat()
+        os.utime(database, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert ia.get_movie('1')['title'] == 'New title'
+        ia.clear_cache()
+        assert ia.row_cache_stats()['entries'] == 0
+
+
+def test_row_cache_is_disabled_by_default():
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as ia:
+        assert ia._adapter.row_cache is None
+        assert ia.row_cache_stats() is None
+
+
+@pytest.mark.parametrize('policy', ['lru', 'tinylfu'])
+def test_object_cache_hands_out_copies(tmp_path, monkeypatch, policy):
+    database = _build_database(tmp_path / 'objects.db', 4)
+    with Cinemagoer('s3', uri=f'sqlite:///{database}',
+                    objectCacheSize='1048576',
+                    objectCachePolicy=policy) as ia:
+        movie = ia.get_movie('4')
+        person = ia.get_person('1')
+        expected = movie.asXML()
+        movie['cast'][0]['name'] = 'Changed'
+        movie['title'] = 'Changed'
+        queries = _record_queries(monkeypatch, ia._adapter)
+        cached = ia.get_movie('4')
+        cached_person = ia.get_person('1')
+        stats = ia.object_cache_stats()
+        cached_queries = len(queries)
+        ia.get_movie('4', info=['main', 'episodes'])
+
+    assert cached_queries == 0
+    assert len(queries) > 0
+    assert cached.asXML() == expected
+    assert cached is not movie
+    assert cached.current_info == movie.current_info
+    assert cached_person.asXML() == person.asXML()
+    assert stats['hits'] == 2
+    assert stats['entries'] == 2
+
+
+def test_object_cache_is_dropped_when_the_database_is_rebuilt(tmp_path):
+    database = _build_database(tmp_path / 'rebuilt.db', 2)
+    with Cinemagoer('s3', uri=f'sqlite:///{database}',
+                    objectCacheSize=1 << 20) as ia:
+        assert ia.get_movie('1')['title'] == 'Movie 1'
+        with closing(sqlite3.connect(database)) as connection, connection:
+            connection.execute(
+                "UPDATE title_basics SET primaryTitle = 'New title' "
+                'WHERE tconst = 1'
+            )
+        stat = database.stat()
+        os.utime(database, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert ia.get_movie('1')['title'] == 'New title'
+        ia.clear_cache()
+        assert ia.object_cache_stats()['entries'] == 0
+
+
+def test_result_cache_file_is_shared_between_instances(tmp_path, monkeypatch):
+    database = _build_database(tmp_path / 'shared.db', 4)
+    cache_file = tmp_path / 'results.db'
+    uri = f'sqlite:///{database}'
+    with Cinemagoer('s3', uri=uri, resultCacheFile=str(cache_file)) as ia:
+        expected = ia.get_movie('3').asXML()
+        ia.get_person('2')
+    with Cinemagoer('s3', uri=uri, resultCacheFile=str(cache_file),
+                    objectCacheSize=1 << 20) as ia:
+        queries = _record_queries(monkeypatch, ia._adapter)
+        movie = ia.get_movie('3')
+        ia.get_movie('3')
+        stats = ia.result_cache_stats()
+
+    assert queries == []
+    assert movie.asXML() == expected
+    assert stats == {'hits': 1, 'misses': 0, 'entries': 2}
+
+
+def test_result_cache_file_purges_old_generations(tmp_path):
+    database = _build_database(tmp_path / 'rebuilt.db', 2)
+    cache_file = tmp_path / 'results.db'
+    uri = f'sqlite:///{database}'
+    with Cinemagoer('s3', uri=uri, resultCacheFile=str(cache_file)) as ia:
+        ia.get_movie('1')
+        ia.get_movie('2')
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.execute(
+            "UPDATE title_basics SET primaryTitle = 'New title' "
+            'WHERE tconst = 1'
+        )
+    stat = database.stat()
+    os.utime(database, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    with Cinemagoer('s3', uri=uri, resultCacheFile=str(cache_file)) as ia:
+        assert ia.get_movie('1')['title'] == 'New title'
+        assert ia.result_cache_stats()['entries'] == 1
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='POSIX permissions')
+def test_result_cache_file_is_private_to_its_owner(tmp_path):
+    cache_file = tmp_path / 'results.db'
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}',
+                    resultCacheFile=str(cache_file)):
+        pass
+    assert cache_file.stat().st_mode & 0o777 == 0o600
+
+    cache_file.chmod(0o666)
+    with pytest.raises(IMDbError, match='writable by other users'):
+        Cinemagoer('s3', uri=f'sqlite:///{partial_db}',
+                   resultCacheFile=str(cache_file))
+
+
+def test_result_cache_file_is_skipped_by_private_in_memory_databases(
+        tmp_path):
+    cache_file = tmp_path / 'results.db'
+    with Cinemagoer('s3', uri='sqlite://',
+                    resultCacheFile=str(cache_file)) as ia:
+        ia._adapter.connection.executescript(SCHEMA)
+        ia._adapter.connection.execute(
+            "INSERT INTO title_basics (tconst, titleType, primaryTitle) "
+            "VALUES (1, 'movie', 'Private')"
+        )
+        ia._adapter.bump_generation()
+        assert ia.get_movie('1')['title'] == 'Private'
+        stats = ia.result_cache_stats()
+
+    assert stats == {'hits': 0, 'misses': 0, 'entries': 0}
+    if find_spec('sqlalchemy') is not None:
+        with Cinemagoer('s3', uri='sqlite+pysqlite://') as ia:
+            assert not ia._shares_cache_generation()
+
+
+def test_lazy_references_load_known_for_titles_on_first_use(
+        tmp_path, monkeypatch):
+    import copy
+    import pickle
+
+    from imdb.parser.s3.lazy import LazyList
+
+    database = _build_database(tmp_path / 'lazy.db', 8)
+    uri = f'sqlite:///{database}'
+    with Cinemagoer('s3', uri=uri) as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        expected = ia.get_movie('8').asXML()
+        eager_count = len(queries)
+    with Cinemagoer('s3', uri=uri, lazyReferences=True) as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        movie = ia.get_movie('8')
+        lazy_count = len(queries)
+        names = [person['name'] for person in movie['cast']]
+        known_for = movie['cast'][0]['known for']
+        assert type(known_for) is LazyList
+        assert len(queries) == lazy_count
+        assert [title.movieID for title in known_for] == [1, 2, 3, 4]
+        assert len(queries) == lazy_count + 1
+        assert movie['director'][0]['known for'][3]['title'] == 'Movie 4'
+        assert len(queries) == lazy_count + 1
+        assert movie.asXML() == expected
+
+        other = ia.get_movie('7')
+        copied = copy.deepcopy(other['cast'][0]['known for'])
+        pickled = pickle.loads(pickle.dumps(other['cast'][1]['known for']))
+    assert type(copied) is list
+    assert [title['title'] for title in pickled] == [
+        'Movie 1', 'Movie 2', 'Movie 3', 'Movie 4',
+    ]
+
+    assert names[0] == 'Person 8'
+    assert lazy_count == eager_count - 1
+
+    with Cinemagoer('s3', uri=uri, lazyReferences=True) as ia:
+        closed = ia.get_movie('2')
+    from imdb._exceptions import IMDbDataAccessError
+    with pytest.raises(IMDbDataAccessError):
+        len(closed['cast'][0]['known for'])
+
+
+def test_lazy_references_bypass_the_object_caches(tmp_path, monkeypatch):
+    database = _build_database(tmp_path / 'lazy.db', 4)
+    cache_file = tmp_path / 'results.db'
+    with Cinemagoer('s3', uri=f'sqlite:///{database}', lazyReferences=True,
+                    objectCacheSize=1 << 20,
+                    resultCacheFile=str(cache_file)) as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        movie = ia.get_movie('4')
+        lazy_count = len(queries)
+        again = ia.get_movie('4')
+        object_stats = ia.object_cache_stats()
+        result_stats = ia.result_cache_stats()
+        assert len(queries) == 2 * lazy_count
+        assert [title.movieID
+                for title in again['cast'][0]['known for']] == [1, 2, 3, 4]
+        assert len(queries) == 2 * lazy_count + 1
+        assert movie['cast'][0]['known for']._batch is not None
+
+    assert object_stats['entries'] == 0
+    assert result_stats['entries'] == 0
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_single_table_info_sets_run_one_query(tmp_path, monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    from imdb.Movie import Movie
+
+    database = _build_database(tmp_path / 'infosets.db', 3)
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        movie = Movie(movieID=3, accessSystem='s3')
+        ia.update(movie, info=['ratings'])
+        rating_queries = list(queries)
+        ia.update(movie, info=['akas'])
+        full_credits = ia.get_movie('3', info=['full credits'])
+
+    assert len(rating_queries) == 1
+    assert 'title_ratings' in rating_queries[0]
+    assert movie.current_info == ['ratings', 'akas']
+    assert movie['rating'] == 5.3
+    assert movie['votes'] == 300
+    assert movie['akas'][0]['title'] == 'Film 3'
+    assert 'title' not in movie
+    assert [person['name'] for person in full_credits['cast']] == [
+        'Person 3', 'Person 2', 'Person 1',
+    ]
+    assert full_credits['director'][0]['name'] == 'Person 1003'
+    assert 'rating' not in full_credits and 'akas' not in full_credits
+
+
+def test_fields_project_the_retrieved_data(tmp_path, monkeypatch):
+    database = _build_database(tmp_path / 'fields.db', 3)
+    with Cinemagoer('s3', uri=f'sqlite:///{database}') as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        movies = ia.get_movies(['1', '2'], fields=['title', 'year', 'rating'])
+        movie_queries = list(queries)
+        del queries[:]
+        person = ia.get_person('1', fields=['name'])
+
+    assert [movie.data for movie in movies] == [
+        {'title': 'Movie 1', 'year': '1991', 'rating': 5.1},
+        {'title': 'Movie 2', 'year': '1992', 'rating': 5.2},
+    ]
+    assert len(movie_queries) == 2
+    assert person.data == {'name': 'Person 1'}
+    assert len(queries) == 1
+
+
+def test_projected_info_sets_are_retrieved_again_by_update(tmp_path):
+    database = _build_database(tmp_path / 'fields.db', 3)
+    with Cinemagoer('s3', uri=f'sqlite:///{database}') as ia:
+        movie = ia.get_movie('3', fields=['title'])
+        projected = dict(movie.data)
+        projected_info = list(movie.current_info)
+        ia.update(movie)
+        person = ia.get_person('1', fields=['name'])
+        ia.update(person, info=['main'])
+
+    assert projected == {'title': 'Movie 3'}
+    assert projected_info == []
+    assert [cast['name'] for cast in movie['cast']] == [
+        'Person 3', 'Person 2', 'Person 1',
+    ]
+    assert 'main' in movie.current_info
+    assert 'main' in person.current_info
+
+
+def test_fields_are_projected_for_methods_without_fields(
+        tmp_path, monkeypatch, caplog):
+    database = _build_database(tmp_path / 'fields.db', 3)
+    with Cinemagoer('s3', uri=f'sqlite:///{database}') as ia:
+        monkeypatch.setattr(
+            ia, 'get_movie_trivia', lambda movieID: {
+                'data': {'trivia': ['Trivia %s' % movieID], 'goofs': []},
+            }, raising=False)
+        with caplog.at_level('CRITICAL', logger='imdbpy'):
+            movie = ia.get_movie('1', info=['main', 'trivia', 'unknown'],
+                                 fields=['title', 'trivia'])
+            movies = ia.get_movies(['2'], info=['trivia'],
+                                   fields=['trivia'])
+
+    assert movie.data == {'title': 'Movie 1', 'trivia': ['Trivia 1']}
+    assert movies[0].data == {'trivia': ['Trivia 2']}
+    assert not [record for record in caplog.records
+                if record.levelname == 'CRITICAL']
+
+
+def test_episode_of_info_set():
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as ia:
+        assert 'episode of' in ia.get_movie_infoset()
+        episode = ia.get_movie('42816', info=['episode of'])
+
+    assert episode.current_info == ['episode of']
+    assert episode['episode of'].movieID == 989125
+    assert 'title' not in episode
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_iter_movies_reads_the_table_in_keyset_batches(
+        tmp_path, monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'iter.db', 10)
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.executemany(
+            'UPDATE name_basics SET primaryProfession = ? WHERE nconst = ?',
+            [('actor,director', 1001), ('assistant_director', 1002),
+             ('Director', 1003)])
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        movies = ia.iter_movies(batch_size=4)
+        first = next(movies)
+        assert len(queries) == 1
+        movies = [first] + list(movies)
+        batch_queries = len(queries)
+        recent = list(ia.iter_movies(year_from=1998, year_to=1999,
+                                     kinds=['movie'], batch_size=4))
+        detailed = list(ia.iter_movies(year_from=2000, info=['main']))
+        people = list(ia.iter_people(batch_size=7))
+        directors = list(ia.iter_people(profession='director'))
+
+    assert [movie.movieID for movie in movies] == list(range(1, 11))
+    assert movies[1]['title'] == 'Movie 2'
+    assert 'cast' not in movies[1]
+    assert batch_queries == 3
+    assert [movie['year'] for movie in recent] == ['1998', '1999']
+    assert [movie.movieID for movie in detailed] == [10]
+    assert len(detailed[0]['cast']) == 10
+    assert len(people) == 20
+    assert people[-1]['name'] == 'Person 1010'
+    assert 'known for' not in people[0]
+    assert [person.personID for person in directors] == [1001, 1003]
+
+
+def test_iter_episodes():
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as ia:
+        episodes = list(ia.iter_episodes('989125', batch_size=4))
+        series = ia.get_movie('989125', info=['episodes'])
+
+    expected = sorted(
+        episode.movieID
+        for season in series['episodes'].values()
+        for episode in season.values()
+    )
+    assert [episode.movieID for episode in episodes] == expected
+    assert all(episode['episode of'].movieID == 989125
+               for episode in episodes)
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_search_movie_advanced_filters_and_sorts_in_sql(
+        tmp_path, monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'advanced.db', 10)
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        top = ia.search_movie_advanced(sort='votes', results=3,
+                                       year_from=1993, rating_max=5.95,
+                                       genres=['comedy'])
+        next_page = ia.search_movie_advanced(sort='votes', results=3,
+                                             year_from=1993, rating_max=5.95,
+                                             genres=['comedy'], after=top[-1])
+        by_year = ia.search_movie_advanced(sort='year', sort_dir='desc',
+                                           title_types=['movie'], results=2,
+                                           runtime_min=90, adult=False)
+        none = ia.search_movie_advanced(votes_min=5000)
+        with pytest.raises(IMDbError, match='sort'):
+            ia.search_movie_advanced(sort='popularity')
+
+    assert [movie.movieID for movie in top] == [9, 8, 7]
+    assert top[0]['rating'] == 5.9
+    assert top[0]['votes'] == 900
+    assert top[0]['genres'] == ['drama', 'comedy']
+    assert [movie.movieID for movie in next_page] == [6, 5, 4]
+    assert [movie.movieID for movie in by_year] == [10, 9]
+    assert none == []
+    assert len(queries) == 4
+    assert all('LIMIT' in query.upper() for query in queries[:3])
+
+
+def test_search_movie_advanced_ranks_titles_without_sort():
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as ia:
+        ranked = ia.search_movie_advanced('Miss Jerry')
+        filtered = ia.search_movie_advanced('Miss Jerry', year_to=1890)
+
+    assert ranked[0]['title'] == 'Miss Jerry'
+    assert filtered == []
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_search_movie_advanced_matches_whole_genres(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'genres.db', 4)
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.executemany(
+            'UPDATE title_basics SET genres = ? WHERE tconst = ?',
+            [('Musical', 1), ('Music,Drama', 2), ('Drama,music', 3),
+             ('Musical,Short', 4)])
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        music = ia.search_movie_advanced(genres=['Music'], sort='year')
+        musical = ia.search_movie_advanced(genres=['musical'], sort='year')
+        shorts = ia.search_movie_advanced(genres=['Sho'])
+        wildcard = ia.search_movie_advanced(genres=['Music%'])
+
+    assert [movie.movieID for movie in music] == [2, 3]
+    assert [movie.movieID for movie in musical] == [1, 4]
+    assert shorts == []
+    assert wildcard == []
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_person_filmography_and_credit_pages(tmp_path, monkeypatch, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'filmography.db', 10)
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.execute(
+            "INSERT INTO title_basics VALUES (11, 'movie', 'Upcoming', "
+            "'Upcoming', 0, NULL, NULL, NULL, NULL, NULL)"
+        )
+        connection.execute(
+            "INSERT INTO title_principals VALUES "
+            "(11, 1, 1, 'producer', 'executive producer', NULL)"
+        )
+        # Crew lists hold dataset IDs, zero-padded, too; the writer
+        # credit of title 10 is also in title_principals.
+        connection.execute("INSERT INTO title_crew VALUES (11, '0000001', "
+                           'NULL)')
+        connection.execute(
+            "INSERT INTO title_principals VALUES "
+            "(10, 20, 1, 'writer', 'screenplay', NULL)"
+        )
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        ia._adapter.catalog()
+        queries = _record_queries(monkeypatch, ia._adapter)
+        person = ia.get_person('1', info=['filmography'])
+        filmography_queries = len(queries)
+        crew_only = ia.get_person('1003', info=['filmography'])
+        pages = [ia.get_person_credits('1', 'actor', results=4)]
+        while pages[-1]:
+            pages.append(ia.get_person_credits('1', 'actor', results=4,
+                                               after=pages[-1][-1]))
+        producer = ia.get_person_credits('1', ['producer', 'actor'],
+                                         results=2)
+
+    assert filmography_queries == 3
+    assert person.current_info == ['filmography']
+    assert sorted(person['filmography']) == [
+        'actor', 'director', 'producer', 'writer',
+    ]
+    assert [movie.movieID for movie in person['director']] == [11]
+    assert [movie.movieID for movie in person['writer']] == \
+        list(range(10, 0, -1))
+    assert person['writer'][0].notes == 'screenplay'
+    assert [movie.movieID for movie in crew_only['director']] == [3]
+    assert [movie.movieID for movie in crew_only['writer']] == [3]
+    assert crew_only['writer'][0]['title'] == 'Movie 3'
+    actor = person['actor']
+    assert [movie.movieID for movie in actor] == list(range(10, 0, -1))
+    assert actor[0]['title'] == 'Movie 10'
+    assert actor[0]['year'] == '2000'
+    assert str(actor[0].currentRole) == 'Role'
+    assert person['producer'][0].notes == 'executive producer'
+    assert [[movie.movieID for movie in page] for page in pages] == [
+        [10, 9, 8, 7], [6, 5, 4, 3], [2, 1], [],
+    ]
+    assert [movie.movieID for movie in producer] == [11, 10]
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_credit_pages_keep_every_credit_of_a_title(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'credits.db', 10)
+    with closing(sqlite3.connect(database)) as connection, connection:
+        for category, offset in ('producer', 100), ('writer', 200):
+            connection.executemany(
+                'INSERT INTO title_principals VALUES (?, ?, 1, ?, NULL, NULL)',
+                [(movie_id, movie_id + offset, category)
+                 for movie_id in range(1, 11)],
+            )
+    categories = ['actor', 'producer', 'writer']
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        unpaged = ia.get_person_credits('1', categories, results=100)
+        paged = ia.get_person_credits('1', categories, results=4)
+        while paged and len(paged) % 4 == 0:
+            page = ia.get_person_credits('1', categories, results=4,
+                                         after=paged[-1])
+            if not page:
+                break
+            paged += page
+
+    assert len(unpaged) == 30
+    assert [(movie.movieID, movie.creditOrdering) for movie in paged] == \
+        [(movie.movieID, movie.creditOrdering) for movie in unpaged]
+    assert [movie.creditOrdering for movie in unpaged[:3]] == [10, 110, 210]
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+@pytest.mark.parametrize('adjacency', [False, True])
+def test_collaborators_and_shared_titles(tmp_path, scheme, adjacency):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    from imdb.parser.s3.importer import importer_for_uri
+
+    database = _build_database(tmp_path / 'collaborators.db', 10)
+    if adjacency:
+        importer = importer_for_uri(f'{scheme}:///{database}')
+        try:
+            importer.begin()
+            assert importer.build_collaborators() == 90
+            importer.commit()
+        finally:
+            importer.close()
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        assert bool(ia._adapter.column_names('name_collaborators')) \
+            == adjacency
+        top = ia.get_collaborators('1', top=3)
+        everyone = ia.get_collaborators('10', top=None)
+        shared = ia.get_shared_titles('1', '9')
+        nobody = ia.get_shared_titles('1', '1001')
+
+    assert [person.personID for person in top] == [2, 3, 4]
+    assert [person['shared titles'] for person in top] == [9, 8, 7]
+    assert top[0]['name'] == 'Person 2'
+    assert len(everyone) == 9
+    assert {person['shared titles'] for person in everyone} == {1}
+    assert [movie.movieID for movie in shared] == [10, 9]
+    assert shared[0]['title'] == 'Movie 10'
+    assert nobody == []
@@ -0,0 +1,65 @@
+import pytest
+
+import asyncio
+from pathlib import Path
+
+from imdb import Cinemagoer
+from imdb._exceptions import IMDbError
+from imdb.parser.s3.aio import AsyncIMDb
+
+partial_db = Path(__file__).with_name('partial.db').resolve()
+uri = f'sqlite:///{partial_db}'
+
+
+def test_async_lookups_match_the_synchronous_access_system():
+    movie_ids = ['1', '2', '3', '9', '12', '42816']
+
+    async def lookups():
+        async with AsyncIMDb(uri=uri, max_workers=3) as ia:
+            movies = await asyncio.gather(
+                *(ia.get_movie(movie_id) for movie_id in movie_ids)
+            )
+            searches = await asyncio.gather(
+                ia.search_movie('Miss Jerry', results=5),
+                ia.search_person('Fred Astaire', results=5),
+            )
+            episodes = await ia.get_movie_episodes('989125')
+            assert len(ia._instances) <= 3
+        return movies, searches, episodes
+
+    movies, (found_movies, found_people), episodes = asyncio.run(lookups())
+
+    with Cinemagoer('s3', uri=uri) as ia:
+        assert [movie.asXML() for movie in movies] == [
+            ia.get_movie(movie_id).asXML() for movie_id in movie_ids
+        ]
+        assert [movie.movieID for movie in found_movies] == [
+            movie.movieID for movie in ia.search_movie('Miss Jerry', results=5)
+        ]
+        assert found_people[0]['name'] == 'Fred Astaire'
+    assert episodes['data']['number of episodes'] == 13
+
+
+def test_closed_async_access_system_refuses_calls():
+    async def closed_call():
+        ia = AsyncIMDb(uri=uri)
+        await ia.get_movie('9')
+        await ia.close()
+        await ia.close()
+        assert ia._instances == []
+        with pytest.raises(IMDbError, match='closed'):
+            await ia.get_movie('9')
+
+    asyncio.run(closed_call())
+
+
+@pytest.mark.parametrize('memory_uri', ['sqlite://', 'sqlite:///:memory:'])
+def test_async_access_system_rejects_in_memory_databases(memory_uri):
+    with pytest.raises(IMDbError, match='in-memory'):
+        AsyncIMDb(uri=memory_uri)
+
+
+@pytest.mark.parametrize('concurrency', [0, -1])
+def test_async_access_system_rejects_no_concurrency(concurrency):
+    with pytest.raises(ValueError, match='concurrency'):
+        AsyncIMDb(uri=uri, concurrency=concurrency)
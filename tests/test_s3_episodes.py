@@ -1,3 +1,5 @@
+import pytest
+
 import sqlite3
 from contextlib import closing
 
@@ -101,3 +103,102 @@ def test_episode_titles_years_ratings_and_duplicate_numbers(tmp_path):
     special = series['episodes']['unknown season']['tt0000102']
     assert special['title'] == 'Special'
     assert special['year'] == '2021'
+
+
+def test_page_through_series_episodes_from_partial_database(ia):
+    seasons = ia.get_series_seasons('989125')
+    assert [season['season'] for season in seasons] == \
+        [1, 2, 3, 4, 5, 6, 9, 'unknown season']
+    assert sum(season['number of episodes'] for season in seasons) == 13
+    assert seasons[5]['number of episodes'] == 3
+
+    episodes = []
+    page = ia.get_episodes_page('989125', results=5)
+    while page:
+        episodes += page
+        page = ia.get_episodes_page('989125', results=5, after=page[-1])
+    assert len(episodes) == 13
+    assert [episode.movieID for episode in episodes[:3]] == \
+        [42816, 43693, 43631]
+    assert episodes[-1].movieID == 42889
+    assert episodes[1]['episode of'].movieID == 989125
+
+    season_six = ia.get_episodes_page('989125', seasons=[6, 'unknown season'])
+    assert [episode.movieID for episode in season_six] == \
+        [47961, 48371, 48883, 42889]
+
+    assert ia.get_next_episode('43693').movieID == 43631
+    assert ia.get_previous_episode('43693').movieID == 42816
+    assert ia.get_previous_episode('42816') is None
+    assert ia.get_next_episode('42889') is None
+    assert ia.get_next_episode('989125') is None
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_season_aggregates_and_episodes_without_numbers(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = tmp_path / 'seasons.db'
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.executescript(
+            '''
+            CREATE TABLE title_basics (
+                tconst INTEGER,
+                primaryTitle TEXT,
+                titleType TEXT,
+                startYear INTEGER
+            );
+            CREATE TABLE title_episode (
+                tconst INTEGER,
+                parentTconst INTEGER,
+                seasonNumber INTEGER,
+                episodeNumber INTEGER
+            );
+            CREATE TABLE title_ratings (
+                tconst INTEGER,
+                averageRating FLOAT,
+                numVotes INTEGER
+            );
+            INSERT INTO title_basics VALUES
+                (100, 'Example Series', 'tv series', 2020),
+                (101, 'One', 'episode', 2020),
+                (102, 'Two', 'episode', 2021),
+                (103, 'Unnumbered', 'episode', 2021),
+                (104, 'Special', 'episode', 2022),
+                (105, 'Three', 'episode', 2022);
+            INSERT INTO title_episode VALUES
+                (101, 100, 1, 1),
+                (102, 100, 1, 2),
+                (103, 100, 1, NULL),
+                (104, 100, NULL, NULL),
+                (105, 100, 2, 1);
+            INSERT INTO title_ratings VALUES
+                (101, 8.0, 10), (102, 7.0, 30), (105, 9.0, 5);
+            '''
+        )
+
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        seasons = ia.get_series_seasons('100')
+        episodes = []
+        page = ia.get_episodes_page('100', results=1)
+        while page:
+            episodes += page
+            page = ia.get_episodes_page('100', results=1, after=page[-1])
+        backwards = [ia.get_previous_episode('104')]
+        while backwards[-1] is not None:
+            backwards.append(ia.get_previous_episode(backwards[-1].movieID))
+
+    assert seasons == [
+        {'season': 1, 'number of episodes': 3, 'rated episodes': 2,
+         'rating': 7.5, 'votes': 40, 'year': 2020, 'end year': 2021},
+        {'season': 2, 'number of episodes': 1, 'rated episodes': 1,
+         'rating': 9.0, 'votes': 5, 'year': 2022, 'end year': 2022},
+        {'season': 'unknown season', 'number of episodes': 1,
+         'rated episodes': 0, 'year': 2022, 'end year': 2022},
+    ]
+    assert [episode.movieID for episode in episodes] == \
+        [101, 102, 103, 105, 104]
+    assert episodes[0]['rating'] == 8.0
+    assert episodes[0]['title'] == 'One'
+    assert [episode.movieID for episode in backwards[:-1]] == \
+        [105, 103, 102, 101]
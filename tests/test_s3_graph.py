@@ -0,0 +1,99 @@
+import pytest
+
+import sqlite3
+from contextlib import closing
+
+from imdb import Cinemagoer
+from imdb.parser.s3.graph import CreditGraph
+
+# Person 1 and person 4 are linked by a chain of three movies, or directly
+# by the episode 5; person 5 shares no title with anyone.
+TITLES = [(1, 'movie'), (2, 'movie'), (3, 'movie'), (4, 'movie'),
+          (5, 'episode')]
+CREDITS = [(1, 1), (1, 2), (2, 2), (2, 3), (3, 3), (3, 4), (4, 5), (5, 1),
+           (5, 4), (2, 2)]
+
+
+def _build_database(path):
+    with closing(sqlite3.connect(path)) as connection, connection:
+        connection.executescript('''
+            CREATE TABLE title_basics (
+                tconst INTEGER, titleType TEXT, primaryTitle TEXT,
+                startYear INTEGER
+            );
+            CREATE TABLE title_principals (
+                tconst INTEGER, ordering INTEGER, nconst INTEGER,
+                category TEXT
+            );
+            CREATE TABLE name_basics (
+                nconst INTEGER, primaryName TEXT, knownForTitles TEXT
+            );
+        ''')
+        for tconst, kind in TITLES:
+            connection.execute(
+                'INSERT INTO title_basics VALUES (?, ?, ?, 2000)',
+                (tconst, kind, 'Title %d' % tconst),
+            )
+        for ordering, (tconst, nconst) in enumerate(CREDITS):
+            connection.execute(
+                "INSERT INTO title_principals VALUES (?, ?, ?, 'actor')",
+                (tconst, ordering, nconst),
+            )
+        for nconst in range(1, 6):
+            connection.execute(
+                'INSERT INTO name_basics VALUES (?, ?, NULL)',
+                (nconst, 'Person %d' % nconst),
+            )
+    return path
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_shortest_path(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'graph.db')
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        direct = ia.shortest_path('1', '4')
+        movies_only = ia.shortest_path('1', '4', kinds=['movie'])
+        too_far = ia.shortest_path('1', '4', max_depth=2, kinds='movie')
+        disconnected = ia.shortest_path('1', '5')
+        itself = ia.shortest_path('3', '3')
+        stats = ia.credit_graph().stats()
+
+    assert [item.getID() for item in direct] == [1, 5, 4]
+    assert direct[0]['name'] == 'Person 1'
+    assert direct[1]['title'] == 'Title 5'
+    assert direct[1]['kind'] == 'episode'
+    assert [item.getID() for item in movies_only] == [1, 1, 2, 2, 3, 3, 4]
+    assert too_far is None
+    assert disconnected is None
+    assert [item.getID() for item in itself] == [3]
+    assert stats['people'] == 5
+    assert stats['titles'] == 5
+    assert stats['credits'] == 9
+    assert stats['bytes'] > 0
+    assert stats['load seconds'] >= 0
+
+
+def test_graph_is_loaded_in_steps_and_reloaded_after_rebuild(tmp_path):
+    database = _build_database(tmp_path / 'graph.db')
+    with Cinemagoer('s3', uri=f'sqlite:///{database}') as ia:
+        graph = CreditGraph.from_adapter(ia._adapter, step=2)
+        assert list(graph.titles_of(1)) == [1, 5]
+        assert list(graph.people_of(2)) == [2, 3]
+        assert graph.kind_of(5) == 'episode'
+        assert graph.shortest_path(5, 5) == [5]
+        assert graph.shortest_path(1, 42) is None
+        assert ia.credit_graph() is ia.credit_graph()
+        first = ia.credit_graph()
+        with closing(sqlite3.connect(database)) as connection, connection:
+            connection.execute(
+                'INSERT INTO title_principals VALUES (6, 0, 5, NULL)'
+            )
+            connection.execute(
+                'INSERT INTO title_principals VALUES (6, 1, 4, NULL)'
+            )
+        assert ia.credit_graph() is not first
+        linked = ia.shortest_path(1, 5)
+
+    assert [item.getID() for item in linked] == [1, 5, 4, 6, 5]
@@ -5,6 +5,7 @@ import importlib.util
 import json
 import logging
 import sqlite3
+import threading
 from contextlib import closing
 from pathlib import Path
 
@@ -23,7 +24,12 @@ from imdb.parser.s3.importer import (
     SQLiteImporter,
     import_dir,
 )
-from imdb.parser.s3.utils import transf_multi_character
+from imdb.parser.s3.utils import (
+    scan_titles,
+    title_length_window,
+    title_soundex,
+    transf_multi_character,
+)
 from imdb.utils import RolesList
 
 
@@ -365,6 +371,11 @@ def test_searches_without_soundex_are_exact_bounded_and_consistent(
         assert ia.search_movie('!!! (2026)', results=5)[0].movieID == 3001
         assert ia.search_movie('東京', results=5)[0].movieID == 3002
         assert len(ia.search_movie('123', results=5)) == 5
+        assert [movie.movieID for movie in
+                ia.search_movie_advanced('!!! (2026)')] == [3001]
+        assert [movie.movieID for movie in
+                ia.search_movie_advanced('東京')] == [3002]
+        assert ia.search_movie_advanced('!!') == []
 
         title_rows, _ = ia._adapter.search_titles(None, '!!!')
         _, aka_rows = ia._adapter.search_titles(None, '123')
@@ -380,6 +391,87 @@ def test_searches_without_soundex_are_exact_bounded_and_consistent(
         assert ia.search_person('123', results=5) == []
 
 
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_soundex_searches_are_bounded_by_length_and_votes(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = tmp_path / 'bounded.db'
+    soundex = title_soundex('Love')
+    # Titles with the soundex of "Love": one too long to ever match, and
+    # many that differ only by their votes.
+    titles = [(1, 'Love', 10), (2, 'Love' + ' of mine' * 5, 1000000)]
+    titles += [(movie_id, 'Lov' + 'e' * (movie_id % 3 + 1), movie_id)
+               for movie_id in range(3, 53)]
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.executescript(
+            '''
+            CREATE TABLE title_basics (
+                tconst INTEGER, primaryTitle TEXT, titleType TEXT,
+                startYear INTEGER, t_soundex TEXT, t_length INTEGER
+            );
+            CREATE TABLE title_akas (
+                titleId INTEGER, ordering INTEGER, title TEXT,
+                t_soundex TEXT, t_length INTEGER
+            );
+            CREATE TABLE title_ratings (
+                tconst INTEGER, averageRating REAL, numVotes INTEGER
+            );
+            CREATE INDEX ix_title_basics_primaryTitle
+                ON title_basics (primaryTitle);
+            CREATE INDEX ix_title_akas_title ON title_akas (title);
+            '''
+        )
+        for movie_id, title, votes in titles:
+            connection.execute(
+                "INSERT INTO title_basics VALUES (?, ?, 'movie', 2000, ?, ?)",
+                (movie_id, title, soundex, len(title)),
+            )
+            connection.execute('INSERT INTO title_ratings VALUES (?, 7, ?)',
+                               (movie_id, votes))
+        connection.execute('INSERT INTO title_akas VALUES (60, 1, ?, ?, ?)',
+                           ('Love' * 10, soundex, 40))
+        connection.execute('INSERT INTO title_akas VALUES (61, 1, ?, ?, ?)',
+                           ('Lovee', soundex, 5))
+        # An exact aka of a title with no votes at all.
+        connection.execute('INSERT INTO title_akas VALUES (62, 1, ?, ?, ?)',
+                           ('Love', soundex, 4))
+
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}',
+                    searchCandidates=5) as ia:
+        title_rows, aka_rows = ia._adapter.search_titles(
+            soundex, 'Love', lengths=title_length_window('Love'), limit=5,
+        )
+        found = ia.search_movie('Love')
+        unbounded_rows, unbounded_akas = ia._adapter.search_titles(
+            soundex, 'Love',
+        )
+
+    # The exact matches ("Love", every third title) are read however few
+    # their votes.
+    exact = {1} | set(range(3, 53, 3))
+    assert sorted(row['tconst'] for row in title_rows) == \
+        sorted(exact | {52, 51, 50, 49, 48})
+    assert sorted(row['titleId'] for row in aka_rows) == [61, 62]
+    assert 't_length' not in found[0].data
+    assert 1 in [movie.movieID for movie in found]
+    assert {movie.movieID for movie in found} <= \
+        exact | {52, 51, 50, 49, 48, 61, 62}
+    assert len(unbounded_rows) == len(titles)
+    assert len(unbounded_akas) == 3
+
+
+def test_title_length_window_keeps_every_scored_title():
+    for title in ('Love', 'The Matrix', 'Matrix, The', 'Les Misérables'):
+        shortest, longest = title_length_window(title)
+        for length in range(1, 40):
+            other = (title * 40)[:length]
+            for candidate in (other, 'The ' + other, other + ', The'):
+                # Any score above the bonus of the first comparison.
+                if scan_titles([(1, {'title': candidate})], title,
+                               ro_threshold=0.11):
+                    assert shortest <= len(candidate) <= longest
+
+
 @pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
 def test_importer_round_trip(tmp_path, scheme):
     if scheme == 'sqlite+pysqlite':
@@ -424,6 +516,125 @@ def test_importer_round_trip(tmp_path, scheme):
     assert ('ix_title_basics_tconst',) in indexes
     assert ('ix_title_basics_primaryTitle',) in indexes
     assert ('ix_title_akas_title',) in indexes
+    assert ('ix_title_basics_t_soundex_t_length',) in indexes
+    assert ('ix_title_akas_t_soundex_t_length',) in indexes
+    assert ('ix_title_ratings_numVotes_tconst',) in indexes
+    assert ('ix_title_principals_nconst_tconst',) in indexes
+    assert ('ix_title_episode_parentTconst_seasonNumber_episodeNumber_tconst',) \
+        in indexes
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_importer_weights_ratings_for_top_titles(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    datasets = tmp_path / 'datasets'
+    datasets.mkdir()
+    _write_complete_dataset(datasets)
+    _write_dataset(
+        datasets,
+        'title.basics',
+        [
+            'tconst', 'titleType', 'primaryTitle', 'originalTitle',
+            'isAdult', 'startYear', 'endYear', 'runtimeMinutes', 'genres',
+        ],
+        [
+            ['tt0000001', 'movie', 'Example Movie', 'Example Movie', '0',
+             '2026', r'\N', '95', 'Drama,Musical'],
+            ['tt0000002', 'movie', 'Nineties Movie', 'Nineties Movie', '0',
+             '1995', r'\N', '100', 'Music,Drama'],
+            ['tt0000003', 'tvSeries', 'Example Series', 'Example Series',
+             '0', '1998', r'\N', '30', 'Comedy'],
+        ],
+    )
+    _write_dataset(
+        datasets,
+        'title.ratings',
+        ['tconst', 'averageRating', 'numVotes'],
+        [['tt0000001', '9.0', '10'], ['tt0000002', '8.0', '1000'],
+         ['tt0000003', '7.0', '5000']],
+    )
+    database = tmp_path / 'charts.db'
+    manifest = import_dir(str(datasets), f'{scheme}:///{database}',
+                          weight_votes=100)
+
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}') as ia:
+        top = ia.get_top_titles()
+        nineties = ia.get_top_titles(kind='movie', decade='1990s')
+        comedies = ia.get_top_titles(genre='Comedy')
+        music = ia.get_top_titles(genre='music')
+        dramas = ia.get_top_titles(genre='Drama')
+        popular = ia.get_top_titles(min_votes=100, n=1)
+        ratings = ia.get_movie('2', info=['ratings'])
+
+    assert manifest['weight_votes'] == 100
+    assert manifest['mean_rating'] == pytest.approx(8.0)
+    assert [movie.movieID for movie in top] == [1, 2, 3]
+    assert top[0]['weighted rating'] == pytest.approx(890 / 110)
+    assert top[0]['title'] == 'Example Movie'
+    assert top[2]['kind'] == 'tv series'
+    assert [movie.movieID for movie in nineties] == [2]
+    assert [movie.movieID for movie in comedies] == [3]
+    assert [movie.movieID for movie in music] == [2]
+    assert [movie.movieID for movie in dramas] == [1, 2]
+    assert [movie.movieID for movie in popular] == [2]
+    assert ratings['weighted rating'] == pytest.approx(8.0)
+
+    with closing(sqlite3.connect(database)) as connection, connection:
+        plan = ' '.join(row[-1] for row in connection.execute(
+            'EXPLAIN QUERY PLAN SELECT tconst FROM title_ratings '
+            'ORDER BY weightedRating DESC, tconst DESC'
+        ))
+    assert 'ix_title_ratings_weightedRating' in plan
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_importer_builds_and_drops_collaborators(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    datasets = tmp_path / 'datasets'
+    datasets.mkdir()
+    _write_complete_dataset(datasets)
+    _write_dataset(
+        datasets,
+        'title.principals',
+        ['tconst', 'ordering', 'nconst', 'category', 'job', 'characters'],
+        [['tt0000001', '1', 'nm0000001', 'actor', r'\N', r'\N'],
+         ['tt0000001', '2', 'nm0000002', 'director', r'\N', r'\N']],
+    )
+    uri = f'{scheme}:///{tmp_path / "collaborators.db"}'
+    manifest = import_dir(str(datasets), uri, collaborators=True)
+    with Cinemagoer('s3', uri=uri) as ia:
+        assert ia._adapter.column_names('name_collaborators')
+        collaborators = ia.get_collaborators('1')
+    rebuilt = import_dir(str(datasets), uri)
+    with Cinemagoer('s3', uri=uri) as ia:
+        assert not ia._adapter.column_names('name_collaborators')
+        fallback = ia.get_collaborators('1')
+
+    assert manifest['collaborators'] is True
+    assert manifest['collaborator_rows'] == 2
+    assert rebuilt['collaborators'] is False
+    assert [person.personID for person in collaborators] == [2]
+    assert collaborators[0]['shared titles'] == 1
+    assert [person.personID for person in fallback] == [2]
+
+
+def test_weight_votes_must_not_be_negative(tmp_path):
+    datasets = tmp_path / 'datasets'
+    datasets.mkdir()
+    _write_complete_dataset(datasets)
+
+    with pytest.raises(IMDbError, match='weight votes'):
+        import_dir(str(datasets), f'sqlite:///{tmp_path / "x.db"}',
+                   weight_votes=-1)
+
+
+def test_top_titles_need_weighted_ratings():
+    database = Path(__file__).with_name('partial.db').resolve()
+    with Cinemagoer('s3', uri=f'sqlite:///{database}') as ia:
+        with pytest.raises(IMDbDataAccessError, match='weighted ratings'):
+            ia.get_top_titles()
 
 
 @pytest.mark.parametrize('directory_state', ['missing', 'empty'])
@@ -658,3 +869,67 @@ def test_sqlalchemy_sqlite_adapter_parity_when_installed():
         ]
         assert native.get_movie('9')['title'] == \
             sqlalchemy_access.get_movie('9')['title']
+
+
+def test_sqlalchemy_tables_are_reflected_lazily(tmp_path):
+    pytest.importorskip('sqlalchemy')
+    database = tmp_path / 'lazy.db'
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.execute('CREATE TABLE name_basics (nconst INTEGER, '
+                           'primaryName TEXT)')
+        connection.execute("INSERT INTO name_basics VALUES (1, 'Somebody')")
+        connection.execute('CREATE TABLE marker (id INTEGER)')
+        connection.execute('CREATE TABLE unrelated (id INTEGER)')
+
+    with Cinemagoer('s3', uri=f'sqlite+pysqlite:///{database}') as ia:
+        adapter = ia._adapter
+        assert not adapter.metadata.tables
+        assert adapter.get_row('name_basics', 'nconst', 1)['primaryName'] \
+            == 'Somebody'
+        assert adapter.get_row('name_basics', 'nconst', 2) is None
+        catalog = adapter.catalog()
+        assert adapter.column_names('name_basics') == {'nconst',
+                                                        'primaryName'}
+        assert not catalog.is_indexed('name_basics', 'nconst')
+        assert adapter.catalog() is catalog
+        assert list(adapter.metadata.tables) == ['name_basics']
+        statement = adapter._rows_statement('name_basics', 'nconst')
+        assert adapter._rows_statement('name_basics', 'nconst') is statement
+        assert adapter.tables.get('title_ratings') is None
+        assert adapter.column_names('title_ratings') == set()
+        assert adapter.column_names('marker') == {'id'}
+        assert adapter.get_row('marker', 'id', 1) is None
+        assert set(adapter.metadata.tables) == {'name_basics', 'marker'}
+        ia.clear_cache()
+        assert not adapter.metadata.tables
+
+
+def test_sqlalchemy_connections_can_be_pinned_to_threads(tmp_path):
+    pytest.importorskip('sqlalchemy')
+    database = tmp_path / 'pinned.db'
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.execute('CREATE TABLE marker (id INTEGER)')
+        connection.execute('INSERT INTO marker VALUES (1)')
+    with pytest.raises(IMDbError, match='SQLAlchemy URI'):
+        Cinemagoer('s3', uri=f'sqlite:///{database}', pinConnections=True)
+
+    with Cinemagoer('s3', uri=f'sqlite+pysqlite:///{database}',
+                    pinConnections=True, queryCacheSize=10) as ia:
+        adapter = ia._adapter
+        assert adapter.engine._compiled_cache.capacity == 10
+        with adapter._connection() as first:
+            pass
+        assert adapter.get_row('marker', 'id', 1) == {'id': 1}
+        with adapter._connection() as second:
+            assert not second.in_transaction()
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.append(adapter._pinned_connection())
+        )
+        thread.start()
+        thread.join()
+        assert len(adapter._pinned) == 2
+
+    assert first is second
+    assert other[0] is not first
+    assert first.closed and other[0].closed
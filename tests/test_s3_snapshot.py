@@ -0,0 +1,88 @@
+import pytest
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from imdb import Cinemagoer
+from imdb._exceptions import IMDbDataAccessError
+from imdb.parser.s3.snapshot import SnapshotAdapter, export_snapshot
+
+partial_db = Path(__file__).with_name('partial.db').resolve()
+
+
+def _sorted_akas(movie):
+    data = dict(movie.data)
+    data['akas'] = sorted(data.get('akas', []), key=lambda aka: aka['ordering'])
+    return data
+
+
+@pytest.fixture(scope='module')
+def snapshot(tmp_path_factory):
+    path = tmp_path_factory.mktemp('snapshot') / 'partial.snapshot'
+    stats = export_snapshot(f'sqlite:///{partial_db}', str(path))
+    assert stats['tables']['title_principals'] == 99
+    assert stats['bytes'] == path.stat().st_size
+    return path
+
+
+def test_snapshot_answers_like_the_database(snapshot):
+    with closing(sqlite3.connect(partial_db)) as connection:
+        movieIDs = [row[0] for row in connection.execute(
+            'SELECT tconst FROM title_basics ORDER BY tconst LIMIT 20')]
+        personIDs = [row[0] for row in connection.execute(
+            'SELECT nconst FROM name_basics ORDER BY nconst LIMIT 20')]
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as database, \
+            Cinemagoer('s3', uri=f'snapshot:///{snapshot}') as ia:
+        for movieID in movieIDs:
+            assert _sorted_akas(ia.get_movie(movieID)) == \
+                _sorted_akas(database.get_movie(movieID))
+        for personID in personIDs:
+            info = ['main', 'filmography']
+            assert ia.get_person(personID, info=info).data == \
+                database.get_person(personID, info=info).data
+        assert ia.get_movie('989125', info=['episodes']).data == \
+            database.get_movie('989125', info=['episodes']).data
+
+
+def test_snapshot_adapter_lookups(snapshot):
+    adapter = SnapshotAdapter(str(snapshot))
+    try:
+        assert adapter.get_row('title_ratings', 'tconst', 1) == {
+            'tconst': 1, 'averageRating': 5.7, 'numVotes': 2226,
+        }
+        assert adapter.get_row('title_ratings', 'tconst', 10 ** 9) is None
+        episodes = adapter.get_rows('title_episode', 'parentTconst', 989125,
+                                    order_by=('seasonNumber',))
+        assert len(episodes) == 13
+        assert episodes[0]['seasonNumber'] is None
+        assert [row['seasonNumber'] for row in episodes[1:3]] == [1, 2]
+        assert 'nconst' in adapter.column_names('title_principals')
+        assert adapter.catalog().is_indexed('title_principals', 'nconst')
+        assert adapter.get_rows_in('no_such_table', 'tconst', [1]) == []
+        with pytest.raises(IMDbDataAccessError):
+            adapter.get_rows('title_basics', 'primaryTitle', 'Carmencita')
+        with pytest.raises(IMDbDataAccessError):
+            adapter.search_titles('C563', 'Carmencita')
+    finally:
+        adapter.close()
+    adapter.close()
+    with pytest.raises(IMDbDataAccessError):
+        adapter.get_row('title_ratings', 'tconst', 1)
+
+
+def test_snapshot_of_selected_tables_and_invalid_files(tmp_path):
+    path = tmp_path / 'ratings.snapshot'
+    stats = export_snapshot(f'sqlite:///{partial_db}', str(path),
+                            tables=['title_ratings'])
+    assert list(stats['tables']) == ['title_ratings']
+    with Cinemagoer('s3', uri=f'snapshot:///{path}') as ia:
+        movie = ia.get_movie('1', info=['ratings'])
+    assert movie['rating'] == 5.7
+
+    not_a_snapshot = tmp_path / 'empty.snapshot'
+    not_a_snapshot.write_bytes(b'SQLite format 3\0')
+    with pytest.raises(IMDbDataAccessError):
+        SnapshotAdapter(str(not_a_snapshot))
+    with pytest.raises(IMDbDataAccessError):
+        SnapshotAdapter(str(tmp_path / 'missing.snapshot'))
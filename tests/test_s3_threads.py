@@ -0,0 +1,100 @@
+import pytest
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from imdb import Cinemagoer
+from imdb._exceptions import IMDbDataAccessError
+
+partial_db = Path(__file__).with_name('partial.db').resolve()
+
+MOVIE_IDS = ['1', '2', '3', '7', '9', '12', '42816', '989125']
+TITLES = ['Miss Jerry', 'Blacksmith Scene', 'The Matrix']
+NAMES = ['Fred Astaire', 'Astaire Fred']
+
+
+def _snapshot(ia, movie_id):
+    return (
+        ia.get_movie(movie_id).asXML(),
+        [movie.movieID for movie in ia.search_movie(TITLES[int(movie_id) % 3])],
+        [person.personID for person in ia.search_person(NAMES[int(movie_id) % 2])],
+    )
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_shared_instance_under_concurrent_load(scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    with Cinemagoer('s3', uri=f'{scheme}:///{partial_db}',
+                    threadSafe=True) as ia:
+        expected = {movie_id: _snapshot(ia, movie_id) for movie_id in MOVIE_IDS}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                (movie_id, executor.submit(_snapshot, ia, movie_id))
+                for _ in range(20)
+                for movie_id in MOVIE_IDS
+            ]
+            for movie_id, future in futures:
+                assert future.result() == expected[movie_id]
+        if scheme == 'sqlite':
+            assert len(ia._adapter._connections) <= 9
+            connections = [item[1] for item in ia._adapter._connections]
+    if scheme == 'sqlite':
+        for connection in connections:
+            with pytest.raises(Exception, match='closed'):
+                connection.execute('SELECT 1')
+
+
+def test_connections_of_finished_threads_are_closed():
+    with Cinemagoer('s3', uri=f'sqlite:///{partial_db}') as ia:
+        adapter = ia._adapter
+        worker = threading.Thread(target=ia.get_movie, args=('9',))
+        worker.start()
+        worker.join()
+        [(_thread, worker_connection)] = adapter._connections
+
+        ia.get_movie('9')
+
+        assert [item[1] for item in adapter._connections] != [worker_connection]
+        assert len(adapter._connections) == 1
+        with pytest.raises(Exception, match='closed'):
+            worker_connection.execute('SELECT 1')
+
+
+@pytest.mark.parametrize('uri', ['sqlite://', 'sqlite+pysqlite://'])
+def test_thread_safe_in_memory_database_is_shared_by_threads(uri):
+    sqlalchemy = None
+    if uri.startswith('sqlite+'):
+        sqlalchemy = pytest.importorskip('sqlalchemy')
+    with Cinemagoer('s3', uri=uri, threadSafe=True) as ia:
+        adapter = ia._adapter
+        statements = [
+            'CREATE TABLE marker (id INTEGER, value TEXT)',
+            "INSERT INTO marker VALUES (1, 'shared')",
+        ]
+        if sqlalchemy is None:
+            for statement in statements:
+                adapter.connection.execute(statement)
+        else:
+            with adapter.engine.begin() as connection:
+                for statement in statements:
+                    connection.execute(sqlalchemy.text(statement))
+            adapter.metadata.reflect(bind=adapter.engine)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            values = list(executor.map(
+                lambda _: adapter.get_row('marker', 'id', 1)['value'],
+                range(50),
+            ))
+
+    assert values == ['shared'] * 50
+
+
+def test_in_memory_database_without_thread_safe_mode_is_single_threaded():
+    with Cinemagoer('s3', uri='sqlite://') as ia:
+        ia._adapter.connection.execute('CREATE TABLE marker (id INTEGER)')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(ia._adapter.get_row, 'marker', 'id', 1)
+            with pytest.raises(IMDbDataAccessError):
+                future.result()
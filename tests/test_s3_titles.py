@@ -0,0 +1,94 @@
+import pytest
+
+import sqlite3
+from contextlib import closing
+
+from imdb import Cinemagoer
+from imdb.parser.s3.titles import TitleIndex
+
+TITLES = [(1, 'movie', 1999, 7.3, 120), (2, 'episode', None, None, None),
+          (5, 'tv series', 2010, 9.0, 5), (7, 'movie', 2001, 1.0, 3)]
+
+
+def _build_database(path):
+    with closing(sqlite3.connect(path)) as connection, connection:
+        connection.executescript('''
+            CREATE TABLE title_basics (
+                tconst INTEGER, titleType TEXT, primaryTitle TEXT,
+                startYear INTEGER
+            );
+            CREATE TABLE title_ratings (
+                tconst INTEGER, averageRating FLOAT, numVotes INTEGER
+            );
+        ''')
+        for tconst, kind, year, rating, votes in TITLES:
+            connection.execute(
+                'INSERT INTO title_basics VALUES (?, ?, ?, ?)',
+                (tconst, kind, 'Title %d' % tconst, year),
+            )
+            if rating is not None:
+                connection.execute(
+                    'INSERT INTO title_ratings VALUES (?, ?, ?)',
+                    (tconst, rating, votes),
+                )
+    return path
+
+
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_title_index_lookups(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = _build_database(tmp_path / 'titles.db')
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}',
+                    titleIndex=True) as ia:
+        index = ia.title_index()
+        summaries = ia.get_title_summaries(['7', 1, 3, 2, 1])
+
+    assert index.get(1) == {'kind': 'movie', 'rating': 7.3, 'votes': 120,
+                            'year': 1999}
+    assert index.get('2') == {'kind': 'episode'}
+    assert index.get(3) is None
+    assert summaries == {
+        1: {'kind': 'movie', 'rating': 7.3, 'votes': 120, 'year': 1999},
+        2: {'kind': 'episode'},
+        7: {'kind': 'movie', 'rating': 1.0, 'votes': 3, 'year': 2001},
+    }
+    assert index.ratings_of([5, 2, 42]) == [(9.0, 5), (None, 0), (None, 0)]
+    assert len(index) == 4
+    assert 7 in index
+    assert 8 not in index
+    stats = index.stats()
+    assert stats['titles'] == 4
+    assert stats['bytes'] == 4 * 13 + 2 * 4
+    assert stats['load seconds'] >= 0
+
+
+def test_title_index_matches_the_database_and_is_reloaded(tmp_path):
+    database = _build_database(tmp_path / 'titles.db')
+    with Cinemagoer('s3', uri=f'sqlite:///{database}') as ia:
+        index = TitleIndex.from_adapter(ia._adapter, step=2)
+        assert [index.get(movieID) for movieID in (1, 2, 5, 7)] == [
+            ia.title_index().get(movieID) for movieID in (1, 2, 5, 7)
+        ]
+        first = ia.title_index()
+        assert ia.title_index() is first
+        with closing(sqlite3.connect(database)) as connection, connection:
+            connection.execute(
+                "INSERT INTO title_basics VALUES (9, 'short', 'Nine', 1900)"
+            )
+        assert ia.title_index() is not first
+        assert ia.title_index().get(9) == {'kind': 'short', 'year': 1900}
+        ia.clear_cache()
+        assert ia.title_index() is not first
+
+
+def test_title_index_of_partial_database(ia):
+    summaries = ia.get_title_summaries(range(1, 4))
+    movies = ia.get_movies(range(1, 4), info=['main'])
+
+    for movie in movies:
+        summary = summaries[movie.movieID]
+        assert summary['rating'] == movie['rating']
+        assert summary['votes'] == movie['votes']
+        assert str(summary['year']) == str(movie['year'])
+        assert summary['kind'] == movie['kind']
@@ -17,7 +17,7 @@ def test_search_and_get_person(ia):
     assert fetched['last name'] == 'Astaire'
     assert fetched['primary profession'] == 'actor,miscellaneous,producer'
     assert len(fetched['known for']) == 4
-    assert fetched.current_info == ['main', 'filmography', 'biography']
+    assert fetched.current_info == ['main', 'biography']
 
 
 def test_search_and_get_movie(ia):
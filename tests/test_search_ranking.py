@@ -2,9 +2,21 @@ import pytest
 
 import sqlite3
 from contextlib import closing
+from difflib import SequenceMatcher
+from random import Random
 
 from imdb import Cinemagoer
-from imdb.parser.s3.utils import scan_titles, title_soundex
+from imdb._exceptions import IMDbError
+from imdb.parser.s3.utils import (
+    RO_THRESHOLD,
+    DifflibScorer,
+    get_scorer,
+    ratcliff,
+    scan_names,
+    scan_titles,
+    strip_article,
+    title_soundex,
+)
 
 
 def test_exact_movie_title_ranks_before_aka_and_no_year_noise():
@@ -95,6 +107,67 @@ def test_title_query_year_is_respected_in_search(tmp_path):
     assert movies[0]['year'] == '2016'
 
 
+@pytest.mark.parametrize('scheme', ['sqlite', 'sqlite+pysqlite'])
+def test_title_query_year_is_searched_in_one_query(tmp_path, scheme):
+    if scheme == 'sqlite+pysqlite':
+        pytest.importorskip('sqlalchemy')
+    database = tmp_path / 'ranking.db'
+    matrix_soundex = title_soundex('The Matrix')
+    with closing(sqlite3.connect(database)) as connection, connection:
+        connection.executescript(
+            '''
+            CREATE TABLE title_basics (
+                tconst INTEGER, primaryTitle TEXT, titleType TEXT,
+                startYear INTEGER, t_soundex TEXT
+            );
+            CREATE TABLE title_akas (
+                titleId INTEGER, ordering INTEGER, title TEXT, t_soundex TEXT
+            );
+            CREATE TABLE title_ratings (
+                tconst INTEGER, averageRating REAL, numVotes INTEGER
+            );
+            '''
+        )
+        connection.executemany(
+            'INSERT INTO title_basics VALUES (?, ?, ?, ?, ?)',
+            [(i, 'The Matrix', 'movie', 1990 + i, matrix_soundex)
+             for i in range(1, 6)],
+        )
+        connection.execute(
+            "INSERT INTO title_akas VALUES (6, 1, 'Matrix', ?)",
+            (matrix_soundex,),
+        )
+        connection.execute(
+            "INSERT INTO title_basics VALUES (6, 'Matrice', 'movie', 2010,"
+            " 'M362')"
+        )
+        # The title of 1991 has the fewest votes.
+        connection.executemany(
+            'INSERT INTO title_ratings VALUES (?, 7.0, ?)',
+            [(i, 1000 - i * 100 if i != 1 else 1) for i in range(1, 7)],
+        )
+
+    with Cinemagoer('s3', uri=f'{scheme}:///{database}',
+                    searchCandidates=2) as ia:
+        calls = []
+        search_titles = ia._adapter.search_titles
+
+        def counted_search_titles(*args, **kwargs):
+            calls.append(kwargs)
+            return search_titles(*args, **kwargs)
+
+        ia._adapter.search_titles = counted_search_titles
+        of_1991 = ia.search_movie('The Matrix (1991)', results=5)
+        of_2010 = ia.search_movie('Matrix (2010)', results=5)
+        of_1980 = ia.search_movie('The Matrix (1980)', results=5)
+
+    assert len(calls) == 3
+    assert [movie.movieID for movie in of_1991] == [1]
+    assert [movie.movieID for movie in of_2010] == [6]
+    assert 'startYear' not in of_2010[0].data
+    assert [movie.movieID for movie in of_1980] == [2, 3, 6]
+
+
 def test_reversed_person_name_query_ranks_the_intended_person_first(ia):
     normal_people = ia.search_person('Fred Astaire', results=5)
     reversed_people = ia.search_person('Astaire Fred', results=5)
@@ -102,3 +175,123 @@ def test_reversed_person_name_query_ranks_the_intended_person_first(ia):
     assert normal_people[0]['name'] == 'Fred Astaire'
     assert reversed_people[0]['name'] == 'Fred Astaire'
     assert reversed_people[0].personID == normal_people[0].personID
+
+
+def _reference_scan_titles(titles_list, title, ro_threshold=RO_THRESHOLD):
+    """The scores of scan_titles, one ratcliff call at a time."""
+    no_article_title = strip_article(title)
+    sm1 = SequenceMatcher()
+    sm1.set_seq1(title.lower())
+    sm2 = SequenceMatcher()
+    sm2.set_seq1(no_article_title.lower())
+    scores = {}
+    for i, t_data in titles_list:
+        til = t_data['title']
+        ratio = max(ratcliff(title, til, sm1) + 0.1,
+                    ratcliff(no_article_title, strip_article(til), sm2))
+        if ratio >= ro_threshold:
+            scores[i] = max(ratio, scores.get(i, ratio))
+    return scores
+
+
+def _candidates():
+    random = Random(7)
+    titles = ['The Matrix', 'Matrix Reloaded', 'Miss Jerry', 'Misery',
+              'La vita è bella', 'Vita da cani', 'Love Actually', 'Lovely',
+              'Night of the Living Dead', 'Nightmare', 'Die Hard', 'Heat']
+    candidates = []
+    for i in range(2000):
+        title = list(random.choice(titles))
+        for _edit in range(random.randint(0, 4)):
+            position = random.randrange(len(title))
+            title[position] = random.choice('aeioust ')
+        candidates.append((i, {'title': ''.join(title)}))
+    return candidates
+
+
+@pytest.mark.parametrize('query', ['The Matrix', 'Miss Jerry', 'Lovely',
+                                   'Vita è bella, La', 'Heat'])
+def test_difflib_scorer_matches_ratcliff(query):
+    candidates = _candidates()
+
+    ranked = scan_titles(candidates, query, scorer='difflib')
+
+    assert {item[1][0]: item[0] for item in ranked} == \
+        _reference_scan_titles(candidates, query)
+
+
+def test_rapidfuzz_scorer_is_within_tolerance():
+    pytest.importorskip('rapidfuzz')
+    candidates = _candidates()
+    queries = ['The Matrix', 'Miss Jerry', 'Night of the Living Dead']
+    titles = [t_data['title'].lower() for _i, t_data in candidates]
+    for query in queries:
+        difflib_scores = DifflibScorer().scores(query.lower(), titles)
+        rapidfuzz_scores = get_scorer('rapidfuzz').scores(query.lower(),
+                                                          titles)
+        differences = [fast - exact for fast, exact
+                       in zip(rapidfuzz_scores, difflib_scores)]
+        similar = [difference for difference, exact, fast
+                   in zip(differences, difflib_scores, rapidfuzz_scores)
+                   if max(exact, fast) >= 0.5]
+        assert min(differences) > -1e-9
+        assert sum(1 for d in similar if d > 1e-9) < len(similar) / 50
+        assert [item[1][0] for item in
+                scan_titles(candidates, query, scorer='rapidfuzz')[:10]] == \
+            [item[1][0] for item in scan_titles(candidates, query)[:10]]
+
+
+def _names():
+    random = Random(11)
+    names = ['Fred Astaire', 'Ginger Rogers', 'Astaire, Fred', 'Rita Hayworth',
+             'Fred Allen', 'Frank Sinatra']
+    candidates = []
+    for i in range(1000):
+        name = list(random.choice(names))
+        for _edit in range(random.randint(0, 3)):
+            name[random.randrange(len(name))] = random.choice('aeiorst ')
+        candidates.append((i, {'name': ''.join(name)}))
+    return candidates
+
+
+class CutoffScorer(DifflibScorer):
+    def __init__(self):
+        self.cutoffs = []
+
+    def scores(self, query, candidates, cutoff=0.0):
+        self.cutoffs.append(cutoff)
+        return super().scores(query, candidates, cutoff)
+
+
+@pytest.mark.parametrize('results', [1, 5, 50])
+def test_best_results_are_the_top_of_the_full_ranking(results):
+    kinds = ['movie', 'episode', 'short', None]
+    titles = [(i, dict(t_data, kind=kinds[i % 4], year=str(i % 3 or '')))
+              for i, t_data in _candidates()]
+    names = _names()
+    for query in ['The Matrix', 'Miss Jerry', 'Heat']:
+        full = CutoffScorer()
+        best = CutoffScorer()
+        assert scan_titles(titles, query, results=results, scorer=best) == \
+            scan_titles(titles, query, scorer=full)[:results]
+        # The candidates left are scored only if they can be among the best.
+        assert max(best.cutoffs) > max(full.cutoffs)
+    for query in ['Fred Astaire', 'Rogers, Ginger']:
+        assert scan_names(names, query, results=results) == \
+            scan_names(names, query)[:results]
+
+
+def test_scorers_are_pluggable():
+    class ExactScorer:
+        def scores(self, query, candidates, cutoff=0.0):
+            return [1.0 if candidate == query else 0.0
+                    for candidate in candidates]
+
+    candidates = [(1, {'title': 'The Matrix'}), (2, {'title': 'The Matrixx'})]
+
+    assert [item[1][0] for item in
+            scan_titles(candidates, 'The Matrix', scorer=ExactScorer())] == [1]
+    with pytest.raises(IMDbError, match='unknown scorer'):
+        Cinemagoer('s3', uri='sqlite://', scorer='levenshtein')
+    with Cinemagoer('s3', uri='sqlite://', scorer='difflib') as ia:
+        assert ia.scorer.name == 'difflib'